@@ -1,23 +1,48 @@
 import os
 from app.UserConfigFile import UserConfigFile
 from app.exceptions.ucf_checker_exceptions import UCFCheckerException
-from app.boite_a_bonheur.utils import to_csv, to_json
+from app.boite_a_bonheur.utils import to_json
 from app.scrappers_module import MeteoScrapper
+from app.archives_module import PageArchive
+from app.caches_module import (EmptyCache,
+                               PageCache,
+                               ResultCache)
+from app.fetchers_module import FetchEngine
+from app.pool_module import WorkerPool
+from app.metrics_module import MetricsReport
+from app.profiling_module import ProfileReport
+from app.memory_module import (MemoryProbe,
+                               MemoryReport)
+from app.results_module import UCResults
+from app.traces_module import ChromeTrace
+from app.ucs_module import (GeneralParametersUC,
+                            ScrapperUC)
 import multiprocessing as mp
 
 
 class Main:
 
     DIRECTORIES = {"data": "resultats",
-                   "errors": "erreurs"}
+                   "errors": "erreurs",
+                   "empty": "vides",
+                   "metrics": "metriques"}
 
     @classmethod
     def run(cls) -> None:
         """lancer les téléchargements"""
         # (1)   Lecture du fichier config.
-        # (2)   Pour chaque UC, on créé un nom de fichier pour le CSV (résultats) et pour le JSON (erreurs).
-        # (3)   Instanciation du scrapper et téléchargement des données.
-        # (4)   Enregistrement des résultats et des erreurs.
+        # (2)   Pour chaque UC, on créé un nom de fichier pour le CSV (résultats), pour le JSON (erreurs)
+        #       et pour le JSON des périodes sans données (vides).
+        # (3)   Téléchargement des données de tous les UCs (voir MeteoScrapper.scrap_ucs).
+        # (4)   Dès qu'un UC est terminé, enregistrement de ses résultats, erreurs et périodes vides.
+        # (5)   Les mesures des TPs de tous les UCs sont enregistrées à la fin, par UC et par site,
+        #       avec leur chronologie en mode trace.
+        #       En mode profilage, les profils de tous les UCs sont agrégés par type de scrapper,
+        #       enregistrés avec les mesures, et leurs fonctions les plus coûteuses affichées.
+        #       En mode profilage mémoire, les pics par étape, la mémoire des process et les principaux sites
+        #       d'allocation de chaque UC sont enregistrés avec les mesures, et affichés.
+        # (6)   Workers, connexions, caches et archive sont fermés même en cas d'erreur : les workers sont arrêtés,
+        #       les caches et l'archive d'enregistrement écrits.
 
         # (1)
         try:
@@ -32,22 +57,18 @@ class Main:
             return
 
         print("fichier config.json trouvé, lancement des téléchargements\n")
+        report = MetricsReport()
+        trace = ChromeTrace()
+        profiles = ProfileReport()
+        memory = MemoryReport()
 
-        for uc in ucf.get_all_ucs():
+        def save_uc(uc: ScrapperUC,
+                    scrapper: MeteoScrapper,
+                    data: UCResults) -> None:
+            # (2)
+            base_filename = cls.base_filename(uc)
             workdir = os.getcwd()
 
-            if uc.dates[0] == uc.dates[-1]:
-                base_filename = "_".join([uc.scrapper_type.name,
-                                          uc.city,
-                                          uc.dates[0].replace("/","-")])\
-                                    .lower()
-            else:
-                base_filename = "_".join([uc.scrapper_type.name,
-                                          uc.city,
-                                          f"du_{uc.dates[0].replace('/','-')}",
-                                          f"au_{uc.dates[-1].replace('/','-')}"])\
-                                    .lower()
-
             data_filename = os.path.join(workdir,
                                          cls.DIRECTORIES["data"],
                                          base_filename + ".csv")
@@ -55,20 +76,71 @@ class Main:
             errors_filename = os.path.join(workdir,
                                            cls.DIRECTORIES["errors"],
                                            base_filename + ".json")
-            # (3)
-            scrapper = MeteoScrapper.scrapper_instance(uc)
-            data = scrapper.scrap_uc(uc)
 
+            empty_filename = os.path.join(workdir,
+                                          cls.DIRECTORIES["empty"],
+                                          base_filename + ".json")
             # (4)
             if not data.empty:
-                to_csv(data, data_filename)
+                data.to_csv(data_filename)
 
             if scrapper.errors:
                 to_json(scrapper.errors, errors_filename)
 
+            if scrapper.known_empty:
+                print(f"{len(scrapper.known_empty)} période(s) sans données")
+                to_json(scrapper.known_empty, empty_filename)
+
+            report.add(base_filename, scrapper.metrics.values())
+            trace.add(base_filename, scrapper.metrics.values())
+            profiles.merge(scrapper.profiles)
+            memory.add(base_filename,
+                       scrapper.metrics.values(),
+                       scrapper.memory_peaks,
+                       scrapper.allocation_sites,
+                       MemoryProbe.rss())
+        # (3)
+        try:
+            MeteoScrapper.scrap_ucs(ucf.get_all_ucs(), save_uc)
+
+            # (5)
+            report.write(os.path.join(os.getcwd(), cls.DIRECTORIES["metrics"]))
+            if GeneralParametersUC.instance().trace:
+                trace.write(os.path.join(os.getcwd(), cls.DIRECTORIES["metrics"]))
+            if GeneralParametersUC.instance().profiling:
+                profiles.write(os.path.join(os.getcwd(), cls.DIRECTORIES["metrics"]))
+                print(profiles.summary())
+            if GeneralParametersUC.instance().memory_profiling:
+                memory.write(os.path.join(os.getcwd(), cls.DIRECTORIES["metrics"]))
+                print(memory.summary())
+        finally:
+            # (6)
+            WorkerPool.close()
+            FetchEngine.close()
+            PageCache.close()
+            ResultCache.close()
+            EmptyCache.close()
+            PageArchive.close()
+
+    @staticmethod
+    def base_filename(uc: ScrapperUC) -> str:
+        """Nom commun des fichiers de résultats, d'erreurs et de périodes vides de l'UC."""
+        if uc.dates[0] == uc.dates[-1]:
+            return "_".join([uc.scrapper_type.name,
+                             uc.city,
+                             uc.dates[0].replace("/","-")])\
+                      .lower()
+
+        return "_".join([uc.scrapper_type.name,
+                         uc.city,
+                         f"du_{uc.dates[0].replace('/','-')}",
+                         f"au_{uc.dates[-1].replace('/','-')}"])\
+                  .lower()
+
     @staticmethod
     def stop() -> None:
         print("arrêt du programme sur demande de l'utilisateur")
+        WorkerPool.terminate()
         for active_process in mp.active_children():
             active_process.terminate()
 
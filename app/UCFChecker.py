@@ -1,6 +1,7 @@
 import os
 from json import JSONDecodeError
 from app.boite_a_bonheur.utils import from_json
+from app.boite_a_bonheur.ArchiveSettings import ArchiveSettings
 from app.boite_a_bonheur.UCFParameterEnum import (UCFParameters,
                                                   UCFParameter)
 from app.exceptions.ucf_checker_exceptions import (DateFieldException,
@@ -28,6 +29,11 @@ class UCFChecker:
                 and isinstance(obj, str) \
                 and len(obj) != 0
 
+    @staticmethod
+    def is_valid_number(obj) -> bool:
+        return      not isinstance(obj, bool) \
+                and isinstance(obj, (int, float))
+
     @staticmethod
     def check_dates_field(uc : dict,
                           scrapper_name: UCFParameter) -> None:
@@ -185,6 +191,182 @@ class UCFChecker:
         except ValueError:
             raise GeneralParametersFieldException(UCFParameters.CPUS)
 
+        try:
+            render_timeout = gpuc[UCFParameters.RENDER_TIMEOUT.json_name]
+            if not UCFChecker.is_valid_number(render_timeout) or render_timeout <= 0:
+                raise GeneralParametersFieldException(UCFParameters.RENDER_TIMEOUT)
+        except KeyError:
+            pass
+
+        try:
+            retry_delay = gpuc[UCFParameters.RETRY_DELAY.json_name]
+            if not UCFChecker.is_valid_number(retry_delay) or retry_delay < 0:
+                raise GeneralParametersFieldException(UCFParameters.RETRY_DELAY)
+        except KeyError:
+            pass
+
+        try:
+            max_attempts = gpuc[UCFParameters.MAX_ATTEMPTS.json_name]
+            if(   not UCFChecker.is_valid_number(max_attempts)
+               or not isinstance(max_attempts, int)
+               or max_attempts < 1):
+                raise GeneralParametersFieldException(UCFParameters.MAX_ATTEMPTS)
+        except KeyError:
+            pass
+
+        try:
+            max_pending_tps = gpuc[UCFParameters.MAX_PENDING_TPS.json_name]
+            if(   not UCFChecker.is_valid_number(max_pending_tps)
+               or not isinstance(max_pending_tps, int)
+               or max_pending_tps < 1):
+                raise GeneralParametersFieldException(UCFParameters.MAX_PENDING_TPS)
+        except KeyError:
+            pass
+
+        UCFChecker.check_limits(gpuc.get(UCFParameters.LIMITS.json_name, dict()))
+        UCFChecker.check_cache(gpuc.get(UCFParameters.CACHE.json_name, dict()))
+        UCFChecker.check_workers(gpuc.get(UCFParameters.WORKERS.json_name, dict()))
+
+        try:
+            UCFChecker.check_archive(gpuc[UCFParameters.ARCHIVE.json_name])
+        except KeyError:
+            pass
+
+        try:
+            local_server = gpuc[UCFParameters.LOCAL_SERVER.json_name]
+            if(   not UCFChecker.is_valid_str(local_server)
+               or not local_server.startswith(("http://", "https://"))):
+                raise GeneralParametersFieldException(UCFParameters.LOCAL_SERVER)
+        except KeyError:
+            pass
+
+        try:
+            if not isinstance(gpuc[UCFParameters.TRACE.json_name], bool):
+                raise GeneralParametersFieldException(UCFParameters.TRACE)
+        except KeyError:
+            pass
+
+        try:
+            if not isinstance(gpuc[UCFParameters.PROFILING.json_name], bool):
+                raise GeneralParametersFieldException(UCFParameters.PROFILING)
+        except KeyError:
+            pass
+
+        try:
+            if not isinstance(gpuc[UCFParameters.MEMORY_PROFILING.json_name], bool):
+                raise GeneralParametersFieldException(UCFParameters.MEMORY_PROFILING)
+        except KeyError:
+            pass
+
+    @staticmethod
+    def check_archive(archive) -> None:
+        """Contrôle les paramètres de l'archive des pages, champ optionnel des paramètres généraux."""
+        # (1)   L'archive est un objet JSON, le mode est obligatoire : enregistrement ou relecture.
+        # (2)   Le fichier est optionnel, mais doit exister en relecture.
+        if not isinstance(archive, dict):
+            raise NotAJsonObjectException(UCFParameters.ARCHIVE)
+        # (1)
+        try:
+            mode = archive[UCFParameters.ARCHIVE_MODE.json_name]
+            if mode not in [ArchiveSettings.RECORD_MODE, ArchiveSettings.REPLAY_MODE]:
+                raise GeneralParametersFieldException(UCFParameters.ARCHIVE_MODE)
+        except KeyError:
+            raise RequiredFieldException(UCFParameters.ARCHIVE,
+                                         UCFParameters.ARCHIVE_MODE)
+        # (2)
+        filename = archive.get(UCFParameters.ARCHIVE_FILE.json_name,
+                               UCFParameters.DEFAULT_ARCHIVE_FILE)
+
+        if(   not isinstance(filename, str)
+           or not filename.strip()
+           or (mode == ArchiveSettings.REPLAY_MODE and not os.path.isfile(filename))):
+            raise GeneralParametersFieldException(UCFParameters.ARCHIVE_FILE)
+
+    @staticmethod
+    def check_cache(cache) -> None:
+        """Contrôle les paramètres du cache, champ optionnel des paramètres généraux."""
+        # Le cache est un objet JSON, dont tous les champs sont optionnels.
+        # actif est un booléen, age_max (heures), taille_max (Mo) et delai_vides (heures) des nombres positifs.
+        if not isinstance(cache, dict):
+            raise NotAJsonObjectException(UCFParameters.CACHE)
+
+        try:
+            if not isinstance(cache[UCFParameters.CACHE_ENABLED.json_name], bool):
+                raise GeneralParametersFieldException(UCFParameters.CACHE_ENABLED)
+        except KeyError:
+            pass
+
+        for field in [UCFParameters.CACHE_MAX_AGE,
+                      UCFParameters.CACHE_MAX_SIZE,
+                      UCFParameters.CACHE_EMPTY_RECHECK]:
+            try:
+                value = cache[field.json_name]
+                if not UCFChecker.is_valid_number(value) or value < 0:
+                    raise GeneralParametersFieldException(field)
+            except KeyError:
+                pass
+
+    @staticmethod
+    def check_workers(workers) -> None:
+        """Contrôle les paramètres du remplacement des workers, champ optionnel des paramètres généraux."""
+        # Un objet JSON, dont tous les champs sont optionnels.
+        # taches_max est un entier positif, memoire_max (Mo) un nombre positif. 0 désactive le remplacement.
+        if not isinstance(workers, dict):
+            raise NotAJsonObjectException(UCFParameters.WORKERS)
+
+        try:
+            max_tasks = workers[UCFParameters.WORKERS_MAX_TASKS.json_name]
+            if(   not UCFChecker.is_valid_number(max_tasks)
+               or not isinstance(max_tasks, int)
+               or max_tasks < 0):
+                raise GeneralParametersFieldException(UCFParameters.WORKERS_MAX_TASKS)
+        except KeyError:
+            pass
+
+        try:
+            max_memory = workers[UCFParameters.WORKERS_MAX_MEMORY.json_name]
+            if not UCFChecker.is_valid_number(max_memory) or max_memory < 0:
+                raise GeneralParametersFieldException(UCFParameters.WORKERS_MAX_MEMORY)
+        except KeyError:
+            pass
+
+    @staticmethod
+    def check_limits(limits) -> None:
+        """Contrôle les limites de débit par site, champ optionnel des paramètres généraux."""
+        # (1)   Les limites sont un objet JSON dont les clés sont des noms de sites.
+        # (2)   Les limites de chaque site sont un objet JSON, dont les champs sont optionnels.
+        # (3)   Le nombre de requêtes par seconde doit être un nombre strictement positif,
+        #       le nombre de requêtes simultanées un entier strictement positif.
+
+        # (1)
+        if not isinstance(limits, dict):
+            raise NotAJsonObjectException(UCFParameters.LIMITS)
+
+        families = [x.json_name for x in UCFParameters.SCRAPPERS]
+        if not all([x in families for x in limits.keys()]):
+            raise GeneralParametersFieldException(UCFParameters.LIMITS)
+
+        for family_limits in limits.values():
+            # (2)
+            if not isinstance(family_limits, dict):
+                raise GeneralParametersFieldException(UCFParameters.LIMITS)
+            # (3)
+            try:
+                rate = family_limits[UCFParameters.REQUESTS_PER_SECOND.json_name]
+                if not UCFChecker.is_valid_number(rate) or rate <= 0:
+                    raise GeneralParametersFieldException(UCFParameters.REQUESTS_PER_SECOND)
+            except KeyError:
+                pass
+
+            try:
+                max_in_flight = family_limits[UCFParameters.MAX_IN_FLIGHT.json_name]
+                if(   not UCFChecker.is_valid_number(max_in_flight)
+                   or not isinstance(max_in_flight, int)
+                   or max_in_flight <= 0):
+                    raise GeneralParametersFieldException(UCFParameters.MAX_IN_FLIGHT)
+            except KeyError:
+                pass
+
     @staticmethod
     def check_scrappers(config: dict) -> None:
         """Contrôle la validité de la structures des paramètres des scrappers"""
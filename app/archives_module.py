@@ -0,0 +1,199 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from time import time
+from typing import Optional
+from app.boite_a_bonheur.ArchiveSettings import ArchiveSettings
+from app.caches_module import (canonical_url,
+                               url_key)
+from app.tps_module import TaskParameters
+from app.ucs_module import GeneralParametersUC
+
+
+class PageArchive:
+    """Archive des pages téléchargées, dans un seul fichier, pour retraiter une récolte sans réseau.
+
+    Structure du fichier :
+        MAGIC
+        enregistrements : taille des métadonnées (4 octets), taille de la page compressée (4 octets),
+                          métadonnées JSON (url, statut, horodatage, clé du TP), page compressée (zlib)
+        index JSON : empreinte de l'URL canonique -> position de l'enregistrement
+        pied : position de l'index (8 octets), MAGIC
+
+    En enregistrement, les pages sont ajoutées à la fin d'une archive existante.
+    En relecture, le fichier est projeté en mémoire (mmap) et les pages lues via l'index.
+    Une archive interrompue avant l'écriture de son index est relue en parcourant ses enregistrements."""
+
+    MAGIC = b"METEOARC"
+    RECORD_HEADER = struct.Struct("<II")
+    FOOTER = struct.Struct("<Q8s")
+    _INSTANCE = None
+
+    def __init__(self, settings: Optional[ArchiveSettings]):
+        self._settings = settings
+        self._file = None
+        self._mmap = None
+        self._index = dict()
+
+        if settings is None:
+            return
+
+        if settings.is_recording:
+            self._open_for_recording(settings.filename)
+        else:
+            self._open_for_replay(settings.filename)
+
+    @property
+    def is_recording(self):
+        return self._settings is not None and self._settings.is_recording
+
+    @property
+    def is_replaying(self):
+        return self._settings is not None and self._settings.is_replaying
+
+    @property
+    def urls(self):
+        return [entry["url"] for entry in self._index.values()]
+
+    @classmethod
+    def instance(cls) -> "PageArchive":
+        if cls._INSTANCE is None:
+            cls._INSTANCE = PageArchive(GeneralParametersUC.instance().archive)
+
+        return cls._INSTANCE
+
+    def record(self,
+               tp: TaskParameters,
+               html_text: str,
+               status: int = 200) -> None:
+        """Ajoute la page du TP à l'archive (mode enregistrement uniquement)."""
+        if not self.is_recording:
+            return
+
+        url = canonical_url(tp.url)
+        meta = json.dumps({"url": url,
+                           "status": status,
+                           "timestamp": time(),
+                           "key": tp.key}).encode("utf-8")
+        payload = zlib.compress(html_text.encode("utf-8"))
+        offset = self._file.tell()
+
+        self._file.write(self.RECORD_HEADER.pack(len(meta), len(payload)))
+        self._file.write(meta)
+        self._file.write(payload)
+        self._index[url_key(url)] = {"url": url,
+                                     "key": tp.key,
+                                     "offset": offset}
+
+    def get(self, tp: TaskParameters) -> Optional[str]:
+        """Renvoie la page du TP lue dans l'archive, None si elle n'y est pas (mode relecture uniquement)."""
+        return self.read(tp.url)
+
+    def read(self, url: str) -> Optional[str]:
+        """Renvoie la page de l'URL lue dans l'archive, None si elle n'y est pas (mode relecture uniquement)."""
+        if not self.is_replaying:
+            return None
+
+        entry = self._index.get(url_key(url))
+
+        if entry is None:
+            return None
+
+        meta_len, payload_len = self.RECORD_HEADER.unpack_from(self._mmap, entry["offset"])
+        start = entry["offset"] + self.RECORD_HEADER.size + meta_len
+
+        return zlib.decompress(self._mmap[start:start + payload_len]).decode("utf-8")
+
+    @classmethod
+    def close(cls) -> None:
+        """Termine l'archive partagée, voir finish()."""
+        if cls._INSTANCE is None:
+            return
+
+        archive = cls._INSTANCE
+        cls._INSTANCE = None
+        archive.finish()
+
+    def finish(self) -> None:
+        """Termine l'archive : écriture de l'index en enregistrement, libération du fichier en relecture."""
+        if self.is_recording:
+            index_offset = self._file.tell()
+            self._file.write(json.dumps(self._index).encode("utf-8"))
+            self._file.write(self.FOOTER.pack(index_offset, self.MAGIC))
+            self._file.truncate()
+
+        if self._mmap is not None:
+            self._mmap.close()
+
+        if self._file is not None:
+            self._file.close()
+
+    def _open_for_recording(self, filename: str) -> None:
+        # Une archive existante est complétée : on reprend son index,
+        # et les nouveaux enregistrements écrasent l'ancien index et le pied.
+        if not os.path.isfile(filename) or os.path.getsize(filename) == 0:
+            self._file = open(filename, "wb")
+            self._file.write(self.MAGIC)
+            return
+
+        self._file = open(filename, "r+b")
+        data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._index, end_of_records = self._read_index(data)
+        finally:
+            data.close()
+
+        self._file.seek(end_of_records)
+        self._file.truncate()
+
+    def _open_for_replay(self, filename: str) -> None:
+        self._file = open(filename, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index, _ = self._read_index(self._mmap)
+
+    @classmethod
+    def _read_index(cls, data: mmap.mmap) -> tuple:
+        """Renvoie l'index de l'archive et la position de la fin des enregistrements."""
+        if data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError("le fichier n'est pas une archive de pages")
+
+        if len(data) >= len(cls.MAGIC) + cls.FOOTER.size:
+            index_offset, magic = cls.FOOTER.unpack_from(data, len(data) - cls.FOOTER.size)
+            if magic == cls.MAGIC:
+                index = json.loads(data[index_offset:len(data) - cls.FOOTER.size].decode("utf-8"))
+                return index, index_offset
+
+        return cls._scan_records(data)
+
+    @classmethod
+    def _scan_records(cls, data: mmap.mmap) -> tuple:
+        # Archive sans index (arrêt brutal) : on reconstruit l'index enregistrement par enregistrement,
+        # en s'arrêtant au premier enregistrement incomplet.
+        index = dict()
+        offset = len(cls.MAGIC)
+
+        while offset + cls.RECORD_HEADER.size <= len(data):
+            meta_len, payload_len = cls.RECORD_HEADER.unpack_from(data, offset)
+            meta_start = offset + cls.RECORD_HEADER.size
+            end = meta_start + meta_len + payload_len
+
+            if end > len(data):
+                break
+
+            try:
+                meta = json.loads(data[meta_start:meta_start + meta_len].decode("utf-8"))
+            except ValueError:
+                break
+
+            index[url_key(meta["url"])] = {"url": meta["url"],
+                                           "key": meta["key"],
+                                           "offset": offset}
+            offset = end
+
+        return index, offset
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._settings}, {len(self._index)} pages>"
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+from datetime import datetime
+from time import perf_counter
+from typing import (Dict,
+                    List,
+                    Optional)
+from requests_html import HTML
+from app.benchmarks.synthetic_pages import SyntheticPages
+from app.boite_a_bonheur.ScrapperTypeEnum import (ScrapperType,
+                                                 ScrapperTypes)
+from app.scrappers_module import (MeteoScrapper,
+                                  MeteocielDaily,
+                                  MeteocielHourly,
+                                  OgimetDaily,
+                                  OgimetHourly,
+                                  WundergroundDaily)
+from app.tps_module import (TaskParameters,
+                            TPBuilder)
+
+CORPUS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_budgets.json")
+MANIFEST = "corpus.json"
+
+SCRAPPERS = {ScrapperTypes.METEOCIEL_DAILY: MeteocielDaily,
+             ScrapperTypes.METEOCIEL_HOURLY: MeteocielHourly,
+             ScrapperTypes.OGIMET_DAILY: OgimetDaily,
+             ScrapperTypes.OGIMET_HOURLY: OgimetHourly,
+             ScrapperTypes.WUNDERGROUND_DAILY: WundergroundDaily}
+
+# Étapes mesurées, dans l'ordre du traitement d'une page par _process_tp.
+# _fill_partial_rows, appelée par _rework_data, n'existe que pour ogimet.
+STAGES = ["_find_table",
+          "_scrap_columns_names",
+          "_scrap_columns_values",
+          "_fill_partial_rows",
+          "_rework_data",
+          "_add_missing_rows"]
+
+
+class CorpusTable:
+    """Table de données d'une page, enregistrée dans le corpus avec les paramètres du TP qui l'a produite."""
+
+    def __init__(self,
+                 name: str,
+                 scrapper_type: ScrapperType,
+                 year: int,
+                 month: int,
+                 day: int = 0,
+                 ndays: int = 0,
+                 description: str = ""):
+        self._name = name
+        self._scrapper_type = scrapper_type
+        self._year = year
+        self._month = month
+        self._day = day
+        self._ndays = ndays
+        self._description = description
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def scrapper_type(self):
+        return self._scrapper_type
+
+    @property
+    def filename(self):
+        return f"{self._name}.html"
+
+    @property
+    def description(self):
+        return self._description
+
+    @property
+    def tp(self) -> TaskParameters:
+        builder = TPBuilder(self._scrapper_type).with_city("corpus")\
+                                                 .with_year(self._year)\
+                                                 .with_month(self._month)
+
+        if self._scrapper_type in ScrapperTypes.hourly_scrappers():
+            builder.with_day(self._day)
+
+        if self._scrapper_type in ScrapperTypes.meteociel_scrappers():
+            builder.with_code("7249")
+        elif self._scrapper_type in ScrapperTypes.ogimet_scrappers():
+            builder.with_ind("16138")
+        else:
+            builder.with_country_code("it").with_region("LIBD")
+
+        if self._scrapper_type == ScrapperTypes.OGIMET_HOURLY:
+            builder.with_ndays(self._ndays)
+
+        return builder.build()
+
+    def scrapper(self) -> MeteoScrapper:
+        return SCRAPPERS[self._scrapper_type]()
+
+    def read(self, directory: str = CORPUS_DIRECTORY) -> str:
+        with open(os.path.join(directory, self.filename), encoding="utf-8") as html_file:
+            return html_file.read()
+
+    @classmethod
+    def from_json(cls, jsono: dict) -> "CorpusTable":
+        scrapper_type = [x for x in ScrapperTypes.values() if x.name == jsono["scrapper"]][0]
+        return CorpusTable(jsono["nom"],
+                           scrapper_type,
+                           jsono["annee"],
+                           jsono["mois"],
+                           jsono.get("jour", 0),
+                           jsono.get("ndays", 0),
+                           jsono.get("description", ""))
+
+    def to_json(self) -> dict:
+        return {"nom": self._name,
+                "scrapper": self._scrapper_type.name,
+                "annee": self._year,
+                "mois": self._month,
+                "jour": self._day,
+                "ndays": self._ndays,
+                "description": self._description}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._name}>"
+
+
+# Tables du corpus, et paramètres des pages synthétiques dont elles sont extraites (voir generate_corpus).
+# Des tables issues de vraies pages peuvent y être ajoutées : le fichier html et son entrée dans corpus.json suffisent.
+CORPUS = [(CorpusTable("meteociel_jour", ScrapperTypes.METEOCIEL_DAILY, 2021, 3,
+                       description="mois complet"), dict()),
+          (CorpusTable("meteociel_jour_jours_absents", ScrapperTypes.METEOCIEL_DAILY, 2020, 2,
+                       description="février bissextile, jours absents de la table"), {"missing_rows_rate": 0.15}),
+          (CorpusTable("meteociel_heure", ScrapperTypes.METEOCIEL_HOURLY, 2021, 3, day=1,
+                       description="directions du vent dans les images, vent variable"), dict()),
+          (CorpusTable("ogimet_jour", ScrapperTypes.OGIMET_DAILY, 2021, 2,
+                       description="mois complet"), dict()),
+          (CorpusTable("ogimet_jour_lignes_partielles", ScrapperTypes.OGIMET_DAILY, 2021, 1,
+                       description="lignes interrompues avant leurs dernières valeurs"), {"partial_rows_rate": 0.3}),
+          (CorpusTable("ogimet_jour_jours_absents", ScrapperTypes.OGIMET_DAILY, 2020, 2,
+                       description="février bissextile, jours absents de la table"), {"missing_rows_rate": 0.15}),
+          (CorpusTable("ogimet_heure", ScrapperTypes.OGIMET_HOURLY, 2021, 1, day=31, ndays=31,
+                       description="mois complet, précipitations sur 2 lignes"), dict()),
+          (CorpusTable("ogimet_heure_lignes_partielles", ScrapperTypes.OGIMET_HOURLY, 2021, 1, day=31, ndays=31,
+                       description="mois complet, lignes interrompues avant leurs dernières valeurs"),
+           {"partial_rows_rate": 0.05}),
+          (CorpusTable("wunderground_jour", ScrapperTypes.WUNDERGROUND_DAILY, 2021, 1,
+                       description="colonnes principales regroupant leurs sous-colonnes"), dict())]
+
+
+def generate_corpus(directory: str = CORPUS_DIRECTORY) -> None:
+    """(Re)crée le corpus : les tables de données extraites des pages synthétiques, et le manifeste corpus.json."""
+    os.makedirs(directory, exist_ok=True)
+
+    for table, page_parameters in CORPUS:
+        tp = table.tp
+        page = SyntheticPages(**page_parameters).page(tp.url)
+        html_data = MeteoScrapper._find_table(HTML(html=page), tp)
+
+        with open(os.path.join(directory, table.filename), "w", encoding="utf-8") as html_file:
+            html_file.write(html_data.html)
+
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as manifest:
+        json.dump([table.to_json() for table, _ in CORPUS], manifest, indent=2, ensure_ascii=False)
+
+
+def load_corpus(directory: str = CORPUS_DIRECTORY) -> List[CorpusTable]:
+    with open(os.path.join(directory, MANIFEST), encoding="utf-8") as manifest:
+        return [CorpusTable.from_json(x) for x in json.load(manifest)]
+
+
+def run_stages(table: CorpusTable,
+               html_text: str) -> Dict[str, float]:
+    """Traite la table comme _process_tp, et renvoie la durée de chaque étape en secondes."""
+    # _rework_data appelle lui-même _fill_partial_rows : sa durée est mesurée à part, sur les mêmes valeurs,
+    # et déduite de celle de _rework_data.
+    scrapper = table.scrapper()
+    tp = table.tp
+    durations = dict()
+
+    start = perf_counter()
+    html_data = scrapper._find_table(HTML(html=html_text), tp)
+    durations["_find_table"] = perf_counter() - start
+
+    start = perf_counter()
+    col_names = scrapper._scrap_columns_names(html_data)
+    durations["_scrap_columns_names"] = perf_counter() - start
+
+    start = perf_counter()
+    values = scrapper._scrap_columns_values(html_data)
+    durations["_scrap_columns_values"] = perf_counter() - start
+
+    fill_duration = 0.0
+    if hasattr(scrapper, "_fill_partial_rows"):
+        values_copy = list(values)
+        start = perf_counter()
+        scrapper._fill_partial_rows(values_copy, len(col_names), tp)
+        fill_duration = perf_counter() - start
+        durations["_fill_partial_rows"] = fill_duration
+
+    start = perf_counter()
+    df = scrapper._rework_data(values, col_names, tp)
+    durations["_rework_data"] = max(0.0, perf_counter() - start - fill_duration)
+
+    start = perf_counter()
+    scrapper._add_missing_rows(df, tp)
+    durations["_add_missing_rows"] = perf_counter() - start
+
+    return durations
+
+
+def measure(tables: List[CorpusTable],
+            repetitions: int,
+            directory: str = CORPUS_DIRECTORY) -> Dict[str, Dict[str, dict]]:
+    """Renvoie, pour chaque table et chaque étape, la médiane et le minimum des durées en ms."""
+    # Chaque répétition reprend depuis le html : les éléments déjà parcourus ne sont pas réutilisés.
+    measures = dict()
+
+    for table in tables:
+        html_text = table.read(directory)
+        runs = [run_stages(table, html_text) for _ in range(repetitions)]
+        measures[table.name] = {stage: {"mediane_ms": round(statistics.median(x[stage] for x in runs) * 1000, 3),
+                                        "min_ms": round(min(x[stage] for x in runs) * 1000, 3)}
+                                for stage in STAGES
+                                if stage in runs[0]}
+    return measures
+
+
+def check_budgets(measures: Dict[str, Dict[str, dict]],
+                  budgets: dict,
+                  factor: float = 1.0) -> List[str]:
+    """Renvoie les dépassements de budget : médianes supérieures au budget de l'étape (en ms) multiplié par factor.
+
+    budgets : {"defaut": {étape: ms}, "tables": {table: {étape: ms}}}, le budget propre à une table
+    remplaçant le budget par défaut de l'étape."""
+    exceeded = []
+
+    for name, stages in measures.items():
+        table_budgets = dict(budgets.get("defaut", dict()), **budgets.get("tables", dict()).get(name, dict()))
+
+        for stage, measure_ms in stages.items():
+            budget = table_budgets.get(stage)
+
+            if budget is not None and measure_ms["mediane_ms"] > budget * factor:
+                exceeded.append(f"{name} {stage} : {measure_ms['mediane_ms']} ms > {budget * factor} ms")
+
+    return exceeded
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Durée des étapes de traitement des pages, sur le corpus de tables.")
+    parser.add_argument("--tables", nargs="+", default=None, help="noms des tables à mesurer, toutes par défaut")
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument("--budgets", default=BUDGETS_FILE, help="budgets JSON des étapes, en ms")
+    parser.add_argument("--facteur", type=float, default=1.0, help="multiplie les budgets, pour une machine plus lente")
+    parser.add_argument("--sortie", default=None, help="fichier JSON des mesures")
+    parser.add_argument("--generer", action="store_true", help="recréer le corpus depuis les pages synthétiques")
+    args = parser.parse_args(argv)
+
+    if args.generer:
+        generate_corpus()
+
+    tables = [x for x in load_corpus() if args.tables is None or x.name in args.tables]
+    measures = measure(tables, args.repetitions)
+
+    for name, stages in measures.items():
+        print(name)
+        for stage, measure_ms in stages.items():
+            print(f"    {stage:<24}{measure_ms['mediane_ms']:>10.3f} ms")
+
+    if args.sortie:
+        with open(args.sortie, "w") as output_file:
+            json.dump({"date": datetime.now().isoformat(timespec="seconds"),
+                       "repetitions": args.repetitions,
+                       "mesures": measures},
+                      output_file,
+                      indent=2)
+
+    with open(args.budgets) as budgets_file:
+        exceeded = check_budgets(measures, json.load(budgets_file), args.facteur)
+
+    for line in exceeded:
+        print(f"budget dépassé : {line}")
+
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+import argparse
+import calendar
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+from typing import (List,
+                    Optional)
+import numpy as np
+from app.benchmarks.stand_in_server import (ServerProfile,
+                                            StandInServer)
+from app.boite_a_bonheur.ScrapperTypeEnum import (ScrapperType,
+                                                 ScrapperTypes)
+from app.boite_a_bonheur.UCFParameterEnum import UCFParameters
+
+try:
+    import resource
+except ImportError:
+    # module unix : sous windows, le pic de mémoire et le temps cpu d'un cas ne sont pas mesurés
+    resource = None
+
+UNAVAILABLE = "indisponible"
+
+
+class BenchmarkCase:
+    """Un cas du banc d'essai : un type de scrapper, une charge (mois x stations), un mode et un nombre de cpus."""
+
+    SEQUENTIAL = "sequentiel"
+    PARALLEL = "parallele"
+    # Dernier mois de chaque charge : les périodes sont terminées, comme pour une récolte d'historique.
+    LAST_YEAR = 2023
+
+    def __init__(self,
+                 scrapper_type: ScrapperType,
+                 months: int,
+                 stations: int,
+                 mode: str,
+                 cpus: int):
+        self._scrapper_type = scrapper_type
+        self._months = months
+        self._stations = stations
+        self._mode = mode
+        self._cpus = cpus
+
+    @property
+    def scrapper_type(self):
+        return self._scrapper_type
+
+    @property
+    def months(self):
+        return self._months
+
+    @property
+    def stations(self):
+        return self._stations
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def cpus(self):
+        return self._cpus
+
+    @property
+    def key(self) -> str:
+        """Identifiant du cas, pour comparer les résultats de 2 lancements."""
+        return f"{self._scrapper_type.name}_{self._months}m_{self._stations}s_{self._mode}_{self._cpus}"
+
+    def to_config(self,
+                  server_url: str,
+                  site_limits: bool) -> dict:
+        """Renvoie le fichier config de ce cas, les pages étant demandées au serveur local."""
+        # (1)   Les caches sont désactivés : chaque lancement télécharge et traite toutes les pages.
+        # (2)   Sauf demande contraire, les limites des sites sont levées pour mesurer le pipeline et non le bridage.
+        # (3)   1 UC par station, sur les mêmes mois.
+        family = self._family()
+        # (1)
+        general_parameters = {UCFParameters.PARALLELISM.json_name: self._mode == self.PARALLEL,
+                              UCFParameters.CPUS.json_name: self._cpus,
+                              UCFParameters.CACHE.json_name: {UCFParameters.CACHE_ENABLED.json_name: False},
+                              UCFParameters.LOCAL_SERVER.json_name: server_url}
+        # (2)
+        if not site_limits:
+            general_parameters[UCFParameters.LIMITS.json_name] = {
+                scrapper.json_name: {UCFParameters.REQUESTS_PER_SECOND.json_name: 10000,
+                                     UCFParameters.MAX_IN_FLIGHT.json_name: UCFParameters.MAX_DOWNLOADS}
+                for scrapper in UCFParameters.SCRAPPERS}
+        # (3)
+        ucs = [self._station(family, index) for index in range(self._stations)]
+
+        return {UCFParameters.GENERAL_PARAMETERS.json_name: general_parameters,
+                family.json_name: ucs}
+
+    def _family(self):
+        if self._scrapper_type in ScrapperTypes.meteociel_scrappers():
+            return UCFParameters.METEOCIEL
+
+        if self._scrapper_type in ScrapperTypes.ogimet_scrappers():
+            return UCFParameters.OGIMET
+
+        return UCFParameters.WUNDERGROUND
+
+    def _station(self, family, index: int) -> dict:
+        # Les dates jj/mm/aaaa donnent un UC heure par heure, mm/aaaa un UC jour par jour.
+        first = self.LAST_YEAR * 12 + 12 - self._months
+        start_year, start_month = first // 12, first % 12 + 1
+        last_day = calendar.monthrange(self.LAST_YEAR, 12)[1]
+
+        if self._scrapper_type in ScrapperTypes.hourly_scrappers():
+            dates = [f"1/{start_month}/{start_year}", f"{last_day}/12/{self.LAST_YEAR}"]
+        else:
+            dates = [f"{start_month}/{start_year}", f"12/{self.LAST_YEAR}"]
+
+        station = {UCFParameters.CITY.json_name: f"station_{index}",
+                   UCFParameters.DATES.json_name: dates}
+
+        if family == UCFParameters.METEOCIEL:
+            station[UCFParameters.CODE.json_name] = str(7000 + index)
+        elif family == UCFParameters.OGIMET:
+            station[UCFParameters.IND.json_name] = f"{16000 + index:05d}"
+        else:
+            station[UCFParameters.COUNTRY_CODE.json_name] = "it"
+            station[UCFParameters.REGION.json_name] = f"LI{index:02d}"
+
+        return station
+
+    def to_json(self) -> dict:
+        return {"cas": self.key,
+                "scrapper": self._scrapper_type.name,
+                "mois": self._months,
+                "stations": self._stations,
+                "mode": self._mode,
+                "cpus": self._cpus}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.key}>"
+
+
+def run_case(config_path: str) -> dict:
+    """Lance la récolte de tous les UCs du fichier config, et renvoie ses mesures.
+
+    Exécuté dans un process dédié, pour que le pic de mémoire et le temps cpu ne concernent que ce cas."""
+    # (1)   Les imports du pipeline sont faits ici : la boucle asyncio des scrappers est propre au process.
+    # (2)   Le pool de workers est arrêté après le dernier UC, leurs ressources sont donc dans RUSAGE_CHILDREN.
+    # (1)
+    from app.fetchers_module import FetchEngine
+    from app.pool_module import WorkerPool
+    from app.scrappers_module import MeteoScrapper
+    from app.UserConfigFile import UserConfigFile
+
+    ucf = UserConfigFile.from_json(config_path)
+    pages, rows = 0, 0
+    durations, errors, empty = [], 0, 0
+
+    start = perf_counter()
+    for uc in ucf.get_all_ucs():
+        scrapper = MeteoScrapper.scrapper_instance(uc)
+        df = scrapper.scrap_uc(uc)
+        pages += sum(1 for _ in uc.to_tps())
+        rows += df.shape[0]
+        durations.extend(scrapper.tp_durations.values())
+        errors += len(scrapper.errors)
+        empty += len(scrapper.known_empty)
+    wall_time = perf_counter() - start
+
+    WorkerPool.close()
+    FetchEngine.close()
+    # (2)
+    rss_max, cpu = resource_usage()
+    latencies = np.array(durations) * 1000 if durations else np.zeros(1)
+
+    return {"pages": pages,
+            "lignes": rows,
+            "erreurs": errors,
+            "vides": empty,
+            "duree_s": round(wall_time, 3),
+            "pages_par_s": round(pages / wall_time, 2),
+            "lignes_par_s": round(rows / wall_time, 2),
+            "latence_tp_ms": {"p50": round(float(np.percentile(latencies, 50)), 2),
+                              "p95": round(float(np.percentile(latencies, 95)), 2),
+                              "p99": round(float(np.percentile(latencies, 99)), 2)},
+            "rss_max_mo": rss_max,
+            "cpu_s": cpu}
+
+
+def resource_usage() -> tuple:
+    """Renvoie le pic de mémoire résidente (Mo) et le temps cpu (s) du process et de ses enfants terminés.
+
+    "indisponible" pour chacun hors unix (module resource absent)."""
+    if resource is None:
+        return UNAVAILABLE, UNAVAILABLE
+
+    main = resource.getrusage(resource.RUSAGE_SELF)
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss est en Ko sous linux. Pour les workers, c'est le pic du plus gros d'entre eux.
+    return {"principal": round(main.ru_maxrss / 1024, 1),
+            "workers": round(workers.ru_maxrss / 1024, 1)},\
+           {"principal": round(main.ru_utime + main.ru_stime, 3),
+            "workers": round(workers.ru_utime + workers.ru_stime, 3)}
+
+
+def build_cases(scrapper_types: List[ScrapperType],
+                months: List[int],
+                stations: List[int],
+                cpus: List[int]) -> List[BenchmarkCase]:
+    """Renvoie les cas à mesurer : pour chaque type et chaque charge, le séquentiel puis le parallèle pour chaque cpus."""
+    cases = []
+    for scrapper_type in scrapper_types:
+        for nb_months in months:
+            for nb_stations in stations:
+                cases.append(BenchmarkCase(scrapper_type, nb_months, nb_stations, BenchmarkCase.SEQUENTIAL, 1))
+                cases.extend(BenchmarkCase(scrapper_type, nb_months, nb_stations, BenchmarkCase.PARALLEL, nb_cpus)
+                             for nb_cpus in cpus)
+    return cases
+
+
+def run_benchmark(cases: List[BenchmarkCase],
+                  profile: ServerProfile,
+                  site_limits: bool = False) -> dict:
+    """Mesure chaque cas dans un process dédié, contre un serveur local lancé pour l'occasion."""
+    results = []
+    with StandInServer(profile) as server,\
+         tempfile.TemporaryDirectory() as tmp:
+        for case in cases:
+            config_path = os.path.join(tmp, "config.json")
+            result_path = os.path.join(tmp, "resultat.json")
+            with open(config_path, "w") as config_file:
+                json.dump(case.to_config(server.url, site_limits), config_file)
+
+            # Les url traitées, affichées par les scrappers, ne sont pas reprises.
+            # Les fichiers du cache éventuellement créés le sont dans le dossier temporaire.
+            completed = subprocess.run([sys.executable, "-m", __spec__.name, "--cas", config_path, result_path],
+                                       cwd=tmp,
+                                       env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+                                       stdout=subprocess.DEVNULL)
+            if completed.returncode != 0:
+                print(f"{case.key} : échec")
+                continue
+
+            with open(result_path) as result_file:
+                result = dict(case.to_json(), **json.load(result_file))
+
+            results.append(result)
+            print("{cas} : {pages_par_s} pages/s, {lignes_par_s} lignes/s, p95 {p95} ms".format(p95=result["latence_tp_ms"]["p95"],
+                                                                                                **result))
+
+    return {"date": datetime.now().isoformat(timespec="seconds"),
+            "serveur": {"loi": profile.latency_law,
+                        "latence_ms": profile.latency_ms,
+                        "erreurs": profile.error_rate,
+                        "bridage": profile.throttle_rate,
+                        "vides": profile.empty_rate},
+            "limites_des_sites": site_limits,
+            "resultats": results}
+
+
+def compare(results: dict,
+            reference: dict,
+            threshold: float) -> List[str]:
+    """Renvoie les cas dont le débit en pages/s a baissé de plus de threshold (0.1 : 10%) par rapport à la référence."""
+    reference_cases = {result["cas"]: result for result in reference["resultats"]}
+    regressions = []
+
+    for result in results["resultats"]:
+        previous = reference_cases.get(result["cas"])
+        if previous is None:
+            continue
+
+        ratio = result["pages_par_s"] / previous["pages_par_s"]
+        print(f"{result['cas']} : {previous['pages_par_s']} -> {result['pages_par_s']} pages/s ({ratio - 1:+.1%})")
+
+        if ratio < 1 - threshold:
+            regressions.append(result["cas"])
+
+    return regressions
+
+
+def _scrapper_type(name: str) -> ScrapperType:
+    for scrapper_type in ScrapperTypes.values():
+        if scrapper_type.name == name:
+            return scrapper_type
+
+    raise argparse.ArgumentTypeError(f"type de scrapper inconnu : {name}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Débit de bout en bout de scrap_uc contre le serveur local.")
+    parser.add_argument("--types", nargs="+", type=_scrapper_type,
+                        default=[ScrapperTypes.METEOCIEL_DAILY, ScrapperTypes.METEOCIEL_HOURLY,
+                                 ScrapperTypes.OGIMET_DAILY, ScrapperTypes.OGIMET_HOURLY],
+                        help="types de scrapper, ex : ogimet_jour meteociel_heure")
+    parser.add_argument("--mois", nargs="+", type=int, default=[1, 12], help="nombre de mois par station (1 à 120)")
+    parser.add_argument("--stations", nargs="+", type=int, default=[1], help="nombre de stations (1 à 100)")
+    parser.add_argument("--cpus", nargs="+", type=int, default=[2], help="valeurs de cpus mesurées en parallèle")
+    parser.add_argument("--loi", default=ServerProfile.LOGNORMAL,
+                        choices=[ServerProfile.CONSTANT, ServerProfile.UNIFORM, ServerProfile.LOGNORMAL])
+    parser.add_argument("--latence", type=float, default=50, help="latence du serveur local en ms")
+    parser.add_argument("--erreurs", type=float, default=0.0, help="proportion de réponses 500")
+    parser.add_argument("--vides", type=float, default=0.0, help="proportion de pages sans données")
+    parser.add_argument("--limites-des-sites", action="store_true",
+                        help="conserver les limites de débit par défaut des sites")
+    parser.add_argument("--sortie", default=None, help="fichier JSON des résultats")
+    parser.add_argument("--reference", default=None, help="résultats JSON d'un lancement précédent, à comparer")
+    parser.add_argument("--seuil", type=float, default=0.1, help="baisse de débit tolérée par rapport à la référence")
+    parser.add_argument("--cas", nargs=2, metavar=("CONFIG", "RESULTAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # process dédié à un cas, lancé par run_benchmark
+    if args.cas:
+        with open(args.cas[1], "w") as result_file:
+            json.dump(run_case(args.cas[0]), result_file)
+        return 0
+
+    cases = build_cases(args.types, args.mois, args.stations, args.cpus)
+    profile = ServerProfile(latency_law=args.loi,
+                            latency_ms=args.latence,
+                            error_rate=args.erreurs,
+                            empty_rate=args.vides)
+    results = run_benchmark(cases, profile, args.limites_des_sites)
+
+    output = args.sortie or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"résultats : {output}")
+
+    if args.reference is None:
+        return 0
+
+    with open(args.reference) as reference_file:
+        regressions = compare(results, json.load(reference_file), args.seuil)
+
+    for key in regressions:
+        print(f"régression : {key}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
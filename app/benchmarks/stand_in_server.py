@@ -0,0 +1,295 @@
+import argparse
+import random
+import threading
+from collections import Counter
+from http.server import (BaseHTTPRequestHandler,
+                         ThreadingHTTPServer)
+from time import (monotonic,
+                  sleep)
+from typing import Optional
+from app.archives_module import PageArchive
+from app.benchmarks.synthetic_pages import SyntheticPages
+from app.boite_a_bonheur.ArchiveSettings import ArchiveSettings
+
+
+class ServerProfile:
+    """Comportement du serveur local : latence, erreurs, bridage et pages vides."""
+
+    CONSTANT = "constante"
+    UNIFORM = "uniforme"
+    LOGNORMAL = "lognormale"
+
+    def __init__(self,
+                 latency_law: str = LOGNORMAL,
+                 latency_ms: float = 100,
+                 latency_sigma: float = 0.5,
+                 error_rate: float = 0.0,
+                 throttle_rate: float = 0.0,
+                 empty_rate: float = 0.0,
+                 max_requests_per_second: float = 0,
+                 partial_rows_rate: float = 0.0,
+                 archive: Optional[str] = None,
+                 seed: int = 0):
+        if latency_law not in (self.CONSTANT, self.UNIFORM, self.LOGNORMAL):
+            raise ValueError(f"ServerProfile : loi de latence invalide {latency_law}")
+
+        self._latency_law = latency_law
+        self._latency_ms = latency_ms
+        self._latency_sigma = latency_sigma
+        self._error_rate = error_rate
+        self._throttle_rate = throttle_rate
+        self._empty_rate = empty_rate
+        self._max_requests_per_second = max_requests_per_second
+        self._partial_rows_rate = partial_rows_rate
+        self._archive = archive
+        self._seed = seed
+
+    @property
+    def latency_law(self):
+        return self._latency_law
+
+    @property
+    def latency_ms(self):
+        """Latence médiane (lognormale), moyenne (uniforme) ou fixe (constante) des réponses."""
+        return self._latency_ms
+
+    @property
+    def latency_sigma(self):
+        return self._latency_sigma
+
+    @property
+    def error_rate(self):
+        """Proportion de réponses 500."""
+        return self._error_rate
+
+    @property
+    def throttle_rate(self):
+        """Proportion de réponses 429, en plus de celles dues au dépassement de max_requests_per_second."""
+        return self._throttle_rate
+
+    @property
+    def empty_rate(self):
+        """Proportion de pages "no valid data"."""
+        return self._empty_rate
+
+    @property
+    def max_requests_per_second(self):
+        """Nombre max de requêtes par seconde et par site, au-delà duquel le serveur répond 429. 0 : illimité."""
+        return self._max_requests_per_second
+
+    @property
+    def partial_rows_rate(self):
+        return self._partial_rows_rate
+
+    @property
+    def archive(self):
+        """Archive de pages enregistrées, servies en priorité sur les pages synthétiques."""
+        return self._archive
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def latency(self, rng: random.Random) -> float:
+        """Tire une latence, en secondes."""
+        if self._latency_law == self.CONSTANT:
+            return self._latency_ms / 1000
+
+        if self._latency_law == self.UNIFORM:
+            return rng.uniform(0, 2 * self._latency_ms) / 1000
+
+        return self._latency_ms * rng.lognormvariate(0, self._latency_sigma) / 1000
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__} {self._latency_law} {self._latency_ms}ms, "
+                f"erreurs {self._error_rate}, bridage {self._throttle_rate}, vides {self._empty_rate}>")
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.respond(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Serveur http local qui remplace meteociel, ogimet et wunderground, aux mêmes chemins d'URL.
+
+    Chaque requête est servie dans son propre thread : les latences se chevauchent comme sur les vrais sites.
+    S'utilise avec 'with', ou via start() et stop()."""
+
+    daemon_threads = True
+    # Hôte du vrai site selon le début du chemin de l'URL, pour retrouver les pages enregistrées.
+    SITES = {"/climatologie/": "www.meteociel.com",
+             "/temps-reel/": "www.meteociel.com",
+             "/cgi-bin/gsynres": "www.ogimet.com",
+             "/history/": "www.wunderground.com"}
+
+    def __init__(self,
+                 profile: ServerProfile,
+                 port: int = 0,
+                 host: str = "127.0.0.1"):
+        super().__init__((host, port), _StandInHandler)
+        self._profile = profile
+        self._pages = SyntheticPages(profile.seed, profile.partial_rows_rate)
+        self._archive = None if profile.archive is None else\
+                        PageArchive(ArchiveSettings(ArchiveSettings.REPLAY_MODE, profile.archive))
+        self._rng = random.Random(profile.seed)
+        self._lock = threading.Lock()
+        self._windows = dict()
+        self._stats = Counter()
+        self._thread = None
+
+    @property
+    def profile(self):
+        return self._profile
+
+    @property
+    def url(self):
+        """URL de base du serveur, à renseigner dans le paramètre serveur_local."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        """Nombre de réponses servies par statut."""
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+        if self._archive is not None:
+            self._archive.finish()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def respond(self, handler: BaseHTTPRequestHandler) -> None:
+        # (1)   Le tirage aléatoire est protégé par un verrou, les requêtes étant servies en parallèle.
+        # (2)   Bridage : au-delà de max_requests_per_second requêtes sur la seconde en cours pour le site,
+        #       ou au hasard selon throttle_rate, le serveur répond 429.
+        # (3)   Puis erreurs serveur, et pages sans données.
+        # (4)   Sinon la page enregistrée dans l'archive, ou à défaut la page synthétique.
+        site = self._site_of(handler.path)
+
+        if site is None:
+            return self._send(handler, 404, "")
+
+        real_url = f"https://{site}{handler.path}"
+        # (1)
+        with self._lock:
+            latency = self._profile.latency(self._rng)
+            draw = self._rng.random()
+            is_over_limit = self._is_over_limit(site)
+
+        sleep(latency)
+        # (2)
+        if is_over_limit or draw < self._profile.throttle_rate:
+            return self._send(handler, 429, "Too many requests", {"Retry-After": "1"})
+        draw -= self._profile.throttle_rate
+        # (3)
+        if draw < self._profile.error_rate:
+            return self._send(handler, 500, "Internal server error")
+        draw -= self._profile.error_rate
+
+        if draw < self._profile.empty_rate:
+            return self._send(handler, 200, self._pages.no_valid_data_page(real_url))
+        # (4)
+        page = None if self._archive is None else self._archive.read(real_url)
+        page = page or self._pages.page(real_url)
+
+        if page is None:
+            return self._send(handler, 404, "")
+
+        self._send(handler, 200, page)
+
+    def _send(self,
+              handler: BaseHTTPRequestHandler,
+              status: int,
+              body: str,
+              headers: dict = None) -> None:
+        data = body.encode("utf-8")
+
+        with self._lock:
+            self._stats[status] += 1
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or dict()).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _site_of(self, path: str) -> Optional[str]:
+        for prefix, site in self.SITES.items():
+            if path.startswith(prefix):
+                return site
+
+        return None
+
+    def _is_over_limit(self, site: str) -> bool:
+        # Fenêtre fixe d'une seconde par site.
+        if not self._profile.max_requests_per_second:
+            return False
+
+        second = int(monotonic())
+        window_second, count = self._windows.get(site, (second, 0))
+
+        if window_second != second:
+            window_second, count = second, 0
+
+        self._windows[site] = (window_second, count + 1)
+
+        return count + 1 > self._profile.max_requests_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serveur local remplaçant meteociel, ogimet et wunderground.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--loi", choices=[ServerProfile.CONSTANT, ServerProfile.UNIFORM, ServerProfile.LOGNORMAL],
+                        default=ServerProfile.LOGNORMAL, help="loi de la latence des réponses")
+    parser.add_argument("--latence", type=float, default=100, help="latence en ms")
+    parser.add_argument("--sigma", type=float, default=0.5, help="écart type de la loi lognormale")
+    parser.add_argument("--erreurs", type=float, default=0.0, help="proportion de réponses 500")
+    parser.add_argument("--bridage", type=float, default=0.0, help="proportion de réponses 429")
+    parser.add_argument("--vides", type=float, default=0.0, help="proportion de pages sans données")
+    parser.add_argument("--requetes-max", type=float, default=0, help="requêtes par seconde et par site avant 429")
+    parser.add_argument("--lignes-partielles", type=float, default=0.0, help="proportion de lignes ogimet incomplètes")
+    parser.add_argument("--archive", default=None, help="archive de pages enregistrées à servir")
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = ServerProfile(latency_law=args.loi,
+                            latency_ms=args.latence,
+                            latency_sigma=args.sigma,
+                            error_rate=args.erreurs,
+                            throttle_rate=args.bridage,
+                            empty_rate=args.vides,
+                            max_requests_per_second=args.requetes_max,
+                            partial_rows_rate=args.lignes_partielles,
+                            archive=args.archive,
+                            seed=args.graine)
+    server = StandInServer(profile, args.port)
+    print(f"serveur local sur {server.url}, {profile}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import calendar
+import random
+import zlib
+from datetime import (date,
+                      timedelta)
+from typing import (Callable,
+                    List,
+                    Optional)
+from urllib.parse import (parse_qs,
+                          urlsplit)
+
+# Noms abrégés des mois tels qu'affichés par wunderground.
+MONTH_ABBREVIATIONS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+WIND_DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                   "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW", "CAL"]
+
+
+class SyntheticPages:
+    """Pages html imitant celles de meteociel, ogimet et wunderground, aux mêmes chemins d'URL.
+
+    Les valeurs sont tirées au hasard, mais de façon reproductible : une même URL et une même graine
+    donnent toujours la même page. La structure des tables est celle attendue par les scrappers,
+    cas particuliers compris (lignes ogimet journalières incomplètes, directions du vent meteociel en images,
+    colonnes wunderground imbriquées, jours absents des tables journalières)."""
+
+    NO_VALID_DATA = "No valid data found in database for the requested period"
+
+    def __init__(self,
+                 seed: int = 0,
+                 partial_rows_rate: float = 0.0,
+                 missing_rows_rate: float = 0.0):
+        self._seed = seed
+        self._partial_rows_rate = partial_rows_rate
+        self._missing_rows_rate = missing_rows_rate
+        self._routes = {"/climatologie/obs_villes.php": self._meteociel_daily,
+                        "/temps-reel/obs_villes.php": self._meteociel_hourly,
+                        "/cgi-bin/gsynres": self._ogimet}
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def page(self, url: str) -> Optional[str]:
+        """Renvoie la page de l'URL, None si elle ne correspond à aucun site connu."""
+        parts = urlsplit(url)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        rng = random.Random(zlib.crc32(url.encode("utf-8")) ^ self._seed)
+
+        if parts.path.startswith("/history/monthly/"):
+            return self._wunderground_daily(parts.path, rng)
+
+        route: Callable = self._routes.get(parts.path)
+
+        return None if route is None else route(query, rng)
+
+    def no_valid_data_page(self, url: str) -> Optional[str]:
+        """Renvoie une page dont la table de données indique qu'il n'y a aucune donnée pour la période."""
+        path = urlsplit(url).path
+
+        if path == "/climatologie/obs_villes.php":
+            attrs = 'cellpadding="2"'
+        elif path == "/temps-reel/obs_villes.php":
+            attrs = 'bgcolor="#EBFAF7"'
+        elif path == "/cgi-bin/gsynres":
+            attrs = 'bgcolor="#d0d0d0"'
+        elif path.startswith("/history/monthly/"):
+            attrs = 'aria-labelledby="History days"'
+        else:
+            return None
+
+        return self._document(f'<table {attrs}><thead><tr><th>{self.NO_VALID_DATA}</th></tr></thead></table>')
+
+    @staticmethod
+    def _document(body: str) -> str:
+        return f"<html><head><meta charset=\"utf-8\"></head><body>{body}</body></html>"
+
+    @staticmethod
+    def _row(cells: List[str], tag: str = "td") -> str:
+        return "<tr>" + "".join(f"<{tag}>{x}</{tag}>" for x in cells) + "</tr>"
+
+    def _is_missing_row(self, rng: random.Random) -> bool:
+        # Pas de tirage sans jours absents : les pages restent identiques à celles générées sans ce paramètre.
+        return self._missing_rows_rate > 0 and rng.random() < self._missing_rows_rate
+
+    @staticmethod
+    def _maybe_missing(rng: random.Random, value: str, rate: float = 0.05) -> str:
+        return "---" if rng.random() < rate else value
+
+    def _meteociel_daily(self, query: dict, rng: random.Random) -> str:
+        # 1 ligne par jour, puis une ligne de moyennes que le scrapper ignore.
+        # La dernière colonne, sans nom, contient les images des phénomènes.
+        year, month = int(query["annee"]), int(query["mois"])
+        ndays = calendar.monthrange(year, month)[1]
+        rows = [self._row(["Jour", "Temp. max.", "Temp. min.", "Précipitations 24h", "Ensoleillement", ""])]
+
+        for day in range(1, ndays + 1):
+            if self._is_missing_row(rng):
+                continue
+
+            tmin = round(rng.uniform(-5, 15), 1) + 0.0
+            rain = rng.random()
+            rows.append(self._row([str(day),
+                                   self._maybe_missing(rng, f"{round(tmin + rng.uniform(2, 12), 1)} °C"),
+                                   self._maybe_missing(rng, f"{tmin} °C"),
+                                   "aucune" if rain < 0.5 else ("traces" if rain < 0.6 else f"{round(rng.uniform(0.1, 30), 1)} mm"),
+                                   f"{round(rng.uniform(0, 12), 1)} h",
+                                   '<img src="/images/phenomenes/pluie.gif">']))
+
+        rows.append(self._row(["Moy.", "", "", "", "", ""]))
+
+        return self._document('<table width="100%" border="1" cellpadding="2">' + "".join(rows) + "</table>")
+
+    def _meteociel_hourly(self, query: dict, rng: random.Random) -> str:
+        # Les heures sont listées de la plus récente à la plus ancienne.
+        # La colonne vent (rafales) est précédée d'une colonne sans nom, dont l'image contient
+        # la direction du vent dans sa pop-up.
+        rows = [self._row(["Heure<br>locale", "Néb.", "Temps", "Visi", "Température", "Humi.",
+                           "Point de rosée", "Humidex", "Windchill", "Vent (rafales)", "Pression", "Précip.<br>mm/h"])]
+
+        for hour in range(23, -1, -1):
+            temperature = round(rng.uniform(-5, 25), 1)
+            wind = rng.randint(0, 40)
+            # Les vents de direction variable n'ont pas de valeur en degrés dans leur pop-up.
+            direction = " variable" if rng.random() < 0.05 else f";({rng.randrange(0, 360, 10)}°)"
+            wind_img = f"<img src=\"/images/vent.gif\" onmouseover=\"showtip('Vent moyen : {wind} km/h{direction}')\">"
+            rows.append("<tr>" + "".join(f"<td>{x}</td>" for x in [f"{hour} h",
+                                                                    f"{rng.randint(0, 8)}/8",
+                                                                    "",
+                                                                    f"{rng.randint(1, 50)} km",
+                                                                    f"{temperature} °C",
+                                                                    f"{rng.randint(30, 100)}%",
+                                                                    f"{round(temperature - rng.uniform(0, 8), 1)} °C",
+                                                                    str(temperature),
+                                                                    str(round(temperature - rng.uniform(0, 5), 1)),
+                                                                    wind_img,
+                                                                    f"{wind} km/h ({wind + rng.randint(0, 30)} km/h)",
+                                                                    f"{round(rng.uniform(990, 1035), 1)} hPa",
+                                                                    "aucune" if rng.random() < 0.7 else f"{round(rng.uniform(0.1, 5), 1)} mm/1h"])
+                        + "</tr>")
+
+        return self._document('<table width="100%" border="1" bgcolor="#EBFAF7">' + "".join(rows) + "</table>")
+
+    def _ogimet(self, query: dict, rng: random.Random) -> str:
+        if query.get("decoded") == "yes":
+            return self._ogimet_hourly(query, rng)
+
+        return self._ogimet_daily(query, rng)
+
+    def _truncate(self, cells: List[str], rng: random.Random) -> List[str]:
+        # Ogimet arrête prématurément les lignes dont les dernières valeurs manquent.
+        if rng.random() >= self._partial_rows_rate:
+            return cells
+
+        return cells[:rng.randint(2, len(cells) - 1)]
+
+    def _ogimet_daily(self, query: dict, rng: random.Random) -> str:
+        # L'en-tête compte 2 lignes : noms principaux, puis compléments de la température et du vent.
+        # Le résumé quotidien occupe 8 cellules d'images par ligne.
+        year, month, ndays = int(query["ano"]), int(query["mes"]), int(query["ndays"])
+        header = self._row(["Date", "Temperature<br>(C)", "Td Avg<br>(C)", "Hr. Avg<br>(%)", "Wind<br>(km/h)",
+                            "Pres. s.lev<br>(Hp)", "Prec.<br>(mm)", "Tot Cl<br>oct", "Low Cl<br>oct", "VIS<br>km",
+                            "Daily weather summary"], "th")
+        sub_header = self._row(["Max", "Min", "Avg", "Dir.", "Int."], "th")
+        rows = []
+
+        for day in range(1, min(ndays, calendar.monthrange(year, month)[1]) + 1):
+            if self._is_missing_row(rng):
+                continue
+
+            tmin = round(rng.uniform(-5, 15), 1)
+            tmax = round(tmin + rng.uniform(2, 12), 1)
+            cells = [f"{month:02d}/{day:02d}",
+                     str(tmax),
+                     str(tmin),
+                     str(round((tmin + tmax) / 2, 1)),
+                     str(round(tmin - rng.uniform(0, 5), 1)),
+                     str(round(rng.uniform(40, 100), 1)),
+                     rng.choice(WIND_DIRECTIONS),
+                     str(round(rng.uniform(0, 30), 1)),
+                     str(round(rng.uniform(990, 1035), 1)),
+                     self._maybe_missing(rng, str(round(rng.uniform(0, 20), 1)), 0.5),
+                     str(round(rng.uniform(0, 8), 1)),
+                     self._maybe_missing(rng, str(round(rng.uniform(0, 8), 1)), 0.1),
+                     str(round(rng.uniform(1, 50), 1))] + ['<img src="/gif/sun.gif">'] * 8
+            rows.append(self._row(self._truncate(cells, rng)))
+
+        return self._document('<table border="0" bgcolor="#d0d0d0"><thead>' + header + sub_header + "</thead>"
+                              + "<tbody>" + "".join(rows) + "</tbody></table>")
+
+    def _ogimet_hourly(self, query: dict, rng: random.Random) -> str:
+        # ndays jours de 24 heures, du plus récent au plus ancien, puis une ligne du jour
+        # précédant le 1er jour demandé, que le scrapper ignore.
+        # Les lignes de 1h et 0h ne sont jamais interrompues : OgimetHourly._fill_partial_rows
+        # les traite ensemble, et ne complète pas une ligne interrompue parmi elles.
+        last_day = date(int(query["ano"]), int(query["mes"]), int(query["day"]))
+        ndays = int(query["ndays"])
+        rows = [self._row(["Date", "T<br>(C)", "Td<br>(C)", "Hr<br>%", "Tmax<br>(C)", "Tmin<br>(C)", "ddd",
+                           "ff<br>kmh", "Gust<br>kmh", "Gust<br>Max", "P0<br>hPa", "P<br>sea<br>hPa", "P<br>Tnd",
+                           "Prec<br>(mm)", "N<br>T", "N<br>h", "H<br>Km", "Inso<br>D-1", "Vis<br>Km",
+                           "WW", "W1", "W2"], "th")]
+        hours = [(last_day - timedelta(days=x), hour) for x in range(ndays) for hour in range(23, -1, -1)]
+        hours.append((last_day - timedelta(days=ndays), 23))
+
+        for day, hour in hours:
+            temperature = round(rng.uniform(-5, 25), 1)
+            wind = round(rng.uniform(0, 40), 1)
+            is_synoptic = hour in (6, 18)
+            cells = [day.strftime("%m/%d/%Y"),
+                     f"{hour:02d}:00",
+                     str(temperature),
+                     str(round(temperature - rng.uniform(0, 8), 1)),
+                     str(rng.randint(30, 100)),
+                     str(round(temperature + rng.uniform(0, 5), 1)) if is_synoptic else "----",
+                     str(round(temperature - rng.uniform(0, 5), 1)) if is_synoptic else "----",
+                     rng.choice(WIND_DIRECTIONS),
+                     str(wind),
+                     str(round(wind + rng.uniform(0, 20), 1)),
+                     f"{round(wind + rng.uniform(0, 30), 1)}/1h",
+                     str(round(rng.uniform(990, 1035), 1)),
+                     str(round(rng.uniform(1000, 1045), 1)),
+                     str(round(rng.uniform(-3, 3), 1)),
+                     "Tr/24h<br>Tr/12h" if is_synoptic else rng.choice(["0.0/1h", "0.2/3h", "----"]),
+                     str(rng.randint(0, 8)),
+                     str(rng.randint(0, 8)),
+                     str(round(rng.uniform(0, 2.5), 1)),
+                     str(round(rng.uniform(0, 10), 1)) if is_synoptic else "----",
+                     str(round(rng.uniform(1, 50), 1)),
+                     '<img src="/gif/ww.gif">', "", ""]
+            # sans lignes interrompues, le tirage est inchangé : les pages restent les mêmes
+            if self._partial_rows_rate and hour > 1:
+                cells = self._truncate(cells, rng)
+            rows.append(self._row(cells))
+
+        return self._document('<table border="0" bgcolor="#d0d0d0">' + "".join(rows) + "</table>")
+
+    def _wunderground_daily(self, path: str, rng: random.Random) -> Optional[str]:
+        # Chaque colonne principale est une cellule contenant une table : la 1ère ligne contient
+        # les compléments (Max, Avg, Min ou Total), les suivantes les valeurs de chaque jour.
+        try:
+            year, month = [int(x) for x in path.rstrip("/").split("/")[-1].split("-")]
+        except ValueError:
+            return None
+
+        ndays = calendar.monthrange(year, month)[1]
+        header = self._row(["Time", "Temperature (°F)", "Dew Point (°F)", "Humidity (%)",
+                            "Wind Speed (mph)", "Pressure (in)", "Precipitation (in)"])
+
+        def nested(sub_names: List[str], values: Callable) -> str:
+            return "<table>" + self._row(sub_names) + "".join(self._row(values()) for _ in range(ndays)) + "</table>"
+
+        def max_avg_min(low: float, high: float, digits: int = 1) -> List[str]:
+            x = sorted([round(rng.uniform(low, high), digits) for _ in range(3)], reverse=True)
+            return [str(v) for v in x]
+
+        columns = ["<table>" + self._row([MONTH_ABBREVIATIONS[month - 1]]) + "".join(self._row([str(d)]) for d in range(1, ndays + 1)) + "</table>",
+                   nested(["Max", "Avg", "Min"], lambda: max_avg_min(20, 90)),
+                   nested(["Max", "Avg", "Min"], lambda: max_avg_min(10, 70)),
+                   nested(["Max", "Avg", "Min"], lambda: max_avg_min(30, 100, 0)),
+                   nested(["Max", "Avg", "Min"], lambda: max_avg_min(0, 30)),
+                   nested(["Max", "Avg", "Min"], lambda: max_avg_min(29.5, 30.5, 2)),
+                   nested(["Total"], lambda: [str(round(rng.uniform(0, 1), 2))])]
+
+        return self._document('<table aria-labelledby="History days"><thead>' + header + "</thead><tbody>"
+                              + self._row(columns) + "</tbody></table>")
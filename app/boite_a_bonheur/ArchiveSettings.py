@@ -0,0 +1,39 @@
+class ArchiveSettings:
+
+    RECORD_MODE = "enregistrement"
+    REPLAY_MODE = "relecture"
+
+    def __init__(self,
+                 mode: str,
+                 filename: str):
+        self._mode = mode
+        self._filename = filename
+
+    @property
+    def mode(self):
+        """enregistrement ou relecture des pages téléchargées."""
+        return self._mode
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def is_recording(self):
+        return self._mode == self.RECORD_MODE
+
+    @property
+    def is_replaying(self):
+        return self._mode == self.REPLAY_MODE
+
+    def __eq__(self, other):
+        if other is None or not isinstance(other, ArchiveSettings):
+            return False
+
+        return (self._mode, self._filename) == (other.mode, other.filename)
+
+    def __repr__(self):
+        return f"archive {self._filename}, {self._mode}"
+
+    def __copy__(self):
+        return ArchiveSettings(self._mode, self._filename)
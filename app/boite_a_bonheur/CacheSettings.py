@@ -0,0 +1,43 @@
+class CacheSettings:
+
+    def __init__(self,
+                 enabled: bool,
+                 max_age: float,
+                 max_size: float,
+                 empty_recheck: float):
+        self._enabled = enabled
+        self._max_age = max_age
+        self._max_size = max_size
+        self._empty_recheck = empty_recheck
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @property
+    def max_age(self):
+        """Age max (heures) des pages des périodes en cours, au-delà duquel elles sont retéléchargées."""
+        return self._max_age
+
+    @property
+    def max_size(self):
+        """Taille max du cache (Mo)."""
+        return self._max_size
+
+    @property
+    def empty_recheck(self):
+        """Délai (heures) après lequel une période sans données est de nouveau téléchargée."""
+        return self._empty_recheck
+
+    def __eq__(self, other):
+        if other is None or not isinstance(other, CacheSettings):
+            return False
+
+        return (self._enabled, self._max_age, self._max_size, self._empty_recheck) ==\
+               (other.enabled, other.max_age, other.max_size, other.empty_recheck)
+
+    def __repr__(self):
+        return f"cache {'actif' if self._enabled else 'inactif'}, {self._max_age}h, {self._max_size}Mo, vides {self._empty_recheck}h"
+
+    def __copy__(self):
+        return CacheSettings(self._enabled, self._max_age, self._max_size, self._empty_recheck)
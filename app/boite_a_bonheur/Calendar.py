@@ -0,0 +1,113 @@
+import calendar
+from functools import lru_cache
+from typing import (Iterable,
+                    Tuple)
+import numpy as np
+from app.boite_a_bonheur.MonthEnum import Months
+
+
+class Calendar:
+    """Calendrier des TPs : nombre de jours des mois, années bissextiles comprises,
+    et plages de mois, jours et heures sous forme de tableaux datetime64."""
+
+    # Les dates destinées aux dataframes sont à la résolution de pandas : pas de conversion à leur ajout.
+    RESOLUTION = "datetime64[ns]"
+    OFFSETS_RESOLUTION = "timedelta64[ns]"
+
+    @staticmethod
+    def ndays(year: int, month: int) -> int:
+        """Nombre de jours du mois, 29 pour février les années bissextiles."""
+        leap_day = month == Months.FEVRIER.numero and calendar.isleap(year)
+
+        return Months.from_id(month).ndays + leap_day
+
+    @staticmethod
+    def day(year: int,
+            month: int,
+            day: int = 1) -> np.datetime64:
+        return np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", "D")
+
+    @staticmethod
+    def months(start: Tuple[int, int],
+               end: Tuple[int, int]) -> np.ndarray:
+        """Mois de start à end inclus, start et end étant des tuples (mois, année)."""
+        return np.arange(np.datetime64(f"{start[1]:04d}-{start[0]:02d}", "M"),
+                         np.datetime64(f"{end[1]:04d}-{end[0]:02d}", "M") + 1)
+
+    @classmethod
+    def days(cls,
+             start: Tuple[int, int, int],
+             end: Tuple[int, int, int]) -> np.ndarray:
+        """Jours de start à end inclus, start et end étant des tuples (jour, mois, année)."""
+        return np.arange(cls.day(start[2], start[1], start[0]),
+                         cls.day(end[2], end[1], end[0]) + 1)
+
+    @classmethod
+    def month_days(cls,
+                   year: int,
+                   month: int,
+                   days: Iterable[int] = None) -> np.ndarray:
+        """Jours du mois donnés par leur numéro, tous les jours du mois par défaut.
+
+        ValueError si un numéro n'existe pas dans le mois (0, nan, 30 février...)."""
+        if days is None:
+            return cls.day(year, month) + cls._day_offsets(cls.ndays(year, month))
+
+        days = np.asarray(days, dtype=float)
+        if not ((days >= 1) & (days <= cls.ndays(year, month))).all():
+            raise ValueError(f"Calendar.month_days : jours invalides pour {month}/{year}")
+
+        return (cls.day(year, month) + (days - 1).astype("timedelta64[D]")).astype(cls.RESOLUTION)
+
+    @classmethod
+    def day_hours(cls,
+                  year: int,
+                  month: int,
+                  day: int,
+                  hours: Iterable[int]) -> np.ndarray:
+        """Heures du jour données par leur numéro.
+
+        ValueError si une heure n'est pas comprise entre 0 et 23."""
+        hours = np.asarray(hours, dtype=float)
+        if not ((hours >= 0) & (hours <= 23)).all():
+            raise ValueError(f"Calendar.day_hours : heures invalides pour {day}/{month}/{year}")
+
+        return (cls.day(year, month, day) + hours.astype("timedelta64[h]")).astype(cls.RESOLUTION)
+
+    @classmethod
+    def hours(cls,
+              year: int,
+              month: int,
+              day: int,
+              ndays: int) -> np.ndarray:
+        """Heures des ndays jours finissant le jour day, du jour le plus récent au plus ancien, de 0h à 23h."""
+        return cls.day(year, month, day) + cls._hour_offsets(ndays)
+
+    # Les plages ne dépendent de la date que par leur origine : seuls leurs décalages sont calculés une fois
+    # et gardés, par nombre de jours (au plus 31 formes), et non une plage par jour ou par mois traité.
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _day_offsets(cls, ndays: int) -> np.ndarray:
+        offsets = np.arange(ndays).astype("timedelta64[D]").astype(cls.OFFSETS_RESOLUTION)
+        offsets.flags.writeable = False
+
+        return offsets
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _hour_offsets(cls, ndays: int) -> np.ndarray:
+        days = -np.arange(ndays).astype("timedelta64[D]")
+        offsets = (days[:, np.newaxis] + np.arange(24).astype("timedelta64[h]")).ravel().astype(cls.OFFSETS_RESOLUTION)
+        offsets.flags.writeable = False
+
+        return offsets
+
+    @staticmethod
+    def split(dates: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Renvoie les années, mois et jours (1 pour des mois datetime64[M]) des dates, en tableaux d'int."""
+        years = dates.astype("datetime64[Y]").astype(int) + 1970
+        months = dates.astype("datetime64[M]").astype(int) % 12 + 1
+        days = (dates.astype("datetime64[D]") - dates.astype("datetime64[M]")).astype(int) + 1
+
+        return years, months, days
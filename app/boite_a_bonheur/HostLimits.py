@@ -0,0 +1,25 @@
+class HostLimits:
+
+    def __init__(self, requests_per_second: float, max_in_flight: int):
+        self._requests_per_second = requests_per_second
+        self._max_in_flight = max_in_flight
+
+    @property
+    def requests_per_second(self):
+        return self._requests_per_second
+
+    @property
+    def max_in_flight(self):
+        return self._max_in_flight
+
+    def __eq__(self, other):
+        if other is None or not isinstance(other, HostLimits):
+            return False
+
+        return (self._requests_per_second, self._max_in_flight) == (other.requests_per_second, other.max_in_flight)
+
+    def __repr__(self):
+        return f"{self._requests_per_second} req/s, {self._max_in_flight} simultanées"
+
+    def __copy__(self):
+        return HostLimits(self._requests_per_second, self._max_in_flight)
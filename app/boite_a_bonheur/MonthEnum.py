@@ -50,24 +50,21 @@ class Months:
     NOVEMBRE = Month(11, 30, "NOVEMBRE")
     DECEMBRE = Month(12, 31, "DECEMBRE")
 
+    # Mois indexés par leur numéro : from_id est appelée plusieurs fois par TP.
+    # FEVRIER a 28 jours : le nombre de jours selon l'année est donné par Calendar.ndays.
+    _BY_NUMERO = {x.numero: x for x in (JANVIER, FEVRIER, MARS, AVRIL, MAI, JUIN,
+                                        JUILLET, AOUT, SEPTEMBRE, OCTOBRE, NOVEMBRE, DECEMBRE)}
+
     @classmethod
     def values(cls) -> List[Month]:
-        return [cls.JANVIER,
-                cls.FEVRIER,
-                cls.MARS,
-                cls.AVRIL,
-                cls.MAI,
-                cls.JUIN,
-                cls.JUILLET,
-                cls.AOUT,
-                cls.SEPTEMBRE,
-                cls.OCTOBRE,
-                cls.NOVEMBRE,
-                cls.DECEMBRE]
+        return list(cls._BY_NUMERO.values())
 
     @classmethod
     def from_id(cls, numero: int) -> Month:
-        return [x for x in cls.values() if x.numero == numero][0]
+        try:
+            return cls._BY_NUMERO[numero]
+        except KeyError:
+            raise IndexError(f"Months.from_id : mois inconnu {numero}")
 
     @staticmethod
     def meteociel_hourly_numero(x: Month) -> int:
@@ -0,0 +1,244 @@
+import os
+import tracemalloc
+from contextlib import contextmanager
+from time import (perf_counter,
+                  time)
+from urllib.parse import urlsplit
+
+
+class TPMetrics:
+    """Mesures du traitement d'un TP : durée de chaque étape, octets téléchargés, relances.
+
+    Les étapes exécutées dans un worker y sont mesurées dans un TPMetrics renvoyé avec leur résultat,
+    puis fusionné par le process principal dans celui du TP.
+
+    En mode trace, chaque étape est aussi enregistrée comme un intervalle (nom, début, fin, pid),
+    les dates étant celles de l'horloge système, commune à tous les process.
+
+    En mode profilage mémoire, le pic d'allocation python (tracemalloc) de chaque étape de traitement
+    est aussi mesuré, avec la mémoire résidente du process et de son navigateur."""
+
+    WAIT = "wait"
+    FETCH = "fetch"
+    RENDER = "render"
+    FIND_TABLE = "find_table"
+    COLUMNS_NAMES = "scrap_columns_names"
+    COLUMNS_VALUES = "scrap_columns_values"
+    REWORK = "rework_data"
+    MISSING_ROWS = "add_missing_rows"
+    STAGES = [WAIT, FETCH, RENDER, FIND_TABLE, COLUMNS_NAMES, COLUMNS_VALUES, REWORK, MISSING_ROWS]
+    # Étapes dont la mémoire est mesurée : celles exécutées une à une dans leur process.
+    # Les téléchargements du process principal se chevauchent, leurs pics ne seraient pas séparables.
+    MEMORY_STAGES = [FIND_TABLE, COLUMNS_NAMES, COLUMNS_VALUES, REWORK, MISSING_ROWS]
+    # Intervalles de la trace qui ne sont pas des étapes : le TP entier, et chacune de ses tentatives.
+    TP = "tp"
+    ATTEMPT = "tentative"
+
+    OK = "ok"
+    CACHED = "cache"
+    EMPTY = "vide"
+    ERROR = "erreur"
+
+    def __init__(self,
+                 key: str,
+                 url: str,
+                 trace: bool = False,
+                 memory: bool = False):
+        self._key = key
+        self._url = url
+        self._trace = trace
+        self._memory = memory
+        self._created = time()
+        self._stages = dict()
+        self._spans = []
+        self._downloaded_bytes = 0
+        self._retries = 0
+        self._rows = 0
+        self._status = None
+        self._profile = None
+        self._memory_peaks = dict()
+        self._rss = dict()
+        self._allocation_sites = []
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def url(self):
+        return self._url
+
+    @property
+    def host(self):
+        return urlsplit(self._url).netloc
+
+    @property
+    def stages(self):
+        """Durée cumulée (s) de chaque étape, toutes tentatives comprises."""
+        return dict(self._stages)
+
+    @property
+    def trace(self):
+        return self._trace
+
+    @property
+    def spans(self):
+        """Intervalles (nom, début, fin, pid) enregistrés en mode trace, dans l'ordre de leur fin."""
+        return list(self._spans)
+
+    @property
+    def profile(self):
+        """Statistiques brutes de cProfile du traitement de la page, en mode profilage. Agrégées par ProfileReport."""
+        return self._profile
+
+    def attach_profile(self, profile_stats: dict) -> None:
+        self._profile = profile_stats
+
+    @property
+    def memory(self):
+        return self._memory
+
+    @property
+    def memory_peaks(self):
+        """Pic d'allocation python (octets) de chaque étape de traitement, le plus haut des tentatives."""
+        return dict(self._memory_peaks)
+
+    @property
+    def rss(self):
+        """Mémoire résidente (octets) du process qui a traité la page ("pid", "process") et de son navigateur."""
+        return dict(self._rss)
+
+    @property
+    def allocation_sites(self):
+        """Principaux sites d'allocation encore occupés à la fin du traitement : [site, octets, blocs]."""
+        return list(self._allocation_sites)
+
+    def record_rss(self,
+                   pid: int,
+                   process_rss: int,
+                   browser_rss: int) -> None:
+        """Retient la mémoire résidente la plus haute relevée pour le TP."""
+        self._rss = {"pid": pid,
+                     "process": max(process_rss, self._rss.get("process", 0)),
+                     "navigateur": max(browser_rss, self._rss.get("navigateur", 0))}
+
+    def attach_allocation_sites(self, sites: list) -> None:
+        self._allocation_sites = sites
+
+    @property
+    def downloaded_bytes(self):
+        return self._downloaded_bytes
+
+    @property
+    def retries(self):
+        return self._retries
+
+    @property
+    def rows(self):
+        return self._rows
+
+    @property
+    def status(self):
+        """ok, cache (résultats en cache), vide (aucune donnée) ou erreur. None tant que le TP n'est pas terminé."""
+        return self._status
+
+    def add(self,
+            stage: str,
+            seconds: float) -> None:
+        """Ajoute la durée à l'étape. En mode trace, l'intervalle est celui qui vient de se terminer."""
+        self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+        if self._trace:
+            end = time()
+            self._spans.append((stage, end - seconds, end, os.getpid()))
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Ajoute à l'étape la durée du bloc with, même s'il lève une exception."""
+        is_tracing_memory = self._memory and stage in self.MEMORY_STAGES and tracemalloc.is_tracing()
+        if is_tracing_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, perf_counter() - start)
+
+            if is_tracing_memory:
+                self._add_memory_peak(stage, tracemalloc.get_traced_memory()[1] - base)
+
+    def _add_memory_peak(self,
+                         stage: str,
+                         peak: int) -> None:
+        self._memory_peaks[stage] = max(peak, self._memory_peaks.get(stage, 0))
+
+    @contextmanager
+    def span(self, name: str):
+        """En mode trace, enregistre l'intervalle du bloc with sans l'ajouter aux étapes."""
+        start = time()
+        try:
+            yield
+        finally:
+            if self._trace:
+                self._spans.append((name, start, time(), os.getpid()))
+
+    def add_download(self, html_text: str) -> None:
+        self._downloaded_bytes += len(html_text.encode("utf-8"))
+
+    def merge(self, other: "TPMetrics") -> None:
+        """Ajoute les mesures d'un autre TPMetrics du même TP, typiquement renvoyé par un worker."""
+        for stage, seconds in other.stages.items():
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+        self._spans.extend(other.spans)
+        self._downloaded_bytes += other.downloaded_bytes
+
+        for stage, peak in other.memory_peaks.items():
+            self._add_memory_peak(stage, peak)
+
+        if other.rss:
+            self.record_rss(other.rss["pid"], other.rss["process"], other.rss["navigateur"])
+
+        self._allocation_sites = other.allocation_sites or self._allocation_sites
+
+    def finish(self,
+               status: str,
+               attempts: int,
+               rows: int = 0) -> None:
+        # En mode trace, l'intervalle du TP va de la création de ses mesures, à sa 1ère tentative, jusqu'ici.
+        if self._trace:
+            self._spans.append((self.TP, self._created, time(), os.getpid()))
+
+        self._status = status
+        self._retries = max(0, attempts - 1)
+        self._rows = rows
+
+    def to_json(self) -> dict:
+        return {"url": self._url,
+                "statut": self._status,
+                "etapes_s": self.stages,
+                "octets": self._downloaded_bytes,
+                "relances": self._retries,
+                "lignes": self._rows}
+
+    def __eq__(self, other):
+        if other is None or not isinstance(other, TPMetrics):
+            return False
+
+        return (self._key, self._url, self._stages, self._downloaded_bytes, self._retries, self._rows, self._status) ==\
+               (other.key, other.url, other.stages, other.downloaded_bytes, other.retries, other.rows, other.status)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._key} {self._status} {self._stages}>"
+
+    def __copy__(self):
+        metrics = TPMetrics(self._key, self._url, self._trace, self._memory)
+        metrics._created = self._created
+        metrics.merge(self)
+        metrics._retries = self._retries
+        metrics._rows = self._rows
+        metrics._status = self._status
+
+        return metrics
@@ -1,5 +1,8 @@
 from multiprocessing import cpu_count
 from typing import List, Dict
+from app.boite_a_bonheur.CacheSettings import CacheSettings
+from app.boite_a_bonheur.HostLimits import HostLimits
+from app.boite_a_bonheur.WorkerSettings import WorkerSettings
 
 
 class UCFParameter:
@@ -41,6 +44,28 @@ class UCFParameters:
     GENERAL_PARAMETERS = UCFParameter("parametres_generaux", "")
     PARALLELISM = UCFParameter("parallelisme", "_should_download_in_parallel")
     CPUS = UCFParameter("cpus", "_cpus")
+    LIMITS = UCFParameter("limites", "_limits")
+    REQUESTS_PER_SECOND = UCFParameter("requetes_par_seconde", "_requests_per_second")
+    MAX_IN_FLIGHT = UCFParameter("simultanees", "_max_in_flight")
+    RENDER_TIMEOUT = UCFParameter("attente_max_rendu", "_render_timeout")
+    RETRY_DELAY = UCFParameter("delai_relance", "_retry_delay")
+    MAX_ATTEMPTS = UCFParameter("tentatives", "_max_attempts")
+    MAX_PENDING_TPS = UCFParameter("taches_simultanees", "_max_pending_tps")
+    CACHE = UCFParameter("cache", "_cache")
+    CACHE_ENABLED = UCFParameter("actif", "_enabled")
+    CACHE_MAX_AGE = UCFParameter("age_max", "_max_age")
+    CACHE_MAX_SIZE = UCFParameter("taille_max", "_max_size")
+    CACHE_EMPTY_RECHECK = UCFParameter("delai_vides", "_empty_recheck")
+    ARCHIVE = UCFParameter("archive", "_archive")
+    ARCHIVE_MODE = UCFParameter("mode", "_mode")
+    ARCHIVE_FILE = UCFParameter("fichier", "_filename")
+    LOCAL_SERVER = UCFParameter("serveur_local", "_local_server")
+    TRACE = UCFParameter("trace", "_trace")
+    PROFILING = UCFParameter("profilage", "_profiling")
+    MEMORY_PROFILING = UCFParameter("profilage_memoire", "_memory_profiling")
+    WORKERS = UCFParameter("workers", "_workers")
+    WORKERS_MAX_TASKS = UCFParameter("taches_max", "_max_tasks")
+    WORKERS_MAX_MEMORY = UCFParameter("memoire_max", "_max_memory")
 
     OGIMET = UCFParameter("ogimet", "_ogimet_ucs")
     IND = UCFParameter("ind", "_ind")
@@ -65,10 +90,21 @@ class UCFParameters:
                                         OGIMET,
                                         WUNDERGROUND]
     # valeurs par défaut
-    DEFAULT_WAITING = 2
+    DEFAULT_RETRY_DELAY = 2
+    DEFAULT_RENDER_TIMEOUT = 10
+    DEFAULT_MAX_ATTEMPTS = 3
+    DEFAULT_CACHE = CacheSettings(True, 6, 500, 720)
+    DEFAULT_ARCHIVE_FILE = "archive_pages.bin"
+    DEFAULT_WORKERS = WorkerSettings(0, 0)
     DEFAULT_PARALLELISM = True
     MAX_CPUS = cpu_count()
     DEFAULT_CPUS = MAX_CPUS
+    MAX_DOWNLOADS = 100
+    DEFAULT_MAX_PENDING_TPS = MAX_DOWNLOADS
+    # limites de débit par défaut, par site
+    DEFAULT_LIMITS : Dict[UCFParameter, HostLimits] = {METEOCIEL: HostLimits(4, 8),
+                                                       OGIMET: HostLimits(2, 4),
+                                                       WUNDERGROUND: HostLimits(1, 2)}
     MIN_MONTHS_DAYS_VALUE = 1
     MAX_DATE_FIELD_SIZE = 2
     MIN_YEARS = 1800
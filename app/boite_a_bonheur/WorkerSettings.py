@@ -0,0 +1,30 @@
+class WorkerSettings:
+
+    def __init__(self,
+                 max_tasks: int,
+                 max_memory: float):
+        self._max_tasks = max_tasks
+        self._max_memory = max_memory
+
+    @property
+    def max_tasks(self):
+        """Nombre de tâches par worker au-delà duquel les workers sont remplacés. 0 : jamais."""
+        return self._max_tasks
+
+    @property
+    def max_memory(self):
+        """Mémoire résidente (Mo) d'un worker et de son navigateur au-delà de laquelle les workers sont remplacés.
+        0 : jamais."""
+        return self._max_memory
+
+    def __eq__(self, other):
+        if other is None or not isinstance(other, WorkerSettings):
+            return False
+
+        return (self._max_tasks, self._max_memory) == (other.max_tasks, other.max_memory)
+
+    def __repr__(self):
+        return f"workers remplacés après {self._max_tasks} tâches ou {self._max_memory}Mo"
+
+    def __copy__(self):
+        return WorkerSettings(self._max_tasks, self._max_memory)
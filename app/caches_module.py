@@ -0,0 +1,410 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from datetime import date
+from time import time
+from typing import Optional
+from urllib.parse import (parse_qsl,
+                          urlencode,
+                          urlsplit,
+                          urlunsplit)
+from app.boite_a_bonheur.CacheSettings import CacheSettings
+from app.tps_module import TaskParameters
+from app.ucs_module import GeneralParametersUC
+
+
+def canonical_url(url: str) -> str:
+    """Renvoie l'URL sous une forme unique : schéma et hôte en minuscules, paramètres triés."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+def url_key(url: str) -> str:
+    """Renvoie l'empreinte de l'URL canonique, utilisée comme nom de fichier en cache."""
+    return hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+
+
+def is_final_period(tp: TaskParameters) -> bool:
+    """True si la période couverte par la page du TP est terminée."""
+    return tp.period_end < date.today()
+
+
+class PageCache:
+    """Cache disque des pages html téléchargées, indexé par URL canonique.
+
+    Les pages des périodes terminées ne changent plus et sont conservées sans limite de durée.
+    Celles de la période en cours sont retéléchargées après age_max heures.
+    Au-delà de taille_max Mo, les pages les moins récemment utilisées sont supprimées.
+    Le cache n'est utilisé que par le process principal."""
+
+    DIRECTORY = os.path.join("cache", "pages")
+    INDEX_FILENAME = "index.json"
+    _INSTANCE = None
+
+    def __init__(self,
+                 directory: str,
+                 settings: CacheSettings):
+        self._directory = directory
+        self._settings = settings
+        self._index = self._load_index() if settings.enabled else dict()
+        self._size = sum(entry["size"] for entry in self._index.values())
+        self._is_dirty = False
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def size(self):
+        """Taille des pages en cache (octets)."""
+        return self._size
+
+    @classmethod
+    def instance(cls) -> "PageCache":
+        if cls._INSTANCE is None:
+            cls._INSTANCE = PageCache(os.path.join(os.getcwd(), cls.DIRECTORY),
+                                      GeneralParametersUC.instance().cache)
+
+        return cls._INSTANCE
+
+    def get(self, tp: TaskParameters) -> Optional[str]:
+        """Renvoie le html de la page du TP si elle est en cache et toujours valide, None sinon."""
+        # (1)   Une page de la période en cours n'est valide que age_max heures.
+        #       Une page enregistrée alors que sa période était en cours est finalisée si elle
+        #       se termine depuis : elle doit être retéléchargée une dernière fois.
+        # (2)   Un fichier illisible ou disparu est retiré de l'index.
+        if not self._settings.enabled:
+            return None
+
+        key = url_key(tp.url)
+        entry = self._index.get(key)
+
+        if entry is None:
+            return None
+        # (1)
+        is_expired = time() - entry["stored_at"] > self._settings.max_age * 3600
+        if not entry["final"] and (is_expired or is_final_period(tp)):
+            return None
+        # (2)
+        try:
+            with gzip.open(os.path.join(self._directory, entry["file"]), "rt", encoding="utf-8") as file:
+                html_text = file.read()
+        except (OSError, EOFError):
+            self._remove(key)
+            return None
+
+        entry["last_access"] = time()
+        self._is_dirty = True
+
+        return html_text
+
+    def put(self,
+            tp: TaskParameters,
+            html_text: str) -> None:
+        """Enregistre le html de la page du TP, puis réduit le cache si sa taille max est dépassée."""
+        if not self._settings.enabled:
+            return
+
+        key = url_key(tp.url)
+        filename = f"{key}.html.gz"
+        os.makedirs(self._directory, exist_ok=True)
+
+        with gzip.open(os.path.join(self._directory, filename), "wt", encoding="utf-8") as file:
+            file.write(html_text)
+
+        if key in self._index:
+            self._size -= self._index[key]["size"]
+
+        now = time()
+        size = os.path.getsize(os.path.join(self._directory, filename))
+        self._index[key] = {"url": canonical_url(tp.url),
+                            "file": filename,
+                            "size": size,
+                            "final": is_final_period(tp),
+                            "stored_at": now,
+                            "last_access": now}
+        self._size += size
+        self._is_dirty = True
+        self._evict()
+
+    def flush(self) -> None:
+        """Écrit l'index sur le disque s'il a changé."""
+        # L'index est d'abord écrit dans un fichier temporaire qui remplace ensuite l'ancien,
+        # pour qu'un arrêt brutal ne laisse jamais un index à moitié écrit.
+        if not self._is_dirty:
+            return
+
+        os.makedirs(self._directory, exist_ok=True)
+        path = os.path.join(self._directory, self.INDEX_FILENAME)
+
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self._index, file)
+
+        os.replace(path + ".tmp", path)
+        self._is_dirty = False
+
+    @classmethod
+    def close(cls) -> None:
+        if cls._INSTANCE is None:
+            return
+
+        cls._INSTANCE.flush()
+        cls._INSTANCE = None
+
+    def _evict(self) -> None:
+        # Les pages sont supprimées de la moins récemment utilisée à la plus récente,
+        # jusqu'à 90% de la taille max pour ne pas recommencer à chaque nouvelle page.
+        max_size = self._settings.max_size * 1024 * 1024
+
+        if self._size <= max_size:
+            return
+
+        lru_keys = sorted(self._index, key=lambda k: self._index[k]["last_access"])
+
+        for key in lru_keys:
+            if self._size <= 0.9 * max_size:
+                break
+
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._index.pop(key)
+        self._size -= entry["size"]
+        self._is_dirty = True
+
+        try:
+            os.remove(os.path.join(self._directory, entry["file"]))
+        except OSError:
+            pass
+
+    def _load_index(self) -> dict:
+        # Un index absent ou corrompu équivaut à un cache vide,
+        # les fichiers orphelins seront écrasés au fil des téléchargements.
+        try:
+            with open(os.path.join(self._directory, self.INDEX_FILENAME), "r", encoding="utf-8") as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return dict()
+
+        return index if isinstance(index, dict) else dict()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._index)} pages, {round(self._size / 1024 / 1024, 1)}Mo>"
+
+
+class ResultCache:
+    """Cache disque des résultats traités de chaque TP, au format colonnes de numpy (npz).
+
+    Un relancement récupère directement le DataFrame final du TP, sans téléchargement ni traitement.
+    Seuls les TPs des périodes terminées sont conservés, leurs résultats ne changent plus.
+    Les résultats sont rangés par type de scrapper et par version de son code :
+    changer CODE_VERSION d'un scrapper invalide les résultats de ce scrapper uniquement."""
+
+    DIRECTORY = os.path.join("cache", "resultats")
+    COLUMNS_KEY = "__colonnes__"
+    _INSTANCE = None
+
+    def __init__(self,
+                 directory: str,
+                 settings: CacheSettings):
+        self._directory = directory
+        self._settings = settings
+        self._checked_directories = set()
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @classmethod
+    def instance(cls) -> "ResultCache":
+        if cls._INSTANCE is None:
+            cls._INSTANCE = ResultCache(os.path.join(os.getcwd(), cls.DIRECTORY),
+                                        GeneralParametersUC.instance().cache)
+
+        return cls._INSTANCE
+
+    @classmethod
+    def close(cls) -> None:
+        cls._INSTANCE = None
+
+    def get(self,
+            tp: TaskParameters,
+            code_version: int) -> Optional[pd.DataFrame]:
+        """Renvoie les résultats du TP s'ils sont en cache, None sinon."""
+        if not self._settings.enabled or not is_final_period(tp):
+            return None
+
+        try:
+            with np.load(self._path_of(tp, code_version), allow_pickle=False) as npz:
+                return self._from_arrays(npz)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self,
+            tp: TaskParameters,
+            code_version: int,
+            df: pd.DataFrame) -> None:
+        """Enregistre les résultats du TP si sa période est terminée."""
+        # Le fichier est écrit sous un nom temporaire puis renommé,
+        # un arrêt brutal ne laisse donc jamais de résultats partiels.
+        if not self._settings.enabled or not is_final_period(tp):
+            return
+
+        path = self._path_of(tp, code_version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path + ".tmp", "wb") as file:
+            np.savez(file, **self._to_arrays(df))
+
+        os.replace(path + ".tmp", path)
+
+    def _path_of(self,
+                 tp: TaskParameters,
+                 code_version: int) -> str:
+        # Au premier accès à un type de scrapper, les résultats des autres versions sont supprimés.
+        scrapper_directory = os.path.join(self._directory, tp.scrapper_type.name)
+        version_directory = os.path.join(scrapper_directory, f"v{code_version}")
+
+        if scrapper_directory not in self._checked_directories:
+            self._checked_directories.add(scrapper_directory)
+            self._remove_other_versions(scrapper_directory, version_directory)
+
+        return os.path.join(version_directory, f"{url_key(tp.url)}.npz")
+
+    @staticmethod
+    def _remove_other_versions(scrapper_directory: str, version_directory: str) -> None:
+        try:
+            directories = os.listdir(scrapper_directory)
+        except OSError:
+            return
+
+        for directory in directories:
+            path = os.path.join(scrapper_directory, directory)
+            if path != version_directory:
+                shutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    def _to_arrays(cls, df: pd.DataFrame) -> dict:
+        # (1)   Les colonnes numériques et de dates sont enregistrées telles quelles.
+        # (2)   Les autres (texte) sont converties en tableau de str, avec un masque des valeurs manquantes,
+        #       pour ne pas dépendre de pickle à la relecture.
+        # (3)   Les noms des colonnes sont enregistrés à part, dans l'ordre, et les colonnes par position.
+        arrays = {cls.COLUMNS_KEY: np.array([str(x) for x in df.columns], dtype=str)}
+
+        for position, column in enumerate(df.columns):
+            values = df.iloc[:, position]
+            # (1)
+            if values.dtype.kind in "biufM":
+                arrays[f"c{position}"] = values.to_numpy()
+            # (2)
+            else:
+                mask = values.isna().to_numpy()
+                arrays[f"c{position}"] = np.where(mask, "", values.astype(str).to_numpy()).astype(str)
+                arrays[f"m{position}"] = mask
+
+        return arrays
+
+    @classmethod
+    def _from_arrays(cls, npz) -> pd.DataFrame:
+        columns = npz[cls.COLUMNS_KEY].tolist()
+        data = dict()
+
+        for position, column in enumerate(columns):
+            values = npz[f"c{position}"]
+
+            if f"m{position}" in npz.files:
+                values = values.astype(object)
+                values[npz[f"m{position}"]] = np.nan
+
+            data[position] = values
+
+        df = pd.DataFrame(data)
+        df.columns = columns
+
+        return df
+
+
+class EmptyCache:
+    """Liste persistante des pages confirmées sans données ("no valid"), par URL canonique.
+
+    Les TPs de ces pages ne sont plus téléchargés avant delai_vides heures.
+    Seules les périodes terminées sont retenues : celle en cours peut encore recevoir des données."""
+
+    FILENAME = os.path.join("cache", "vides.json")
+    _INSTANCE = None
+
+    def __init__(self,
+                 path: str,
+                 settings: CacheSettings):
+        self._path = path
+        self._settings = settings
+        self._entries = self._load() if settings.enabled else dict()
+        self._is_dirty = False
+
+    @property
+    def path(self):
+        return self._path
+
+    @classmethod
+    def instance(cls) -> "EmptyCache":
+        if cls._INSTANCE is None:
+            cls._INSTANCE = EmptyCache(os.path.join(os.getcwd(), cls.FILENAME),
+                                       GeneralParametersUC.instance().cache)
+
+        return cls._INSTANCE
+
+    def contains(self, tp: TaskParameters) -> bool:
+        """True si la page du TP est connue pour être vide, depuis moins de delai_vides heures."""
+        if not self._settings.enabled:
+            return False
+
+        entry = self._entries.get(url_key(tp.url))
+
+        return entry is not None and time() - entry["checked_at"] <= self._settings.empty_recheck * 3600
+
+    def add(self, tp: TaskParameters) -> None:
+        if not self._settings.enabled or not is_final_period(tp):
+            return
+
+        self._entries[url_key(tp.url)] = {"url": canonical_url(tp.url),
+                                          "checked_at": time()}
+        self._is_dirty = True
+
+    def flush(self) -> None:
+        """Écrit la liste sur le disque si elle a changé."""
+        if not self._is_dirty:
+            return
+
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+
+        with open(self._path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self._entries, file)
+
+        os.replace(self._path + ".tmp", self._path)
+        self._is_dirty = False
+
+    @classmethod
+    def close(cls) -> None:
+        if cls._INSTANCE is None:
+            return
+
+        cls._INSTANCE.flush()
+        cls._INSTANCE = None
+
+    def _load(self) -> dict:
+        try:
+            with open(self._path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return dict()
+
+        return entries if isinstance(entries, dict) else dict()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._entries)} pages vides>"
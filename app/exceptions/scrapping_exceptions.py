@@ -4,6 +4,19 @@ class ProcessException(Exception):
         self.key = kwargs["key"]
         self.url = kwargs["url"]
         self.msg = kwargs["msg"]
+        # True si l'échec vient du téléchargement de la page et qu'une nouvelle tentative a un sens
+        self.retryable = kwargs.get("retryable", False)
+        # True si le site indique qu'il n'a aucune donnée pour la période du TP
+        self.empty = kwargs.get("empty", False)
+
+    def __reduce__(self):
+        # Les exceptions levées dans les workers sont picklées pour être renvoyées au process principal.
+        # Sans ça, le pickle rappelle __init__ sans les kwargs et l'exception est perdue.
+        return (_rebuild_process_exception, (self.key, self.url, self.msg, self.retryable, self.empty))
+
+
+def _rebuild_process_exception(key, url, msg, retryable, empty):
+    return ProcessException(key=key, url=url, msg=msg, retryable=retryable, empty=empty)
 
 
 class HtmlPageException(Exception):
@@ -14,6 +27,14 @@ class HtmlPageException(Exception):
         super().__init__(self.MESSAGE)
 
 
+class EmptyTableException(HtmlPageException):
+
+    MESSAGE = "Aucune donnée valide pour cette période"
+
+    def __init__(self):
+        Exception.__init__(self, self.MESSAGE)
+
+
 class ScrapException(Exception):
 
     MESSAGE = "Echec de récupération des données de la table html"
@@ -88,8 +88,44 @@ class DaysDateException(UCFCheckerException):
 class GeneralParametersFieldException(UCFCheckerException):
     def __init__(self, gpuc_field: UCFParameter):
 
-        if gpuc_field == UCFParameters.PARALLELISM:
+        if gpuc_field in (UCFParameters.PARALLELISM,
+                          UCFParameters.TRACE,
+                          UCFParameters.PROFILING,
+                          UCFParameters.MEMORY_PROFILING):
             msg = f"{UCFParameters.GENERAL_PARAMETERS.json_name} : '{gpuc_field.json_name}' doit être 'true' ou 'false'"
+        elif gpuc_field == UCFParameters.CACHE_ENABLED:
+            msg = f"{UCFParameters.CACHE.json_name} : '{gpuc_field.json_name}' doit être 'true' ou 'false'"
+        elif gpuc_field in (UCFParameters.CACHE_MAX_AGE,
+                            UCFParameters.CACHE_MAX_SIZE,
+                            UCFParameters.CACHE_EMPTY_RECHECK):
+            msg = f"{UCFParameters.CACHE.json_name} : '{gpuc_field.json_name}' doit être un nombre positif."
+        elif gpuc_field == UCFParameters.WORKERS_MAX_TASKS:
+            msg = f"{UCFParameters.WORKERS.json_name} : '{gpuc_field.json_name}' doit être un entier positif."
+        elif gpuc_field == UCFParameters.WORKERS_MAX_MEMORY:
+            msg = f"{UCFParameters.WORKERS.json_name} : '{gpuc_field.json_name}' doit être un nombre positif (Mo)."
+        elif gpuc_field == UCFParameters.ARCHIVE_MODE:
+            msg = f"{UCFParameters.ARCHIVE.json_name} : '{gpuc_field.json_name}' doit être 'enregistrement' ou 'relecture'"
+        elif gpuc_field == UCFParameters.ARCHIVE_FILE:
+            msg = f"{UCFParameters.ARCHIVE.json_name} : '{gpuc_field.json_name}' doit être le chemin d'un fichier, existant en relecture."
+        elif gpuc_field == UCFParameters.LOCAL_SERVER:
+            msg = f"{UCFParameters.GENERAL_PARAMETERS.json_name} : '{gpuc_field.json_name}' doit être une URL http(s), par exemple http://127.0.0.1:8000"
+        elif gpuc_field == UCFParameters.LIMITS:
+            msg = "{g} : '{l}' doit associer {m}, {o} et/ou {w} à des objets JSON".format(g=UCFParameters.GENERAL_PARAMETERS.json_name,
+                                                                                         l=gpuc_field.json_name,
+                                                                                         m=UCFParameters.METEOCIEL.json_name,
+                                                                                         o=UCFParameters.OGIMET.json_name,
+                                                                                         w=UCFParameters.WUNDERGROUND.json_name)
+        elif gpuc_field == UCFParameters.REQUESTS_PER_SECOND:
+            msg = f"{UCFParameters.LIMITS.json_name} : '{gpuc_field.json_name}' doit être un nombre strictement positif."
+        elif gpuc_field == UCFParameters.MAX_IN_FLIGHT:
+            msg = f"{UCFParameters.LIMITS.json_name} : '{gpuc_field.json_name}' doit être un entier strictement positif."
+        elif gpuc_field == UCFParameters.RENDER_TIMEOUT:
+            msg = f"{UCFParameters.GENERAL_PARAMETERS.json_name} : '{gpuc_field.json_name}' doit être un nombre de secondes strictement positif."
+        elif gpuc_field in (UCFParameters.MAX_ATTEMPTS,
+                            UCFParameters.MAX_PENDING_TPS):
+            msg = f"{UCFParameters.GENERAL_PARAMETERS.json_name} : '{gpuc_field.json_name}' doit être un entier strictement positif."
+        elif gpuc_field == UCFParameters.RETRY_DELAY:
+            msg = f"{UCFParameters.GENERAL_PARAMETERS.json_name} : '{gpuc_field.json_name}' doit être un nombre de secondes positif."
         else:
             msg = f"{UCFParameters.GENERAL_PARAMETERS.json_name} : '{gpuc_field.json_name}' doit être un entier positif (non nul), ou -1."
         super().__init__(msg)
@@ -0,0 +1,274 @@
+import asyncio
+from multiprocessing.util import Finalize
+from time import (monotonic,
+                  sleep)
+from typing import Optional
+from urllib.parse import (urlsplit,
+                          urlunsplit)
+from requests.adapters import HTTPAdapter
+from requests_html import (AsyncHTMLSession,
+                           HTMLSession)
+from app.boite_a_bonheur.Criteria import Criteria
+from app.boite_a_bonheur.HostLimits import HostLimits
+from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperType
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+from app.boite_a_bonheur.UCFParameterEnum import UCFParameters
+from app.exceptions.scrapping_exceptions import HtmlPageException
+from app.ucs_module import GeneralParametersUC
+
+
+def target_url(url: str) -> str:
+    """Renvoie l'URL à interroger : celle du site, ou son équivalent sur le serveur local s'il est paramétré.
+
+    Seuls le protocole et l'hôte changent, caches et archive restent indexés par l'URL du site."""
+    local_server = GeneralParametersUC.instance().local_server
+
+    if local_server is None:
+        return url
+
+    local = urlsplit(local_server)
+    parts = urlsplit(url)
+
+    return urlunsplit((local.scheme, local.netloc, parts.path, parts.query, parts.fragment))
+
+
+class WorkerSession:
+    """Session http propre à un process, réutilisée pour tous les TPs qu'il traite.
+
+    Le navigateur chromium de la session est lancé une seule fois par process,
+    au démarrage du worker, et fermé à l'arrêt du process."""
+
+    _INSTANCE = None
+
+    def __init__(self):
+        self._session = HTMLSession()
+
+    @property
+    def session(self) -> HTMLSession:
+        return self._session
+
+    @property
+    def browser_pid(self) -> Optional[int]:
+        """Pid du chromium de la session, None s'il n'est pas lancé."""
+        # requests_html ne crée _browser qu'au 1er accès à session.browser, qui lance chromium
+        browser = getattr(self._session, "_browser", None)
+        process = browser.process if browser is not None else None
+
+        return process.pid if process is not None else None
+
+    @classmethod
+    def start(cls,
+              requires_js: bool = False,
+              general_parameters: GeneralParametersUC = None) -> None:
+        """Initialisation du process : paramètres généraux, création de la session, et du navigateur si nécessaire."""
+        # Les workers ne partagent pas la mémoire du process principal (windows),
+        # ses paramètres généraux leur sont donc transmis ici.
+        # Finalize est exécuté à la sortie des process enfants de multiprocessing,
+        # contrairement aux fonctions enregistrées via atexit.
+        if general_parameters is not None:
+            GeneralParametersUC.install(general_parameters)
+
+        if cls._INSTANCE is None:
+            cls._INSTANCE = WorkerSession()
+            Finalize(None, cls.close, exitpriority=10)
+
+        if requires_js:
+            cls._INSTANCE._session.browser  # lance chromium
+
+    @classmethod
+    def instance(cls) -> "WorkerSession":
+        if cls._INSTANCE is None:
+            cls.start()
+
+        return cls._INSTANCE
+
+    def get(self, url: str) -> str:
+        """Renvoie le html de la page, sans exécution du javascript."""
+        response = self._session.get(target_url(url))
+
+        if response.status_code != 200:
+            raise HtmlPageException()
+
+        return response.text
+
+    def render(self,
+               url: str,
+               criteria: Criteria) -> str:
+        """Renvoie le html de la page après exécution du javascript."""
+        # On n'attend pas un délai fixe : le html est renvoyé dès que la table
+        # recherchée apparaît dans la page, au plus tard après attente_max_rendu secondes.
+        timeout = GeneralParametersUC.instance().render_timeout
+        selector = 'table[{attr}="{val}"]'.format(attr=criteria.css_attribute,
+                                                  val=criteria.attribute_value.replace('"', '\\"'))
+
+        return self._session.loop.run_until_complete(self._render(self._session.browser,
+                                                                  target_url(url),
+                                                                  selector,
+                                                                  int(timeout * 1000)))
+
+    @staticmethod
+    async def _render(browser,
+                      url: str,
+                      selector: str,
+                      timeout_ms: int) -> str:
+        page = await browser.newPage()
+        try:
+            await page.goto(url, options={"waitUntil": "domcontentloaded",
+                                          "timeout": timeout_ms})
+            await page.evaluate("() => window.scrollBy(0, window.innerHeight)")
+            await page.waitForSelector(selector, options={"timeout": timeout_ms})
+            return await page.content()
+        finally:
+            await page.close()
+
+    @classmethod
+    def close(cls) -> None:
+        if cls._INSTANCE is None:
+            return
+
+        try:
+            cls._INSTANCE._session.close()
+        except Exception:
+            pass
+
+        cls._INSTANCE = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._session}>"
+
+
+class TokenBucket:
+    """Seau à jetons : rate requêtes par seconde en moyenne, par rafales de capacity requêtes au plus."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self._rate = rate
+        self._capacity = max(1.0, rate) if capacity is None else capacity
+        self._tokens = self._capacity
+        self._last = monotonic()
+
+    def reserve(self) -> float:
+        """Réserve un jeton et renvoie le délai à attendre avant de l'utiliser."""
+        # Le nombre de jetons peut devenir négatif : chaque réservation est alors
+        # servie dans l'ordre, 1/rate secondes après la précédente.
+        now = monotonic()
+        self._tokens = min(self._capacity,
+                           self._tokens + (now - self._last) * self._rate)
+        self._last = now
+        self._tokens -= 1
+
+        return 0 if self._tokens >= 0 else -self._tokens / self._rate
+
+
+class HostLimiter:
+    """Limite le débit et le nombre de requêtes simultanées vers un site.
+
+    Une seule instance par site (meteociel, ogimet, wunderground), partagée par tous les scrappers
+    de ce site. S'utilise avec 'async with' sur la boucle des scrappers, ou via wait() en séquentiel."""
+
+    _LIMITERS = dict()
+
+    def __init__(self, limits: HostLimits):
+        self._limits = limits
+        self._bucket = TokenBucket(limits.requests_per_second)
+        self._semaphore = asyncio.Semaphore(limits.max_in_flight)
+
+    @property
+    def limits(self):
+        return self._limits
+
+    @classmethod
+    def of(cls, scrapper_type: ScrapperType) -> "HostLimiter":
+        gpuc = GeneralParametersUC.instance()
+        family = gpuc.family_of(scrapper_type)
+
+        if family not in cls._LIMITERS:
+            cls._LIMITERS[family] = HostLimiter(gpuc.limits_of(scrapper_type))
+
+        return cls._LIMITERS[family]
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._LIMITERS = dict()
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        await asyncio.sleep(self._bucket.reserve())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._semaphore.release()
+
+    def wait(self) -> None:
+        """Attend que le débit autorise la prochaine requête (téléchargements séquentiels)."""
+        sleep(self._bucket.reserve())
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._limits}>"
+
+
+class FetchEngine:
+    """Téléchargement asynchrone des pages statiques, depuis le process principal.
+
+    Les téléchargements tournent sur la boucle asyncio des scrappers, indépendamment des workers
+    qui ne font plus que le traitement des pages. Les connexions (et leur session TLS) sont
+    maintenues ouvertes et réutilisées d'une requête à l'autre vers un même hôte."""
+
+    _INSTANCE = None
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_downloads: int):
+        # Le pool de connexions de requests est défini par hôte, pool_maxsize connexions
+        # keep-alive sont conservées pour chacun d'eux.
+        self._max_downloads = max_downloads
+        self._semaphore = asyncio.Semaphore(max_downloads)
+        self._session = AsyncHTMLSession(loop=loop, workers=max_downloads)
+        adapter = HTTPAdapter(pool_connections=len(UCFParameters.SCRAPPERS),
+                              pool_maxsize=max_downloads)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    @property
+    def max_downloads(self):
+        return self._max_downloads
+
+    @classmethod
+    def instance(cls, loop: asyncio.AbstractEventLoop = None) -> "FetchEngine":
+        if cls._INSTANCE is None:
+            cls._INSTANCE = FetchEngine(loop or asyncio.get_event_loop(),
+                                        UCFParameters.MAX_DOWNLOADS)
+
+        return cls._INSTANCE
+
+    async def fetch(self,
+                    url: str,
+                    scrapper_type: ScrapperType,
+                    metrics: TPMetrics = None) -> str:
+        """Renvoie le html de la page, sans exécution du javascript."""
+        # Les limites du site sont prises avant le sémaphore global,
+        # pour qu'un site lent ou bridé n'occupe pas les places des autres.
+        # L'attente des limites et du sémaphore est mesurée à part du téléchargement.
+        metrics = metrics or TPMetrics("", url)
+        start = monotonic()
+        async with HostLimiter.of(scrapper_type):
+            async with self._semaphore:
+                metrics.add(TPMetrics.WAIT, monotonic() - start)
+                with metrics.measure(TPMetrics.FETCH):
+                    response = await self._session.get(target_url(url))
+
+        if response.status_code != 200:
+            raise HtmlPageException()
+
+        return response.text
+
+    @classmethod
+    def close(cls) -> None:
+        HostLimiter.reset()
+        if cls._INSTANCE is None:
+            return
+
+        engine = cls._INSTANCE
+        cls._INSTANCE = None
+        engine._session.thread_pool.shutdown(wait=False)
+        engine._session.loop.run_until_complete(engine._session.close())
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._max_downloads}>"
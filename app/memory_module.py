@@ -0,0 +1,341 @@
+import json
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import (Dict,
+                    Iterable,
+                    List,
+                    Optional)
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+
+
+class MemoryProbe:
+    """Mesures mémoire du process courant : allocations python (tracemalloc) et mémoire résidente.
+
+    La mémoire résidente est lue via l'API windows (GetProcessMemoryInfo) ou /proc sous linux.
+    Elle n'est pas disponible ailleurs (SUPPORTED) : les rapports l'indiquent, au lieu de 0."""
+
+    # 1 seule frame par allocation : le site d'allocation suffit, et le surcoût de tracemalloc reste modéré.
+    FRAMES = 1
+    TOP = 10
+    PROC = "/proc"
+    SUPPORTED = sys.platform == "win32" or os.path.isdir(PROC)
+    # Plus haut pic d'allocation relevé dans le process, voir is_new_peak.
+    _PEAK = 0
+
+    @staticmethod
+    def start() -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(MemoryProbe.FRAMES)
+
+    @staticmethod
+    @contextmanager
+    def measure(peaks: Dict[str, int], stage: str):
+        """Retient dans peaks le pic d'allocation python du bloc with, si tracemalloc est actif."""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            peaks[stage] = max(tracemalloc.get_traced_memory()[1] - base, peaks.get(stage, 0))
+
+    @classmethod
+    def is_new_peak(cls, peak: int) -> bool:
+        """True si le pic dépasse tous ceux relevés jusqu'ici dans le process.
+
+        Un instantané de tracemalloc coûte cher : les sites d'allocation ne sont relevés qu'à chaque nouveau pic."""
+        if peak <= cls._PEAK:
+            return False
+
+        cls._PEAK = peak
+        return True
+
+    @staticmethod
+    def top_sites(top: int = TOP) -> List[list]:
+        """Renvoie les top sites d'allocation occupant le plus de mémoire : [fichier:ligne, octets, blocs]."""
+        if not tracemalloc.is_tracing():
+            return []
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                                              tracemalloc.Filter(False, "<frozen *>"),
+                                                              tracemalloc.Filter(False, "<unknown>")])
+
+        return [[f"{x.traceback[0].filename}:{x.traceback[0].lineno}", x.size, x.count]
+                for x in snapshot.statistics("lineno")[:top]]
+
+    @classmethod
+    def rss(cls, pid: int = None) -> int:
+        """Mémoire résidente du process, en octets. 0 si le process n'existe plus, ou hors de windows et linux."""
+        pid = pid or os.getpid()
+        if sys.platform == "win32":
+            return _windows_rss(pid)
+
+        try:
+            with open(os.path.join(cls.PROC, str(pid), "status")) as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+
+        return 0
+
+    @classmethod
+    def descendants(cls, pid: int = None) -> List[int]:
+        """Renvoie les pids des process lancés par le process, et par ses enfants (chromium en lance plusieurs)."""
+        # (1)   Sous windows, les parents de tous les process sont lus en 1 seul instantané.
+        # (2)   Sous linux, seuls les enfants des descendants sont lus, si le noyau les expose.
+        #       Sinon, les parents de tous les process sont lus dans /proc.
+        if sys.platform == "win32":
+            # (1)
+            children = _windows_children()
+        elif os.path.exists(os.path.join(cls.PROC, str(os.getpid()), "task", str(os.getpid()), "children")):
+            # (2)
+            children = _ProcChildren(cls.PROC)
+        else:
+            children = _proc_children(cls.PROC)
+
+        found = []
+        parents = [pid or os.getpid()]
+        while parents:
+            parent_children = children.get(parents.pop(), [])
+            found.extend(parent_children)
+            parents.extend(parent_children)
+
+        return found
+
+    @classmethod
+    def browser_rss(cls, browser_pid: Optional[int]) -> int:
+        """Mémoire résidente cumulée du navigateur d'un worker et des process qu'il a lancés, 0 sans navigateur.
+
+        Le pid du navigateur est celui de la session du worker : seuls ses descendants sont parcourus."""
+        if browser_pid is None:
+            return 0
+
+        return sum(cls.rss(x) for x in [browser_pid] + cls.descendants(browser_pid))
+
+
+class _ProcChildren:
+    """Enfants des process lus à la demande dans /proc/<pid>/task/<tid>/children, sans parcourir tout /proc."""
+
+    def __init__(self, proc: str):
+        self._proc = proc
+
+    def get(self, pid: int, default: List[int]) -> List[int]:
+        tasks = os.path.join(self._proc, str(pid), "task")
+        children = []
+        try:
+            for task in os.listdir(tasks):
+                with open(os.path.join(tasks, task, "children")) as task_children:
+                    children.extend(int(x) for x in task_children.read().split())
+        except (OSError, ValueError):
+            return default
+
+        return children
+
+
+def _proc_children(proc: str) -> Dict[int, List[int]]:
+    children = dict()
+    try:
+        proc_entries = [x for x in os.listdir(proc) if x.isdigit()]
+    except OSError:
+        return children
+
+    for entry in proc_entries:
+        try:
+            with open(os.path.join(proc, entry, "stat")) as stat:
+                # le nom du process, entre parenthèses, peut contenir des espaces
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+        children.setdefault(ppid, []).append(int(entry))
+
+    return children
+
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    _PROCESS_VM_READ = 0x0010
+    _TH32CS_SNAPPROCESS = 0x00000002
+    _INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    class _ProcessEntry32(ctypes.Structure):
+        _fields_ = [("dwSize", wintypes.DWORD),
+                    ("cntUsage", wintypes.DWORD),
+                    ("th32ProcessID", wintypes.DWORD),
+                    ("th32DefaultHeapID", ctypes.c_size_t),
+                    ("th32ModuleID", wintypes.DWORD),
+                    ("cntThreads", wintypes.DWORD),
+                    ("th32ParentProcessID", wintypes.DWORD),
+                    ("pcPriClassBase", wintypes.LONG),
+                    ("dwFlags", wintypes.DWORD),
+                    ("szExeFile", ctypes.c_char * wintypes.MAX_PATH)]
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    _kernel32.K32GetProcessMemoryInfo.argtypes = [wintypes.HANDLE,
+                                                  ctypes.POINTER(_ProcessMemoryCounters),
+                                                  wintypes.DWORD]
+    _kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+    _kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    _kernel32.Process32First.argtypes = [wintypes.HANDLE, ctypes.POINTER(_ProcessEntry32)]
+    _kernel32.Process32Next.argtypes = [wintypes.HANDLE, ctypes.POINTER(_ProcessEntry32)]
+
+    def _windows_rss(pid: int) -> int:
+        # mémoire résidente = working set sous windows
+        handle = _kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION | _PROCESS_VM_READ, False, pid)
+        if not handle:
+            return 0
+
+        try:
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if not _kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return 0
+
+            return counters.WorkingSetSize
+        finally:
+            _kernel32.CloseHandle(handle)
+
+    def _windows_children() -> Dict[int, List[int]]:
+        children = dict()
+        snapshot = _kernel32.CreateToolhelp32Snapshot(_TH32CS_SNAPPROCESS, 0)
+        if snapshot in (None, _INVALID_HANDLE_VALUE):
+            return children
+
+        try:
+            entry = _ProcessEntry32()
+            entry.dwSize = ctypes.sizeof(entry)
+            has_entry = _kernel32.Process32First(snapshot, ctypes.byref(entry))
+            while has_entry:
+                children.setdefault(entry.th32ParentProcessID, []).append(entry.th32ProcessID)
+                has_entry = _kernel32.Process32Next(snapshot, ctypes.byref(entry))
+        finally:
+            _kernel32.CloseHandle(snapshot)
+
+        return children
+
+
+class MemoryReport:
+    """Mémoire d'un lancement, en mode profilage mémoire, par UC.
+
+    Pics d'allocation python par étape, le plus haut des TPs, et ceux des étapes de l'UC
+    exécutées dans le process principal (concaténation et tri des résultats).
+    Mémoire résidente la plus haute de chaque process et de son navigateur, si la plateforme permet de la lire.
+    Principaux sites d'allocation, la taille retenue pour chacun étant la plus haute relevée."""
+
+    FILENAME = "memoire.json"
+    TOP = 15
+    # Étapes de l'UC, dans le process principal.
+    CONCAT = "concat"
+    SORT = "sort_values"
+    RSS_UNAVAILABLE = "mémoire résidente indisponible sur cette plateforme"
+
+    def __init__(self,
+                 main_pid: int = None,
+                 rss_supported: bool = MemoryProbe.SUPPORTED):
+        self._main_pid = os.getpid() if main_pid is None else main_pid
+        self._rss_supported = rss_supported
+        self._ucs: Dict[str, dict] = dict()
+
+    def add(self,
+            uc_name: str,
+            metrics: Iterable[TPMetrics],
+            uc_peaks: Dict[str, int] = None,
+            uc_sites: List[list] = None,
+            main_rss: int = 0) -> None:
+        """Ajoute les mesures d'un UC : celles de ses TPs, celles relevées par son scrapper,
+        et la mémoire résidente du process principal après le traitement de l'UC."""
+        uc = self._ucs.setdefault(uc_name, {"etapes_octets": dict(), "processus": dict(), "sites": dict()})
+        metrics = list(metrics)
+
+        if main_rss:
+            process = uc["processus"].setdefault("principal", {"process": 0, "navigateur": 0})
+            process["process"] = max(process["process"], main_rss)
+
+        for stage, peak in self._peaks(metrics, uc_peaks or dict()).items():
+            uc["etapes_octets"][stage] = max(peak, uc["etapes_octets"].get(stage, 0))
+
+        for tp_metrics in metrics:
+            if not tp_metrics.rss:
+                continue
+
+            pid = tp_metrics.rss["pid"]
+            name = "principal" if pid == self._main_pid else f"worker {pid}"
+            process = uc["processus"].setdefault(name, {"process": 0, "navigateur": 0})
+            process["process"] = max(process["process"], tp_metrics.rss["process"])
+            process["navigateur"] = max(process["navigateur"], tp_metrics.rss["navigateur"])
+
+        for site, size, blocks in [x for m in metrics for x in m.allocation_sites] + (uc_sites or []):
+            if size > uc["sites"].get(site, [0, 0])[0]:
+                uc["sites"][site] = [size, blocks]
+
+    @staticmethod
+    def _peaks(metrics: List[TPMetrics], uc_peaks: Dict[str, int]) -> Dict[str, int]:
+        peaks = dict()
+        for tp_metrics in metrics:
+            for stage, peak in tp_metrics.memory_peaks.items():
+                peaks[stage] = max(peak, peaks.get(stage, 0))
+
+        peaks.update(uc_peaks)
+
+        return peaks
+
+    def to_json(self, top: int = TOP) -> dict:
+        return {name: {"etapes_octets": uc["etapes_octets"],
+                       "processus": uc["processus"] if self._rss_supported else self.RSS_UNAVAILABLE,
+                       "sites": [[site, size, blocks]
+                                 for site, (size, blocks) in sorted(uc["sites"].items(),
+                                                                    key=lambda x: x[1][0],
+                                                                    reverse=True)[:top]]}
+                for name, uc in self._ucs.items()}
+
+    def summary(self, top: int = TOP) -> str:
+        """Renvoie, pour chaque UC, les pics par étape, la mémoire des process et les top sites d'allocation, en Mo."""
+        lines = []
+        for name, uc in self.to_json(top).items():
+            lines.append(f"\nmémoire {name} :")
+            lines.extend(f"    {stage:<24}{peak / 2 ** 20:>10.1f} Mo (pic)"
+                         for stage, peak in sorted(uc["etapes_octets"].items(), key=lambda x: x[1], reverse=True))
+            if self._rss_supported:
+                lines.extend(f"    {process:<24}{rss['process'] / 2 ** 20:>10.1f} Mo, "
+                             f"navigateur {rss['navigateur'] / 2 ** 20:.1f} Mo"
+                             for process, rss in uc["processus"].items())
+            else:
+                lines.append(f"    {self.RSS_UNAVAILABLE}")
+            lines.extend(f"    {size / 2 ** 20:>10.1f} Mo  {blocks:>8} blocs  {site}" for site, size, blocks in uc["sites"])
+
+        return "\n".join(lines)
+
+    def write(self, directory: str) -> None:
+        """Écrit memoire.json dans le dossier."""
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, self.FILENAME), "w", encoding="utf-8") as json_file:
+            json.dump(self.to_json(), json_file, indent=4)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._ucs)} UCs>"
@@ -0,0 +1,124 @@
+import json
+import os
+from typing import (Dict,
+                    Iterable,
+                    List)
+import numpy as np
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+
+
+class MetricsReport:
+    """Mesures des TPs d'un lancement, agrégées par UC et par site.
+
+    Exportées en JSON, et au format texte de Prometheus (lisible par le textfile collector de node_exporter)."""
+
+    PREFIX = "meteoscrapping"
+
+    def __init__(self):
+        self._ucs: Dict[str, List[TPMetrics]] = dict()
+
+    @property
+    def ucs(self):
+        return {name: list(metrics) for name, metrics in self._ucs.items()}
+
+    def add(self,
+            uc_name: str,
+            metrics: Iterable[TPMetrics]) -> None:
+        """Ajoute les mesures des TPs d'un UC, typiquement MeteoScrapper.metrics.values()."""
+        self._ucs.setdefault(uc_name, []).extend(metrics)
+
+    def by_host(self) -> Dict[str, List[TPMetrics]]:
+        hosts = dict()
+        for metrics in self._ucs.values():
+            for tp_metrics in metrics:
+                hosts.setdefault(tp_metrics.host, []).append(tp_metrics)
+
+        return hosts
+
+    @staticmethod
+    def aggregate(metrics: List[TPMetrics]) -> dict:
+        """Renvoie le nombre de TPs par statut, le total et les quantiles de chaque étape (s), les octets, relances et lignes.
+
+        Un TP sans statut (interrompu avant la fin) est compté en erreur."""
+        statuses = dict()
+        for tp_metrics in metrics:
+            status = tp_metrics.status or TPMetrics.ERROR
+            statuses[status] = statuses.get(status, 0) + 1
+
+        stages = dict()
+        for stage in TPMetrics.STAGES:
+            durations = np.array([x.stages[stage] for x in metrics if stage in x.stages])
+            if durations.size == 0:
+                continue
+
+            stages[stage] = {"total": round(float(durations.sum()), 4),
+                             "moyenne": round(float(durations.mean()), 4),
+                             "p50": round(float(np.percentile(durations, 50)), 4),
+                             "p95": round(float(np.percentile(durations, 95)), 4),
+                             "max": round(float(durations.max()), 4)}
+
+        return {"tps": len(metrics),
+                "statuts": statuses,
+                "etapes_s": stages,
+                "octets": sum(x.downloaded_bytes for x in metrics),
+                "relances": sum(x.retries for x in metrics),
+                "lignes": sum(x.rows for x in metrics)}
+
+    def to_json(self) -> dict:
+        return {"ucs": {name: self.aggregate(metrics) for name, metrics in self._ucs.items()},
+                "sites": {host: self.aggregate(metrics) for host, metrics in self.by_host().items()}}
+
+    def to_prometheus(self) -> str:
+        """Renvoie les mesures par UC au format texte de Prometheus, le site étant une étiquette de chaque série."""
+        # (1)   1 bloc HELP / TYPE par métrique, suivi de ses séries.
+        # (2)   Les étiquettes uc et host permettent l'agrégation par site côté Prometheus.
+        families = {"tps_total": ("counter", "TPs traités, par statut"),
+                    "stage_seconds_total": ("counter", "durée cumulée des étapes de traitement"),
+                    "downloaded_bytes_total": ("counter", "octets de html téléchargés"),
+                    "retries_total": ("counter", "relances des TPs"),
+                    "rows_total": ("counter", "lignes de résultats")}
+        series = {name: [] for name in families}
+
+        for uc_name, metrics in self._ucs.items():
+            hosts = {x.host for x in metrics}
+            for host in sorted(hosts):
+                host_metrics = [x for x in metrics if x.host == host]
+                aggregated = self.aggregate(host_metrics)
+                # (2)
+                labels = f'uc="{self._escape(uc_name)}",host="{self._escape(host)}"'
+
+                for status, count in aggregated["statuts"].items():
+                    series["tps_total"].append(f'{{{labels},status="{status}"}} {count}')
+
+                for stage, durations in aggregated["etapes_s"].items():
+                    series["stage_seconds_total"].append(f'{{{labels},stage="{stage}"}} {durations["total"]}')
+
+                series["downloaded_bytes_total"].append(f"{{{labels}}} {aggregated['octets']}")
+                series["retries_total"].append(f"{{{labels}}} {aggregated['relances']}")
+                series["rows_total"].append(f"{{{labels}}} {aggregated['lignes']}")
+        # (1)
+        lines = []
+        for name, (metric_type, description) in families.items():
+            full_name = f"{self.PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {description}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            lines.extend(full_name + x for x in series[name])
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str) -> None:
+        """Écrit metriques.json et metriques.prom dans le dossier."""
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, "metriques.json"), "w", encoding="utf-8") as json_file:
+            json.dump(self.to_json(), json_file, indent=4)
+
+        with open(os.path.join(directory, "metriques.prom"), "w", encoding="utf-8") as prom_file:
+            prom_file.write(self.to_prometheus())
+
+    @staticmethod
+    def _escape(label_value: str) -> str:
+        return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._ucs)} UCs>"
@@ -0,0 +1,213 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import (Future,
+                                ProcessPoolExecutor)
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.queues import SimpleQueue
+from typing import (Any,
+                    Callable,
+                    List,
+                    Set,
+                    Tuple)
+from app.fetchers_module import WorkerSession
+from app.memory_module import (MemoryProbe,
+                               MemoryReport)
+from app.ucs_module import GeneralParametersUC
+
+
+def _initialize(requires_js: bool,
+                general_parameters: GeneralParametersUC,
+                pids: SimpleQueue) -> None:
+    # Chaque worker transmet son pid au pool dès son démarrage, avant toute tâche.
+    # Les modules lourds (pandas, requests_html, pyppeteer) sont importés dès le démarrage du worker,
+    # et non à la réception de sa 1ère tâche.
+    pids.put(os.getpid())
+    import app.scrappers_module
+    WorkerSession.start(requires_js, general_parameters)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _call(function: Callable,
+          args: tuple,
+          measures_memory: bool) -> Tuple[Any, int]:
+    """Exécute la tâche dans le worker, et renvoie son résultat avec la mémoire du worker et de son navigateur."""
+    result = function(*args)
+    if not measures_memory:
+        return result, 0
+
+    return result, MemoryProbe.rss() + MemoryProbe.browser_rss(WorkerSession.instance().browser_pid)
+
+
+class WorkerPool:
+    """Pool de workers partagé par tous les scrappers, pour tout le lancement.
+
+    Les workers sont démarrés et préparés (imports, session, navigateur) dès la création du pool,
+    sans bloquer la boucle asyncio : les tâches attendent la fin de leur préparation (ready).
+    Ils sont remplacés tous ensemble après taches_max tâches chacun en moyenne, ou dès que l'un d'eux,
+    navigateur compris, dépasse memoire_max Mo : les tâches suivantes vont à un nouveau pool,
+    l'ancien s'arrête une fois ses tâches en cours terminées."""
+
+    _INSTANCE = None
+
+    def __init__(self,
+                 max_workers: int,
+                 requires_browser: bool,
+                 general_parameters: GeneralParametersUC):
+        self._max_workers = max_workers
+        self._requires_browser = requires_browser
+        self._general_parameters = general_parameters
+        self._settings = general_parameters.workers
+        self._executor: ProcessPoolExecutor = None
+        self._retired: List[ProcessPoolExecutor] = []
+        self._warm_ups: List[Future] = []
+        self._pids_queue = multiprocessing.SimpleQueue()
+        self._pids: Set[int] = set()
+        self._tasks = 0
+        self._recycles = 0
+        self._is_over_memory = False
+        if self._settings.max_memory and not MemoryProbe.SUPPORTED:
+            print(f"memoire_max ignorée : {MemoryReport.RSS_UNAVAILABLE}")
+        self._start()
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def pids(self) -> Set[int]:
+        """Pids de tous les workers démarrés par le pool, remplacés compris."""
+        while not self._pids_queue.empty():
+            self._pids.add(self._pids_queue.get())
+
+        return set(self._pids)
+
+    @property
+    def recycles(self):
+        """Nombre de remplacements des workers depuis la création du pool."""
+        return self._recycles
+
+    @classmethod
+    def instance(cls, requires_browser: bool = False) -> "WorkerPool":
+        """Renvoie le pool, créé au 1er appel avec les paramètres généraux courants.
+
+        Si le pool existe déjà sans navigateur, les workers le lanceront à leur 1ère page javascript."""
+        if cls._INSTANCE is None:
+            gpuc = GeneralParametersUC.instance()
+            cls._INSTANCE = WorkerPool(gpuc.cpus, requires_browser, gpuc)
+
+        return cls._INSTANCE
+
+    async def run(self,
+                  function: Callable,
+                  *args) -> Any:
+        """Exécute la fonction dans un worker, et renvoie son résultat.
+
+        Si un worker s'arrête brutalement (plantage, mémoire épuisée), les workers sont remplacés
+        et la tâche est relancée une fois : BrokenProcessPool si elle échoue encore."""
+        try:
+            return await self._run(function, args)
+        except BrokenProcessPool:
+            return await self._run(function, args)
+
+    async def _run(self,
+                   function: Callable,
+                   args: tuple) -> Any:
+        # (1)   Les workers sont remplacés avant la soumission de la tâche si besoin.
+        # (2)   La mémoire des workers n'est relevée que si elle peut déclencher leur remplacement.
+        # (3)   Un worker arrêté brutalement casse tout son pool : ses tâches en cours et à venir échouent.
+        #       La 1ère tâche qui le constate remplace les workers, les autres sont relancées sur le nouveau pool.
+        # (1)
+        if self._should_recycle():
+            self._recycle()
+
+        executor = self._executor
+        try:
+            await self.ready()
+            executor = self._executor
+            self._tasks += 1
+            # (2)
+            result, rss = await asyncio.get_event_loop().run_in_executor(executor,
+                                                                         _call,
+                                                                         function,
+                                                                         args,
+                                                                         self._settings.max_memory > 0)
+        except BrokenProcessPool:
+            # (3)
+            if executor is self._executor:
+                print("worker arrêté brutalement")
+                self._recycle()
+            raise
+
+        if self._settings.max_memory and rss > self._settings.max_memory * 2 ** 20:
+            self._is_over_memory = True
+
+        return result
+
+    def _should_recycle(self) -> bool:
+        return self._is_over_memory or\
+               0 < self._settings.max_tasks * self._max_workers <= self._tasks
+
+    async def ready(self) -> None:
+        """Attend, sans bloquer la boucle asyncio, que les workers aient terminé leur initialisation."""
+        warm_ups, self._warm_ups = self._warm_ups, []
+        if warm_ups:
+            await asyncio.gather(*[asyncio.wrap_future(x) for x in warm_ups])
+
+    def _start(self) -> None:
+        # Autant de tâches vides que de workers : tous démarrent, et s'initialisent en arrière-plan.
+        # À la création comme au remplacement des workers, la boucle asyncio n'est pas bloquée :
+        # les pages sont téléchargées pendant l'initialisation, et au remplacement les anciens workers
+        # terminent leurs tâches pendant que les nouveaux démarrent.
+        self._executor = ProcessPoolExecutor(max_workers=self._max_workers,
+                                             initializer=_initialize,
+                                             initargs=(self._requires_browser,
+                                                       self._general_parameters,
+                                                       self._pids_queue))
+        self._warm_ups = [self._executor.submit(_warm_up) for _ in range(self._max_workers)]
+        self._tasks = 0
+        self._is_over_memory = False
+
+    def _recycle(self) -> None:
+        print("remplacement des workers")
+        self._executor.shutdown(wait=False)
+        self._retired.append(self._executor)
+        self._recycles += 1
+        self._start()
+
+    @classmethod
+    def close(cls) -> None:
+        """Arrête le pool : attend la fin des tâches en cours, puis l'arrêt de tous les workers."""
+        if cls._INSTANCE is None:
+            return
+
+        pool = cls._INSTANCE
+        cls._INSTANCE = None
+        for executor in pool._retired + [pool._executor]:
+            executor.shutdown(wait=True, cancel_futures=True)
+        pool._pids_queue.close()
+
+    @classmethod
+    def terminate(cls) -> None:
+        """Arrêt immédiat, sur demande de l'utilisateur : les tâches en attente sont abandonnées,
+        et les workers arrêtés sans attendre la fin de leur tâche."""
+        if cls._INSTANCE is None:
+            return
+
+        # Seuls les workers connus du pool et encore en vie (enfants actifs du process) sont arrêtés :
+        # un pid réattribué depuis à un autre process n'est jamais visé.
+        pool = cls._INSTANCE
+        cls._INSTANCE = None
+        pids = pool.pids
+        for executor in pool._retired + [pool._executor]:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for process in multiprocessing.active_children():
+            if process.pid in pids:
+                process.terminate()
+        pool._pids_queue.close()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._max_workers} workers, {self._recycles} remplacements>"
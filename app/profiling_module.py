@@ -0,0 +1,92 @@
+import cProfile
+import io
+import os
+import pstats
+from typing import (Any,
+                    Callable,
+                    Dict,
+                    Tuple)
+
+
+class _RawStats:
+    # pstats.Stats se construit depuis un objet doté de create_stats() et stats :
+    # ce sont les statistiques brutes renvoyées par les workers.
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfileReport:
+    """Profils cProfile du traitement des pages, agrégés par type de scrapper.
+
+    Chaque page est profilée dans le process qui la traite (worker ou principal),
+    et ses statistiques brutes reviennent avec les mesures du TP."""
+
+    TOP = 20
+    SORT = pstats.SortKey.CUMULATIVE
+
+    def __init__(self):
+        self._stats: Dict[str, pstats.Stats] = dict()
+
+    @property
+    def names(self):
+        return list(self._stats)
+
+    def stats(self, name: str) -> pstats.Stats:
+        return self._stats[name]
+
+    @staticmethod
+    def profile(function: Callable, *args) -> Tuple[Any, dict]:
+        """Exécute la fonction sous cProfile, et renvoie son résultat avec les statistiques brutes (picklables)."""
+        profiler = cProfile.Profile()
+        result = profiler.runcall(function, *args)
+        profiler.create_stats()
+
+        return result, profiler.stats
+
+    def add(self,
+            name: str,
+            profile_stats: dict) -> None:
+        """Ajoute des statistiques brutes, typiquement TPMetrics.profile, à celles du type de scrapper."""
+        if not profile_stats:
+            return
+
+        if name in self._stats:
+            self._stats[name].add(_RawStats(dict(profile_stats)))
+        else:
+            self._stats[name] = pstats.Stats(_RawStats(dict(profile_stats)))
+
+    def merge(self, other: "ProfileReport") -> None:
+        for name in other.names:
+            self.add(name, other.stats(name).stats)
+
+    def summary(self, top: int = TOP) -> str:
+        """Renvoie, pour chaque type de scrapper, les top fonctions triées par durée cumulée."""
+        stream = io.StringIO()
+
+        for name, stats in self._stats.items():
+            stream.write(f"\nprofil {name} :\n")
+            stats.stream = stream
+            stats.sort_stats(self.SORT).print_stats(top)
+
+        return stream.getvalue()
+
+    def write(self, directory: str) -> None:
+        """Écrit profil_<type de scrapper>.prof dans le dossier, lisible par pstats ou snakeviz."""
+        os.makedirs(directory, exist_ok=True)
+
+        for name, stats in self._stats.items():
+            stats.dump_stats(os.path.join(directory, f"profil_{name}.prof"))
+
+    def __getstate__(self):
+        # Le rapport est transmis aux workers avec le scrapper, qui n'en ont pas l'usage :
+        # ils reçoivent un rapport vide, plutôt que des profils toujours plus gros (et leur flux de sortie).
+        return dict()
+
+    def __setstate__(self, state):
+        self._stats = dict()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.names}>"
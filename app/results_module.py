@@ -0,0 +1,140 @@
+import io
+import os
+import shutil
+import tempfile
+from typing import (Dict,
+                    List,
+                    TextIO)
+import pandas as pd
+from app.boite_a_bonheur.utils import create_dirs
+
+
+class UCResults:
+    """Résultats d'un UC, reçus TP par TP au fil du traitement.
+
+    Seuls les résultats des derniers TPs sont gardés en mémoire : tous les FRAMES_PER_RUN TPs, ils sont
+    regroupés, triés par date et écrits dans un fichier temporaire (une série). Le CSV de l'UC est écrit
+    par fusion des séries, bloc par bloc : la mémoire reste bornée quelle que soit la période de l'UC."""
+
+    FRAMES_PER_RUN = 50
+    ROWS_PER_BLOCK = 10000
+    DAILY_FORMAT = "%Y-%m-%d"
+    HOURLY_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+    def __init__(self, date_format: str = DAILY_FORMAT):
+        self._date_format = date_format
+        self._frames: List[pd.DataFrame] = []
+        self._runs: List[str] = []
+        # colonnes de tous les TPs, dans l'ordre d'apparition, la date en 1er
+        self._columns: Dict[str, None] = {"date": None}
+        self._rows = 0
+        self._directory = None
+
+    @property
+    def rows(self):
+        return self._rows
+
+    @property
+    def empty(self):
+        return self._rows == 0
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def frames_in_memory(self):
+        """Nombre de dataframes de TPs en mémoire, au plus FRAMES_PER_RUN."""
+        return len(self._frames)
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Ajoute les résultats d'un TP. Les résultats en mémoire sont écrits en série s'ils sont assez nombreux."""
+        self._columns.update(dict.fromkeys(df.columns))
+        if df.empty:
+            return
+
+        self._rows += df.shape[0]
+        self._frames.append(df)
+        if len(self._frames) >= self.FRAMES_PER_RUN:
+            self.flush()
+
+    def flush(self) -> None:
+        """Écrit les résultats en mémoire dans une nouvelle série, triée par date."""
+        if not self._frames:
+            return
+
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="meteoscrapping_")
+
+        path = os.path.join(self._directory, f"{len(self._runs)}.csv")
+        pd.concat(self._frames)\
+          .sort_values(by="date", kind="stable")\
+          .to_csv(path, index=False, date_format=self._date_format)
+        self._runs.append(path)
+        self._frames = []
+
+    @create_dirs
+    def to_csv(self, path: str) -> None:
+        """Écrit les résultats de l'UC triés par date dans le CSV."""
+        with open(path, "w", encoding="utf-8", newline="") as csv_file:
+            self._write(csv_file)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Renvoie tous les résultats de l'UC en un seul dataframe, tel que relu depuis son CSV.
+
+        Le dataframe est entièrement en mémoire : à réserver aux UCs courts (tests, mesures)."""
+        if self.empty:
+            return pd.DataFrame()
+
+        buffer = io.StringIO()
+        self._write(buffer)
+        buffer.seek(0)
+
+        return pd.read_csv(buffer, parse_dates=["date"])
+
+    def _write(self, csv_file: TextIO) -> None:
+        # (1)   Les séries sont relues en parallèle, bloc par bloc, les valeurs restant telles qu'écrites (str).
+        # (2)   Chaque série étant triée, toute ligne non encore lue d'une série est postérieure à la dernière
+        #       date de son bloc courant. Les lignes datées au plus de la plus petite de ces dernières dates
+        #       peuvent donc être écrites : elles sont triées et écrites, le reste des blocs est conservé.
+        #       Le bloc qui fixe cette date est entièrement écrit, et remplacé par le suivant de sa série.
+        # (3)   Les colonnes absentes d'une série sont laissées vides.
+        self.flush()
+        columns = self.columns
+        pd.DataFrame(columns=columns).to_csv(csv_file, index=False)
+        # (1)
+        readers = [pd.read_csv(run, dtype=str, keep_default_na=False, chunksize=self.ROWS_PER_BLOCK)
+                   for run in self._runs]
+        try:
+            blocks = [next(reader, None) for reader in readers]
+
+            while any(block is not None for block in blocks):
+                # (2)
+                bound = min(block["date"].iat[-1] for block in blocks if block is not None)
+                parts = []
+                for index, block in enumerate(blocks):
+                    if block is None:
+                        continue
+
+                    is_written = block["date"] <= bound
+                    parts.append(block[is_written])
+                    blocks[index] = block[~is_written] if not is_written.all() else next(readers[index], None)
+                # (3)
+                pd.concat(parts)\
+                  .reindex(columns=columns)\
+                  .sort_values(by="date", kind="stable")\
+                  .to_csv(csv_file, header=False, index=False)
+        finally:
+            for reader in readers:
+                reader.close()
+
+    def close(self) -> None:
+        """Supprime les séries temporaires."""
+        self._frames = []
+        self._runs = []
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._rows} lignes, {len(self._runs)} séries>"
@@ -1,34 +1,121 @@
 import asyncio
+import bisect
+import copy
+import heapq
+import os
 import re
 import numpy as np
 import pandas as pd
 from abc import (ABC,
                  abstractmethod)
-from typing import List
-from time import perf_counter
+from functools import (lru_cache,
+                       partial)
+from itertools import count
+from typing import (Callable,
+                    Iterable,
+                    List,
+                    Tuple)
+from time import (monotonic,
+                  perf_counter,
+                  sleep)
 from app.exceptions.scrapping_exceptions import (ScrapException,
                                                  HtmlPageException,
+                                                 EmptyTableException,
                                                  ProcessException)
 from app.ucs_module import ScrapperUC, GeneralParametersUC
 from app.tps_module import TaskParameters
 from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperTypes
+from app.boite_a_bonheur.Calendar import Calendar
 from app.boite_a_bonheur.MonthEnum import Months
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+from app.archives_module import PageArchive
+from app.caches_module import (EmptyCache,
+                               PageCache,
+                               ResultCache)
+from app.fetchers_module import (FetchEngine,
+                                 HostLimiter,
+                                 WorkerSession)
+from app.profiling_module import ProfileReport
+from app.memory_module import (MemoryProbe,
+                               MemoryReport)
+from app.pool_module import WorkerPool
+from app.results_module import UCResults
 from requests_html import (Element,
-                           HTMLSession)
-from concurrent.futures import ProcessPoolExecutor
+                           HTML)
 
 
 class MeteoScrapper(ABC):
 
     LOOP = asyncio.get_event_loop()
+    # True si la table de données est construite par le javascript de la page,
+    # False si elle est déjà présente dans le html renvoyé par le serveur.
+    REQUIRES_JS = True
+    # Version du traitement des pages. À incrémenter à chaque modification de la mise en forme
+    # des résultats, pour invalider les résultats en cache de ce scrapper.
+    CODE_VERSION = 2
+    # Cellules sans valeur, voir _extract_numerics.
+    MISSING_VALUES = frozenset(("---", ""))
+    # Attributs propres au process principal, non transmis aux workers (voir __getstate__).
+    _MAIN_PROCESS_STATE = ("_errors",
+                           "_known_empty",
+                           "_tp_durations",
+                           "_metrics",
+                           "_memory_peaks",
+                           "_allocation_sites")
 
     def __init__(self):
         self._errors = dict()
+        self._known_empty = dict()
+        self._tp_durations = dict()
+        self._metrics = dict()
+        self._profiles = ProfileReport()
+        self._memory_peaks = dict()
+        self._allocation_sites = []
 
     @property
     def errors(self):
         return self._errors.copy()
 
+    @property
+    def known_empty(self):
+        """TPs dont le site n'a aucune donnée, ignorés ou confirmés vides pendant le traitement."""
+        return self._known_empty.copy()
+
+    @property
+    def tp_durations(self):
+        """Durée en secondes de chaque TP réussi, de sa première tentative à ses résultats."""
+        return self._tp_durations.copy()
+
+    @property
+    def metrics(self):
+        """Mesures de chaque TP traité (TPMetrics), par clé de TP."""
+        return {key: copy.copy(metrics) for key, metrics in self._metrics.items()}
+
+    @property
+    def profiles(self):
+        """Profils cProfile du traitement des pages, en mode profilage (ProfileReport)."""
+        return self._profiles
+
+    @property
+    def memory_peaks(self):
+        """Pics d'allocation python des étapes de l'UC exécutées dans le process principal, en mode profilage mémoire."""
+        return dict(self._memory_peaks)
+
+    @property
+    def allocation_sites(self):
+        """Principaux sites d'allocation du process principal après le tri des résultats : [site, octets, blocs]."""
+        return list(self._allocation_sites)
+
+    def __getstate__(self):
+        # Le scrapper est transmis aux workers avec chaque tâche (méthode liée passée à WorkerPool.run).
+        # Ses mesures, erreurs et TPs vides grossissent à chaque TP et ne servent qu'au process principal :
+        # les workers reçoivent un scrapper sans elles, de taille constante quelle que soit la durée de l'UC.
+        state = self.__dict__.copy()
+        for name in self._MAIN_PROCESS_STATE:
+            state[name] = type(state[name])()
+
+        return state
+
     @staticmethod
     def scrapper_instance(uc: ScrapperUC) -> "MeteoScrapper":
         """Renvoie l'instance de scrapper adapté à l'UC."""
@@ -47,122 +134,510 @@ class MeteoScrapper(ABC):
 
         return scrappers[uc.scrapper_type]()
 
+    @classmethod
+    def scrap_ucs(cls,
+                  ucs: Iterable[ScrapperUC],
+                  on_uc_done: Callable[[ScrapperUC, "MeteoScrapper", UCResults], None]) -> None:
+        """Télécharge les données de tous les UCs, et remet les résultats de chacun à on_uc_done dès qu'il est terminé.
+
+        Les résultats (UCResults) ne sont valables que pendant l'appel à on_uc_done, qui les enregistre."""
+        # (1)   En séquentiel, les UCs sont traités l'un après l'autre.
+        # (2)   En parallèle, les TPs de tous les UCs sont soumis ensemble à un seul pool de workers,
+        #       dont la file d'attente est partagée : les derniers TPs d'un UC n'empêchent plus les suivants
+        #       d'occuper les workers. Chaque UC est remis dès que tous ses TPs sont terminés.
+        #       Le nombre de TPs en cours est limité pour l'ensemble des UCs (taches_simultanees).
+        # (3)   Les workers du pool (WorkerPool) lancent chromium si au moins un des UCs en a besoin.
+        scrappers = [(uc, cls.scrapper_instance(uc)) for uc in ucs]
+        # (1)
+        if not GeneralParametersUC.instance().should_download_in_parallel:
+            for uc, scrapper in scrappers:
+                cls._deliver(uc, scrapper, scrapper._scrap_uc_results(uc), on_uc_done)
+            return
+        # (2)
+        cls.LOOP.run_until_complete(cls._parallel_process_ucs(scrappers, on_uc_done))
+
+    @classmethod
+    async def _parallel_process_ucs(cls,
+                                    scrappers: List[Tuple[ScrapperUC, "MeteoScrapper"]],
+                                    on_uc_done: Callable[[ScrapperUC, "MeteoScrapper", UCResults], None]) -> None:
+        async def process_uc(uc: ScrapperUC, scrapper: MeteoScrapper):
+            start = perf_counter()
+            results = await scrapper._process_tps_on(uc, pool, window)
+            cls._deliver(uc, scrapper, scrapper._finish_uc(uc, results, start), on_uc_done)
+
+        gpuc = GeneralParametersUC.instance()
+        if gpuc.memory_profiling:
+            MemoryProbe.start()
+        # (3)
+        pool = WorkerPool.instance(any(x._requires_browser() for _, x in scrappers))
+        window = asyncio.Semaphore(gpuc.max_pending_tps)
+        await asyncio.gather(*[process_uc(uc, scrapper) for uc, scrapper in scrappers])
+
+    @staticmethod
+    def _deliver(uc: ScrapperUC,
+                 scrapper: "MeteoScrapper",
+                 results: UCResults,
+                 on_uc_done: Callable[[ScrapperUC, "MeteoScrapper", UCResults], None]) -> None:
+        """Remet les résultats de l'UC à on_uc_done, puis supprime leurs fichiers temporaires."""
+        try:
+            on_uc_done(uc, scrapper, results)
+        finally:
+            results.close()
+
     def scrap_uc(self, uc: ScrapperUC) -> pd.DataFrame:
-        """Télécharge les données et renvoie les résultats."""
+        """Télécharge les données et renvoie les résultats, triés par date, en un seul dataframe.
+
+        Tous les résultats de l'UC sont alors en mémoire : pour les longues périodes, voir scrap_ucs."""
+        results = self._scrap_uc_results(uc)
+        try:
+            return results.to_frame()
+        finally:
+            results.close()
+
+    def _scrap_uc_results(self, uc: ScrapperUC) -> UCResults:
+        # En mode profilage mémoire, tracemalloc suit aussi le process principal :
+        # le regroupement et le tri des résultats y sont mesurés comme les étapes des TPs.
         start = perf_counter()
         print()
+        if GeneralParametersUC.instance().memory_profiling:
+            MemoryProbe.start()
+
         if GeneralParametersUC.instance().should_download_in_parallel:
-            global_df = self.LOOP.run_until_complete(self._parallel_process_tps(uc))
+            results = self.LOOP.run_until_complete(self._parallel_process_tps(uc))
         else:
-            global_df = self._sequential_process_tps(uc)
+            results = self._sequential_process_tps(uc)
 
-        try:
-            global_df = global_df[["date"] + [x for x in global_df.columns if x != "date"]]
-            global_df = global_df.sort_values(by="date")
-        except KeyError:
-            pass
+        return self._finish_uc(uc, results, start)
+
+    def _new_results(self, uc: ScrapperUC) -> UCResults:
+        date_format = UCResults.HOURLY_FORMAT\
+                      if uc.scrapper_type in ScrapperTypes.hourly_scrappers()\
+                      else UCResults.DAILY_FORMAT
+
+        return UCResults(date_format)
+
+    def _add_result(self,
+                    results: UCResults,
+                    df: pd.DataFrame) -> None:
+        with MemoryProbe.measure(self._memory_peaks, MemoryReport.CONCAT):
+            results.add(df)
+
+    def _finish_uc(self,
+                   uc: ScrapperUC,
+                   results: UCResults,
+                   start: float) -> UCResults:
+        """Enregistre les caches, et écrit les derniers résultats de l'UC en mémoire dans leur série triée."""
+        PageCache.instance().flush()
+        EmptyCache.instance().flush()
+
+        with MemoryProbe.measure(self._memory_peaks, MemoryReport.SORT):
+            results.flush()
+
+        self._allocation_sites = MemoryProbe.top_sites()
 
         end = round(perf_counter() - start, 2)
-        print(f"terminé en {end}s")
+        print(f"{uc.scrapper_type.name} {uc.city} terminé en {end}s")
 
-        return global_df
+        return results
 
     async def _parallel_process_tps(self, uc: ScrapperUC):
-        executor = ProcessPoolExecutor(max_workers=GeneralParametersUC.instance().cpus)
-        futures = [self.LOOP.run_in_executor(executor, self._process_tp, tp)
-                   for tp in uc.to_tps()]
+        # Le pool de workers est partagé par tous les scrappers, et arrêté en fin de lancement (WorkerPool.close).
+        # Chaque worker ouvre sa session (et son navigateur) une seule fois, à son démarrage.
+        return await self._process_tps_on(uc,
+                                          WorkerPool.instance(self._requires_browser()),
+                                          asyncio.Semaphore(GeneralParametersUC.instance().max_pending_tps))
+
+    async def _process_tps_on(self,
+                              uc: ScrapperUC,
+                              pool: WorkerPool,
+                              window: asyncio.Semaphore) -> UCResults:
+        """Traite les TPs de l'UC sur le pool de workers, et renvoie leurs résultats."""
+        # (1)   Les TPs sont tirés de to_tps au fur et à mesure : un TP n'est créé et lancé
+        #       qu'une fois une place libérée dans la fenêtre des TPs en cours.
+        #       Les TPs, les pages téléchargées en attente d'un worker et les tâches asyncio
+        #       restent en nombre limité, quelle que soit la période de l'UC.
+        # (2)   Chaque TP terminé libère sa place, et son résultat est traité aussitôt :
+        #       ses données sont remises à UCResults, qui n'en garde qu'un nombre limité en mémoire,
+        #       son échec enregistré, sous sa clé, comme celui d'un TP annulé.
+        # (3)   On attend les derniers TPs en cours.
+        results = self._new_results(uc)
+        running = set()
+
+        def on_tp_done(tp: TaskParameters,
+                       task: asyncio.Task) -> None:
+            # (2)
+            window.release()
+            running.discard(task)
+            if task.cancelled():
+                self._record_failure(ProcessException(key=tp.key, url=tp.url, msg="TP annulé"))
+                self._metrics_of(tp).finish(TPMetrics.ERROR, tp.attempts)
+                return
+
+            try:
+                self._add_result(results, task.result())
+            except ProcessException as pe:
+                self._record_failure(pe)
+            except Exception as ex:
+                self._record_failure(ProcessException(key=tp.key, url=tp.url, msg=str(ex)))
+        # (1)
+        for tp in uc.to_tps():
+            if self._is_known_empty(tp):
+                continue
 
-        results = await asyncio.gather(*futures, return_exceptions=True)
-        dfs = [x for x in results if isinstance(x, pd.DataFrame)]
-        exceptions = [x for x in results if isinstance(x, Exception)]
+            await window.acquire()
+            task = asyncio.ensure_future(self._download_and_process_tp(tp, pool))
+            task.add_done_callback(partial(on_tp_done, tp))
+            running.add(task)
+        # (3)
+        while running:
+            await asyncio.wait(set(running))
 
-        for index, ex in enumerate(exceptions):
-            if isinstance(ex, ProcessException):
-                self._errors[ex.key] = {"url": ex.url, "msg": ex.msg}
-            else:
-                self._errors[str(index)] = "exception durant un process en parallèle"
+        return results
 
+    def _sequential_process_tps(self, uc: ScrapperUC):
+        # (1)   Les TPs sont traités un par un, dans l'ordre de to_tps.
+        # (2)   Un TP dont le téléchargement échoue est mis de côté dans retries, un tas trié par
+        #       instant de relance, et on passe directement au TP suivant.
+        # (3)   Avant chaque nouveau TP, on relance en priorité les TPs dont le délai est écoulé.
+        #       Quand il n'y a plus de nouveaux TPs, on attend les relances restantes.
+        # (4)   Les TPs qui ont épuisé leurs tentatives sont enregistrés en erreur.
+        # (5)   Les TPs dont les résultats sont en cache ne sont ni téléchargés ni traités.
+        #       Les pages en cache ne sont pas téléchargées, et ne consomment pas les limites du site.
+        #       Une page téléchargée n'est mise en cache qu'une fois traitée avec succès.
+        # (6)   Les TPs connus pour être vides sont écartés d'emblée. Ceux confirmés vides
+        #       ne sont pas relancés, et sont retenus pour les prochains lancements.
+        gpuc = GeneralParametersUC.instance()
+        cache = PageCache.instance()
+        results = ResultCache.instance()
+        uc_results = self._new_results(uc)
+        retries = []
+        retries_order = count()
+        # (6)
+        tps = (tp for tp in uc.to_tps() if not self._is_known_empty(tp))
+        WorkerSession.start(self._requires_browser())
         try:
-            global_df = pd.concat(dfs)
-        except ValueError:
-            global_df = pd.DataFrame()
+            while True:
+                # (3)
+                if retries and retries[0][0] <= monotonic():
+                    tp = heapq.heappop(retries)[2]
+                else:
+                    tp = next(tps, None)
+
+                if tp is None:
+                    if not retries:
+                        break
+
+                    sleep(max(0.0, retries[0][0] - monotonic()))
+                    continue
+                # (1)
+                tp.register_attempt()
+                metrics = self._metrics_of(tp)
+                try:
+                    # (5)
+                    local_df = results.get(tp, self.CODE_VERSION)
+                    status = TPMetrics.CACHED
+                    if local_df is None:
+                        html_text = cache.get(tp)
+                        is_cached = html_text is not None
+                        if not is_cached:
+                            html_text = self._download_sequentially(tp, metrics)
+
+                        local_df, process_metrics = self._process_tp(tp, html_text)
+                        metrics.merge(process_metrics)
+                        self._profiles.add(tp.scrapper_type.name, process_metrics.profile)
+                        results.put(tp, self.CODE_VERSION, local_df)
+                        status = TPMetrics.OK
+
+                        if not is_cached:
+                            cache.put(tp, html_text)
+
+                    self._add_result(uc_results, local_df)
+                    self._tp_durations[tp.key] = tp.elapsed
+                    metrics.finish(status, tp.attempts, local_df.shape[0])
+                except ProcessException as pe:
+                    # (6)
+                    if pe.empty:
+                        EmptyCache.instance().add(tp)
+                    # (2)
+                    if pe.retryable and tp.attempts < gpuc.max_attempts:
+                        print(f"nouvelle tentative différée : {tp.url}")
+                        heapq.heappush(retries, (monotonic() + gpuc.backoff(tp.attempts),
+                                                 next(retries_order),
+                                                 tp))
+                    # (4)
+                    else:
+                        self._record_failure(pe)
+                        metrics.finish(TPMetrics.EMPTY if pe.empty else TPMetrics.ERROR, tp.attempts)
+        finally:
+            WorkerSession.close()
+
+        return uc_results
+
+    def _requires_browser(self) -> bool:
+        """True si les workers doivent lancer chromium : pages javascript, hors relecture d'une archive."""
+        return self.REQUIRES_JS and not PageArchive.instance().is_replaying
+
+    def _is_known_empty(self, tp: TaskParameters) -> bool:
+        """True si la page du TP est connue pour être vide, le TP est alors retenu dans known_empty."""
+        if not EmptyCache.instance().contains(tp):
+            return False
+
+        self._known_empty[tp.key] = {"url": tp.url, "msg": "période sans données (cache)"}
+
+        return True
+
+    def _metrics_of(self, tp: TaskParameters) -> TPMetrics:
+        """Renvoie les mesures du TP, créées à sa première tentative."""
+        if tp.key not in self._metrics:
+            self._metrics[tp.key] = self._new_metrics(tp)
+
+        return self._metrics[tp.key]
 
-        return global_df
+    @staticmethod
+    def _new_metrics(tp: TaskParameters) -> TPMetrics:
+        # Dans un worker, les paramètres généraux sont ceux transmis par WorkerSession.start.
+        gpuc = GeneralParametersUC.instance()
+        return TPMetrics(tp.key, tp.url, gpuc.trace, gpuc.memory_profiling)
 
-    def _sequential_process_tps(self, uc: ScrapperUC):
-        global_df = pd.DataFrame()
-        for tp in uc.to_tps():
+    @staticmethod
+    def _record_memory(metrics: TPMetrics, with_sites: bool) -> None:
+        """En mode profilage mémoire, relève la mémoire du process et de son navigateur,
+        et les sites d'allocation si le traitement de la page est le plus gourmand du process jusqu'ici."""
+        if not metrics.memory:
+            return
+
+        metrics.record_rss(os.getpid(),
+                           MemoryProbe.rss(),
+                           MemoryProbe.browser_rss(WorkerSession.instance().browser_pid))
+        if with_sites and MemoryProbe.is_new_peak(max(metrics.memory_peaks.values(), default=0)):
+            metrics.attach_allocation_sites(MemoryProbe.top_sites())
+
+    def _record_failure(self, pe: ProcessException) -> None:
+        """Enregistre un TP en échec définitif, en erreur ou dans known_empty si sa page est vide."""
+        if pe.empty:
+            self._known_empty[pe.key] = {"url": pe.url, "msg": pe.msg}
+        else:
+            self._errors[pe.key] = {"url": pe.url, "msg": pe.msg}
+
+    async def _download_and_process_tp(self,
+                                       tp: TaskParameters,
+                                       pool: WorkerPool) -> pd.DataFrame:
+        """Traite le TP, en le relançant tant que son téléchargement échoue et qu'il lui reste des tentatives."""
+        # Pendant l'attente d'une relance, le TP n'occupe ni worker ni place de téléchargement :
+        # les autres TPs avancent, et il est reprogrammé sur la boucle à l'expiration de son délai.
+        # Les échecs définitifs remontent à _process_tps_on qui les enregistre en erreur,
+        # les erreurs inattendues sous forme de ProcessException.
+        # Les pages confirmées vides sont retenues pour les prochains lancements.
+        # En mode trace, chaque tentative est un intervalle : les relances apparaissent sur la chronologie.
+        gpuc = GeneralParametersUC.instance()
+        while True:
+            tp.register_attempt()
             try:
-                local_df = self._process_tp(tp)
-                global_df = pd.concat([global_df, local_df])
+                with self._metrics_of(tp).span(TPMetrics.ATTEMPT):
+                    df = await self._try_tp(tp, pool)
+                self._tp_durations[tp.key] = tp.elapsed
+                return df
             except ProcessException as pe:
-                self._errors[pe.key] = {"url": pe.url, "msg": pe.msg}
-                continue
+                if pe.empty:
+                    EmptyCache.instance().add(tp)
+
+                if not pe.retryable or tp.attempts >= gpuc.max_attempts:
+                    self._metrics_of(tp).finish(TPMetrics.EMPTY if pe.empty else TPMetrics.ERROR, tp.attempts)
+                    raise
+            except Exception as ex:
+                # Erreur inattendue (worker arrêté, bug) : le TP est en erreur sous sa clé, avec son url.
+                self._metrics_of(tp).finish(TPMetrics.ERROR, tp.attempts)
+                raise ProcessException(key=tp.key, url=tp.url, msg=f"{type(ex).__name__} : {ex}") from ex
+
+            print(f"nouvelle tentative différée : {tp.url}")
+            await asyncio.sleep(gpuc.backoff(tp.attempts))
+
+    async def _try_tp(self,
+                      tp: TaskParameters,
+                      pool: WorkerPool) -> pd.DataFrame:
+        """Récupère la page du TP, en cache ou en la téléchargeant, et confie son traitement à un worker."""
+        # Les résultats en cache sont renvoyés directement, sans page ni worker.
+        # Une page téléchargée n'est mise en cache qu'une fois traitée avec succès.
+        results = ResultCache.instance()
+        metrics = self._metrics_of(tp)
+        df = results.get(tp, self.CODE_VERSION)
+
+        if df is not None:
+            metrics.finish(TPMetrics.CACHED, tp.attempts, df.shape[0])
+            return df
+
+        cache = PageCache.instance()
+        html_text = cache.get(tp)
+        is_cached = html_text is not None
+
+        if not is_cached:
+            html_text = await self._download(tp, pool)
 
-        return global_df
+        df, process_metrics = await pool.run(self._process_tp, tp, html_text)
+        metrics.merge(process_metrics)
+        self._profiles.add(tp.scrapper_type.name, process_metrics.profile)
+        metrics.finish(TPMetrics.OK, tp.attempts, df.shape[0])
+        results.put(tp, self.CODE_VERSION, df)
 
-    def _process_tp(self, tp: TaskParameters):
+        if not is_cached:
+            cache.put(tp, html_text)
+
+        return df
+
+    async def _download(self,
+                        tp: TaskParameters,
+                        pool: WorkerPool) -> str:
+        """Télécharge la page du TP, ou la relit dans l'archive, et renvoie son html."""
+        # Les pages nécessitant chromium sont téléchargées et rendues par le navigateur d'un worker,
+        # qui renvoie le html. Les autres sont téléchargées ici, sur la boucle.
+        # En enregistrement, chaque page téléchargée est ajoutée à l'archive.
+        # L'attente des limites du site, d'une place de téléchargement ou d'un worker libre est mesurée à part.
+        archive = PageArchive.instance()
+        if archive.is_replaying:
+            return self._replay_page(tp, archive)
+
+        metrics = self._metrics_of(tp)
+        if self.REQUIRES_JS:
+            start = perf_counter()
+            async with HostLimiter.of(tp.scrapper_type):
+                html_text, download_metrics = await pool.run(self._download_page, tp)
+            metrics.merge(download_metrics)
+            metrics.add(TPMetrics.WAIT, perf_counter() - start - sum(download_metrics.stages.values()))
+        else:
+            try:
+                html_text = await FetchEngine.instance(self.LOOP).fetch(tp.url, tp.scrapper_type, metrics)
+            except Exception as ex:
+                raise ProcessException(key=tp.key, url=tp.url, msg=str(ex), retryable=True)
+
+        metrics.add_download(html_text)
+        archive.record(tp, html_text)
+
+        return html_text
+
+    def _download_sequentially(self,
+                               tp: TaskParameters,
+                               metrics: TPMetrics) -> str:
+        """Équivalent de _download pour les téléchargements séquentiels, dans le process courant."""
+        archive = PageArchive.instance()
+        if archive.is_replaying:
+            return self._replay_page(tp, archive)
+
+        with metrics.measure(TPMetrics.WAIT):
+            HostLimiter.of(tp.scrapper_type).wait()
+
+        html_text, download_metrics = self._download_page(tp)
+        metrics.merge(download_metrics)
+        metrics.add_download(html_text)
+        archive.record(tp, html_text)
+
+        return html_text
+
+    @staticmethod
+    def _replay_page(tp: TaskParameters, archive: PageArchive) -> str:
+        # En relecture, aucune requête n'est faite : une page absente de l'archive est une erreur définitive.
+        html_text = archive.get(tp)
+
+        if html_text is None:
+            raise ProcessException(key=tp.key, url=tp.url, msg="page absente de l'archive")
+
+        return html_text
+
+    def _process_tp(self,
+                    tp: TaskParameters,
+                    html_text: str) -> Tuple[pd.DataFrame, TPMetrics]:
+        """Traite la page du TP, et renvoie ses résultats avec la durée de chaque étape."""
+        # En mode profilage, le traitement est exécuté sous cProfile, dans le process qui traite la page :
+        # ses statistiques reviennent avec les mesures, et sont agrégées par type de scrapper.
+        # En mode profilage mémoire, les sites d'allocation sont relevés tant que les résultats sont en mémoire.
         print(tp.url)
+        metrics = self._new_metrics(tp)
+        if metrics.memory:
+            MemoryProbe.start()
+
+        if GeneralParametersUC.instance().profiling:
+            df_tp, profile_stats = ProfileReport.profile(self._process_page, tp, html_text, metrics)
+            metrics.attach_profile(profile_stats)
+        else:
+            df_tp = self._process_page(tp, html_text, metrics)
+
+        self._record_memory(metrics, with_sites=True)
+
+        return df_tp, metrics
+
+    def _process_page(self,
+                      tp: TaskParameters,
+                      html_text: str,
+                      metrics: TPMetrics) -> pd.DataFrame:
+        """Étapes du traitement de la page : table, noms et valeurs des colonnes, mise en forme, lignes manquantes."""
         try:
-            html_data = self._load_html(tp)
-            col_names = self._scrap_columns_names(html_data)
-            values = self._scrap_columns_values(html_data)
-            df_tp = self._rework_data(values, col_names, tp)
-            df_tp = self._add_missing_rows(df_tp, tp)
+            with metrics.measure(TPMetrics.FIND_TABLE):
+                html_data = self._find_table(HTML(html=html_text), tp)
+        except EmptyTableException as ex:
+            raise ProcessException(key=tp.key, url=tp.url, msg=str(ex), empty=True)
+        except Exception as ex:
+            raise ProcessException(key=tp.key, url=tp.url, msg=str(ex), retryable=True)
+
+        try:
+            with metrics.measure(TPMetrics.COLUMNS_NAMES):
+                col_names = self._scrap_columns_names(html_data)
+            with metrics.measure(TPMetrics.COLUMNS_VALUES):
+                values = self._scrap_columns_values(html_data)
+            with metrics.measure(TPMetrics.REWORK):
+                df_tp = self._rework_data(values, col_names, tp)
+            with metrics.measure(TPMetrics.MISSING_ROWS):
+                df_tp = self._add_missing_rows(df_tp, tp)
         except Exception as ex:
             raise ProcessException(key=tp.key, url=tp.url, msg=str(ex))
 
         return df_tp
 
-    @staticmethod
-    def _load_html(tp: TaskParameters) -> Element:
-        """Charge une page html à scrapper et renvoie la table de données trouvée."""
-        html_loading_trials = 3
-        html_page = None
-        with HTMLSession() as session:
-            while html_page is None and html_loading_trials > 0:
-
-                if html_loading_trials < 3:
-                    print("retrying...")
-
-                try:
-                    html_page = session.get(tp.url)
-                    html_page.html.render(sleep=tp.waiting,  # .html n'est pas trouvé mais est essentiel
-                                          keep_page=True,
-                                          scrolldown=1)
-                    if html_page.status_code != 200:
-                        html_page = None
-                except Exception:
-                    html_loading_trials -= 1
-                    html_page = None
-                    tp.update_waiting()
-
-        if html_page is None:
-            raise HtmlPageException()
+    def _download_page(self, tp: TaskParameters) -> Tuple[str, TPMetrics]:
+        """Télécharge la page html à scrapper, et renvoie son contenu avec la durée du téléchargement."""
+        # Les pages dont la table est présente dans le html renvoyé par le serveur
+        # sont simplement téléchargées. Les autres passent par chromium pour exécuter le javascript.
+        # La session (et son navigateur) est celle du process courant, partagée par tous ses TPs.
+        # Une seule tentative ici : les relances sont gérées par l'appelant, sans bloquer le process.
+        session = WorkerSession.instance()
+        metrics = self._new_metrics(tp)
+        try:
+            if self.REQUIRES_JS:
+                with metrics.measure(TPMetrics.RENDER):
+                    html_text = session.render(tp.url, tp.criteria)
+                # le navigateur occupe le plus de mémoire juste après le rendu
+                self._record_memory(metrics, with_sites=False)
+                return html_text, metrics
+
+            with metrics.measure(TPMetrics.FETCH):
+                return session.get(tp.url), metrics
+        except Exception as ex:
+            raise ProcessException(key=tp.key, url=tp.url, msg=str(ex), retryable=True)
 
+    @staticmethod
+    def _find_table(html: HTML, tp: TaskParameters) -> Element:
+        """Renvoie la table de données de la page, identifiée par les critères du TP."""
         attr = tp.criteria.css_attribute
         val = tp.criteria.attribute_value
         try:
             table: Element = [tab
-                              for tab in html_page.html.find("table")
+                              for tab in html.find("table")
                               if attr in tab.attrs and tab.attrs[attr] == val][0]
         except IndexError:
             raise HtmlPageException()
 
+        # Le site indique explicitement n'avoir aucune donnée pour la période :
+        # ce n'est pas un échec de téléchargement, inutile de relancer le TP.
         try:
             is_invalid = "no valid" in table.find("thead")[0]\
                                             .find("th")[0]\
                                             .text\
                                             .lower()\
                                             .strip()
-            table = None if is_invalid else table
+            if is_invalid:
+                raise EmptyTableException()
 
         except IndexError:
             pass
 
-        if table is None:
-            raise HtmlPageException()
-
         return table
 
     @abstractmethod
@@ -187,39 +662,102 @@ class MeteoScrapper(ABC):
                           df: pd.DataFrame,
                           tp: TaskParameters) -> pd.DataFrame:
         """Complète le dataframe si des lignes manquent."""
-        # (1)   On initialise un DataFrame totalement vide, des dimensions attendues,
-        #       avec les mêmes colonnes que df.
-        # (2)   On place la date de chacun des dfs en indexe et on retire de missings tous les indexes de df.
-        #       Il ne reste que les lignes manquantes.
-        #       On ignore le 29 février car il n'est pas anticipé dans _expected_dates et causerait une KeyError.
-        # (3)   On ajoute ces lignes aux résultats et on remet la date en colonne.
+        # (1)   On place la date en indexe, et on garde les dates attendues absentes de df, dans leur ordre.
+        # (2)   Un seul reindex ajoute les lignes manquantes, remplies de nan, après celles de df.
+        #       Les lignes de df sont conservées telles quelles, y compris celles hors des dates attendues.
+        #       Si df contient des dates en double, le reindex est impossible : les lignes manquantes sont concaténées.
+        # (3)   Les colonnes d'entiers passent en float, que des lignes manquent ou non,
+        #       pour que le type des colonnes ne dépende pas des données de la page.
+        # (4)   On remet la date en colonne.
 
         # (1)
         expected_dates = self._expected_dates(tp)
-        missings = pd.DataFrame(np.full((len(expected_dates), df.shape[1]), np.NaN),
-                                columns=df.columns)
-        missings["date"] = pd.to_datetime(expected_dates)
-        # (2)
         df = df.set_index("date")
-        missings = missings.set_index("date")
-        missings = missings.drop(df[df.index != f"{tp.year}-02-29"].index, axis="rows")
+        missings = expected_dates[~expected_dates.isin(df.index)]
+        # (2)
+        if df.index.is_unique:
+            df = df.reindex(df.index.append(missings))
+        else:
+            df = pd.concat([df, pd.DataFrame(np.NaN, index=missings, columns=df.columns)])
         # (3)
-        df = pd.concat([df, missings])
-        df = df.reset_index()
+        for col in [col for col, dtype in df.dtypes.items() if dtype.kind in "iu"]:
+            df[col] = df[col].astype(float)
+        # (4)
+        df = df.rename_axis("date").reset_index()
 
         return df
 
     @abstractmethod
-    def _expected_dates(self, tp: TaskParameters) -> List[str]:
-        """Renvoie la liste des dates attendues pour le tp courant dans le dataframe,
+    def _expected_dates(self, tp: TaskParameters) -> pd.DatetimeIndex:
+        """Renvoie les dates attendues pour le tp courant dans le dataframe,
         pour l'ajout des lignes manquantes."""
         pass
 
+    @staticmethod
+    def _days_index(year: int, month: int) -> pd.DatetimeIndex:
+        """Jours du mois, 29 février compris les années bissextiles."""
+        return pd.DatetimeIndex(Calendar.month_days(year, month), name="date")
+
+    @staticmethod
+    def _hours_index(year: int,
+                     month: int,
+                     day: int,
+                     ndays: int) -> pd.DatetimeIndex:
+        """Heures des ndays jours finissant le jour day, du jour le plus récent au plus ancien, de 0h à 23h."""
+        return pd.DatetimeIndex(Calendar.hours(year, month, day, ndays), name="date")
+
+    @staticmethod
+    def _extract_numerics(values: np.ndarray,
+                          numeric_regex: "re.Pattern",
+                          zero_regex: "re.Pattern") -> np.ndarray:
+        """Extrait la 1ère valeur numérique de chaque str du tableau, et renvoie un tableau de float de même forme.
+
+        Les str où zero_regex est trouvée ("aucune", "trace"...) valent 0, les cellules sans valeur (MISSING_VALUES) nan.
+        ValueError pour toute autre str sans valeur numérique : un changement de la page ne passe pas inaperçu,
+        le TP est en erreur avec la cellule en cause."""
+        # Toutes les cellules sont traitées en 1 seul passage, avec les regex déjà compilées.
+        # Sur des tables de quelques dizaines de lignes, c'est plus rapide que str.extract colonne par colonne.
+        search_number = numeric_regex.search
+        search_zero = zero_regex.search
+        flat = np.asarray(values, dtype=object).ravel()
+        numerics = np.empty(flat.size)
+
+        for index, str_value in enumerate(flat):
+            if search_zero(str_value):
+                numerics[index] = 0
+                continue
+
+            match = search_number(str_value)
+            if match:
+                numerics[index] = float(match.group())
+            elif str_value in MeteoScrapper.MISSING_VALUES:
+                numerics[index] = np.NaN
+            else:
+                raise ValueError(f"valeur non numérique dans la table : {str_value!r}")
+
+        return numerics.reshape(np.shape(values))
+
+    @staticmethod
+    def _pad_rows(values: List[str],
+                  bounds: Iterable[Tuple[int, int]],
+                  n_cols: int) -> List[str]:
+        """Renvoie les lignes values[début:fin] bout à bout, chacune complétée par des str vides jusqu'à n_cols valeurs."""
+        done = []
+        for start, end in bounds:
+            done.extend(values[start:end])
+            done.extend([""] * (n_cols - (end - start)))
+
+        return done
+
 
 class MeteocielDaily(MeteoScrapper):
 
+    REQUIRES_JS = False
+    CODE_VERSION = 3
     UNWANTED_COLUMNS = ["to_delete", "phenomenes"]
-    REGEX_FOR_NUMERICS = r'-?\d+\.?\d*'
+    REGEX_FOR_NUMERICS = re.compile(r'(-?\d+\.?\d*)')
+    # Valeurs signifiant l'absence de précipitations ou de soleil : elles valent 0.
+    REGEX_FOR_ZEROS = re.compile("aucune|trace")
     UNITS = {"temperature": "°C",
              "precipitations": "mm",
              "ensoleillement": "h",
@@ -241,6 +779,8 @@ class MeteocielDaily(MeteoScrapper):
         # (2)
         columns_names = [col.replace("ã©", "e")
                             .replace("ã¨", "e")
+                            .replace("é", "e")
+                            .replace("è", "e")
                             .replace(".", "")
                             .replace(" ", "_")
                             .replace("temp_", "temperature_")
@@ -279,10 +819,8 @@ class MeteocielDaily(MeteoScrapper):
         # (1)   On créé le tableau de données.
         # (2)   Suppression des colonnes inutiles. On passe par une compréhension pour éviter les KeyError.
         # (3)   Le tableau ne contient que des string composées d'une valeur et d'une unité.
-        #       La fonction lambda renvoie la valeur trouvée dans une string, convertie en float si elle existe, ou nan.
-        #       On définit aussi une fonction lambda vectorisée qui met la date en forme.
-        # (4)   On reconstruit les dates à partir des numéros des jours extraits de la colonne des dates.
-        #       On extrait les valeurs des autres colonnes.
+        #       On reconstruit les dates à partir des numéros des jours extraits de la colonne des dates.
+        # (4)   On extrait les valeurs des autres colonnes, converties en float, en un seul bloc.
 
         # (1)
         df = pd.DataFrame(np.array(values)
@@ -293,35 +831,27 @@ class MeteocielDaily(MeteoScrapper):
         # (2)
         df = df[[x for x in df.columns if x not in self.UNWANTED_COLUMNS]]
         # (3)
-        f_num_extract = np.vectorize(self._extract_numeric_value)
-        f_rework_dates = np.vectorize(lambda day: f"{tp.year_as_str}-{tp.month_as_str}-{Months.format_date_time(int(day))}")
-
+        days = self._extract_numerics(df["date"], self.REGEX_FOR_NUMERICS, self.REGEX_FOR_ZEROS)
+        df["date"] = Calendar.month_days(tp.year, tp.month, days)
         # (4)
-        df["date"] = f_num_extract(df["date"])
-        df["date"] = f_rework_dates(df["date"])
-        df["date"] = pd.to_datetime(df["date"])
-        df.iloc[:, 1:] = f_num_extract(df.iloc[:, 1:])
+        numerics = list(df.columns[1:])
+        df[numerics] = self._extract_numerics(df[numerics], self.REGEX_FOR_NUMERICS, self.REGEX_FOR_ZEROS)
 
         return df
 
-    def _extract_numeric_value(self, str_value: str):
-        if str_value in ("---", ""):
-            return np.NaN
-        elif "aucune" in str_value or "trace" in str_value:
-            return 0
-        else:
-            return float(re.findall(self.REGEX_FOR_NUMERICS, str_value)[0])
-
     def _expected_dates(self, tp):
-        return [f"{tp.year_as_str}-{tp.month_as_str}-{Months.format_date_time(x)}"
-                for x in range(1, Months.from_id(tp.month).ndays + 1)]
+        return self._days_index(tp.year, tp.month)
 
 
 class MeteocielHourly(MeteoScrapper):
 
+    REQUIRES_JS = False
     UNWANTED_COLUMNS = ["temps", "vent_rafales"]
+    CODE_VERSION = 3
     NOT_NUMERIC = ["date", "neb"]
-    REGEX_FOR_NUMERICS = r'-?\d+\.?\d*'
+    REGEX_FOR_NUMERICS = re.compile(r'(-?\d+\.?\d*)')
+    # Valeurs signifiant l'absence de précipitations : elles valent 0.
+    REGEX_FOR_ZEROS = re.compile("aucune|traces")
     UNITS = {"visi": "km",
              "temperature": "°C",
              "point_de_rosee": "°C",
@@ -347,6 +877,8 @@ class MeteocielHourly(MeteoScrapper):
         columns_names = [col.lower()
                             .replace("ã©", "e")
                             .replace("ã¨", "e")
+                            .replace("é", "e")
+                            .replace("è", "e")
                             .replace(".", "")
                             .replace(" ", "_")
                             .replace("(", "")
@@ -404,10 +936,11 @@ class MeteocielHourly(MeteoScrapper):
             wind_dir_cells = ["" if len(str_list) < 2 else str_list[1][:3]
                               for str_list in wind_dir_cells]
             # (2.4)
-            wind_dir_cells = [self._extract_numeric_value(str_value)
-                              for str_value in wind_dir_cells]
+            wind_dir_cells = self._extract_numerics(wind_dir_cells,
+                                                    self.REGEX_FOR_NUMERICS,
+                                                    self.REGEX_FOR_ZEROS)
 
-            wind_dir_cells = ["" if x is np.nan else str(x) for x in wind_dir_cells]
+            wind_dir_cells = ["" if np.isnan(x) else str(x) for x in wind_dir_cells]
             # (2.5)
             indexe_value_map = {columns_size * idx + wind_dir_indexe : val
                                 for idx, val in enumerate(wind_dir_cells)}
@@ -428,8 +961,8 @@ class MeteocielHourly(MeteoScrapper):
         #       On splite selon la ( pour avoir les 2 valeurs dans 2 str différentes.
         #       Si le split rend une liste d'1 seule valeur, on met une str vide dans les rafales.
         #       Puis on supprime les colonnes inutiles.
-        # (3)   On définit 2 fonctions vectorisées qui serviront à extraire les données numérique et formater les dates.
-        # (4)   On convertit les valeurs du format string vers le format qui leur vont.
+        # (3)   On reconstruit les dates à partir des heures extraites de la colonne des dates.
+        # (4)   On extrait les valeurs numériques, converties en float, en un seul bloc.
         # (5)   On ajoute au nom de la colonne son unité.
 
         # (1)
@@ -455,15 +988,11 @@ class MeteocielHourly(MeteoScrapper):
                  for col in df.columns
                  if col not in self.UNWANTED_COLUMNS]]
         # (3)
-        f_num_extract = np.vectorize(self._extract_numeric_value)
-        f_rework_dates = np.vectorize(lambda heure: f"{tp.year_as_str}-{tp.month_as_str}-{tp.day_as_str} {Months.format_date_time(int(heure))}:00:00")
-
+        hours = self._extract_numerics(df["date"], self.REGEX_FOR_NUMERICS, self.REGEX_FOR_ZEROS)
+        df["date"] = Calendar.day_hours(tp.year, tp.month, tp.day, hours)
         # (4)
         numerics = [x for x in df.columns if x not in self.NOT_NUMERIC]
-        df["date"] = f_num_extract(df["date"])
-        df["date"] = f_rework_dates(df["date"])
-        df["date"] = pd.to_datetime(df["date"])
-        df[numerics] = f_num_extract(df[numerics])
+        df[numerics] = self._extract_numerics(df[numerics], self.REGEX_FOR_NUMERICS, self.REGEX_FOR_ZEROS)
 
         # (5)
         df.columns = [f"{col}_{self.UNITS[col]}"
@@ -472,20 +1001,12 @@ class MeteocielHourly(MeteoScrapper):
                       for col in df.columns]
         return df
 
-    def _extract_numeric_value(self, str_value: str):
-        if str_value in ("---", ""):
-            return np.NaN
-        elif "aucune" in str_value or "traces" in str_value:
-            return 0
-        else:
-            return float(re.findall(self.REGEX_FOR_NUMERICS, str_value)[0])
-
     def _expected_dates(self, tp):
-        return [f"{tp.year_as_str}-{tp.month_as_str}-{tp.day_as_str} {Months.format_date_time(x)}:00:00"
-                for x in range(0, 24)]
+        return self._hours_index(tp.year, tp.month, tp.day, 1)
 
 
 class OgimetDaily(MeteoScrapper):
+    REQUIRES_JS = False
     TEMP_SUBS = ["max", "min", "avg", "max.", "min.", "mvg."]
     WIND_SUBS = ["dir.", "int.", "gust.", "dir", "int", "gust"]
     NOT_NUMERIC = ["date", "wind_km/h_dir"]
@@ -556,37 +1077,22 @@ class OgimetDaily(MeteoScrapper):
         # (1)   values contient des lignes incomplètes si sa taille n'est pas un multiple de n_cols.
         #       Si toutes les lignes sont complètes, on a rien à faire.
         #
-        # (2)   A chaque tour de boucle, on trouve l'indexe des 2 prochaines dates.
+        # (2)   On trouve les indexes de toutes les dates en 1 seul parcours de values.
         #
-        # (3)   On sélectionne les valeurs entre la 1ère date incluse et la 2ème exclue dans row.
-        #       On retire ces valeurs de values.
-        #
-        # (4)   On complète row avec autant de str que nécessaire pour avoir n_cols valeurs dedans,
-        #       et on l'ajoute aux valeurs traitées.
+        # (3)   Chaque ligne va d'une date incluse à la suivante exclue, la dernière jusqu'à la fin de values.
+        #       Les valeurs précédant la 1ère date sont ignorées.
+        #       Chaque ligne est complétée avec autant de str que nécessaire pour avoir n_cols valeurs.
 
         # (1)
         if len(values) % n_cols == 0:
             return values
-
-        done = []
-        while len(values) > 0:
-            # (2)
-            remaining_dates = [x for x in values if f"{tp.month_as_str}/" in x]
-            first_index = values.index(remaining_dates[0])
-            second_index = -1 if len(remaining_dates) == 1 else values.index(remaining_dates[1])
-            # (3)
-            if second_index == -1:
-                row = values[first_index:]
-                values = []
-            else:
-                row = values[first_index:second_index]
-                values = values[second_index:]
-            # (4)
-            actual_row_length = len(row)
-            row.extend([""] * (n_cols - actual_row_length))
-            done.extend(row)
-
-        return done
+        # (2)
+        date_marker = f"{tp.month_as_str}/"
+        starts = [index for index, x in enumerate(values) if date_marker in x]
+        if len(starts) == 0:
+            raise ScrapException()
+        # (3)
+        return MeteoScrapper._pad_rows(values, zip(starts, starts[1:] + [len(values)]), n_cols)
 
     def _rework_data(self, values, columns_names, tp):
         # (1)   Création du dataframe.
@@ -629,12 +1135,12 @@ class OgimetDaily(MeteoScrapper):
         return df
 
     def _expected_dates(self, tp):
-        return [f"{tp.year_as_str}-{tp.month_as_str}-{Months.format_date_time(x)}"
-                for x in range(1, Months.from_id(tp.month).ndays + 1)]
+        return self._days_index(tp.year, tp.month)
 
 
 class OgimetHourly(MeteoScrapper):
 
+    REQUIRES_JS = False
     REGEX_FOR_DATES = r'\d+/\d+/\d+'
     UNWANTED_COLUMNS = ["ww", "w1", "w2", "time"]
     NOT_NUMERIC = ["date", "ddd", "prec_mm"]
@@ -690,39 +1196,48 @@ class OgimetHourly(MeteoScrapper):
         #
         # (1)   values contient des lignes incomplètes si sa taille n'est pas un multiple de n_cols.
         #       Si toutes les lignes sont complètes, on a rien à faire.
-        # (2)   A chaque tour de boucle, on trouve l'indexe des 2 prochaines dates.
-        # (3)   On sélectionne les valeurs entre la 1ère date incluse et la 2ème exclue dans row.
-        #       On retire ces valeurs de values.
-        # (4)   On complète row avec autant de str que nécessaire pour avoir n_cols valeurs dedans,
-        #       et on l'ajoute aux valeurs traitées.
+        # (2)   On trouve les indexes de toutes les dates en 1 seul parcours de values,
+        #       et pour chaque date, les numéros des cellules qui la contiennent.
+        # (3)   Chaque ligne commence à une date. La ligne suivante commence à la 1ère cellule contenant
+        #       la date située 2 dates plus loin, décalée de l'indexe de la 1ère date dans les valeurs restantes
+        #       (toujours 0 sauf au 1er tour).
+        #       Les dates d'un même jour étant identiques, c'est la date suivante, sauf si celle-ci est la dernière
+        #       de son jour : la ligne s'étend alors jusqu'au jour suivant (2 lignes en 1).
+        #       Lorsqu'il ne reste qu'une date après la 1ère, la ligne s'étend jusqu'à la fin de values.
+        # (4)   Chaque ligne est complétée avec autant de str que nécessaire pour avoir n_cols valeurs.
 
         # (1)
         if len(values) % n_cols == 0:
             return values
-
-        done = []
-        while len(values) > 0:
-            # (2)
-            remaining_dates = [f"{tp.month_as_str}/{Months.format_date_time(tp.day - x)}/{tp.year_as_str}"
-                               for x in range(0, tp.ndays)]
-            remaining_dates = [x for x in values if x in remaining_dates]
-
-            first_index = values.index(remaining_dates[0])
-            remaining_dates = remaining_dates[first_index + 1:]
-            second_index = -1 if len(remaining_dates) == 1 else values[first_index + 1:].index(remaining_dates[1]) + first_index + 1
-            # (3)
-            if second_index == -1:
-                row = values[first_index:]
-                values = []
-            else:
-                row = values[first_index:second_index]
-                values = values[second_index:]
-            # (4)
-            actual_row_length = len(row)
-            row.extend([""] * (n_cols - actual_row_length))
-            done.extend(row)
-
-        return done
+        # (2)
+        dates = {f"{tp.month_as_str}/{Months.format_date_time(tp.day - x)}/{tp.year_as_str}"
+                 for x in range(0, tp.ndays)}
+        starts = [index for index, x in enumerate(values) if x in dates]
+        same_dates = dict()
+        for number, index in enumerate(starts):
+            same_dates.setdefault(values[index], []).append(number)
+        if len(starts) == 0:
+            raise ScrapException()
+        # (3)
+        bounds = []
+        start = 0
+        number = 0
+        while True:
+            following = number + starts[number] - start + 1
+            if len(starts) - following == 1:
+                bounds.append((starts[number], len(values)))
+                break
+
+            if following + 1 >= len(starts):
+                raise ScrapException()
+
+            candidates = same_dates[values[starts[following + 1]]]
+            next_number = candidates[bisect.bisect_right(candidates, number)]
+            bounds.append((starts[number], starts[next_number]))
+            start = starts[next_number]
+            number = next_number
+        # (4)
+        return MeteoScrapper._pad_rows(values, bounds, n_cols)
 
     def _rework_data(self, values, columns_names, tp):
         # (1)   On créé le dataframe.
@@ -768,16 +1283,12 @@ class OgimetHourly(MeteoScrapper):
         return df
 
     def _expected_dates(self, tp):
-        days = [f"{tp.year_as_str}-{tp.month_as_str}-{Months.format_date_time(tp.day - x)}"
-                for x in range(0, tp.ndays)]
-
-        hours = [Months.format_date_time(x) for x in range(0, 24)]
-
-        return [f"{day} {hour}:00:00" for day in days for hour in hours]
+        return self._hours_index(tp.year, tp.month, tp.day, tp.ndays)
 
 
 class WundergroundDaily(MeteoScrapper):
 
+    REQUIRES_JS = True
     SUB_NAMES = ["max", "avg", "min", "total"]
     UNITS_CONVERSION = {"dew": (lambda x: (x - 32) * 5/9),
                         "wind": (lambda x: x * 1.609344),
@@ -786,6 +1297,14 @@ class WundergroundDaily(MeteoScrapper):
                         "temperature": (lambda x: (x - 32) * 5/9),
                         "precipitation": (lambda x: x * 25.4)}
 
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _converters(cls, column_name: str) -> Tuple[Callable, ...]:
+        """Conversions d'unités de la colonne, dans l'ordre de UNITS_CONVERSION : celles dont la variable figure dans son nom."""
+        return tuple(convertor
+                     for variable, convertor in cls.UNITS_CONVERSION.items()
+                     if variable in column_name)
+
     def _scrap_columns_names(self, table):
         columns_names = [td.text for td in table.find("thead")[0].find("td")]
 
@@ -836,64 +1355,38 @@ class WundergroundDaily(MeteoScrapper):
     def _rework_data(self, values, columns_names, tp):
         # (1)   values est une liste de str. Chaque str contient toutes les données d'1 colonne principale
         #       séparées par des \n ("x\nx\nx\nx..."). On convertit ces str en liste de données [x,x,x, ...].
-        #       values devient une liste de listes.
-        #       On définit aussi le nombre de ligne comme étant égal à la longueur de la 1ère liste de values,
-        #       qui correspond à la colonne Time.
-        # (2)   On initialise la matrice qui constituera le dataframe final avec la 1ère liste (Time)
-        #       transformée en vecteur colonne.
-        # (3)   Le dataframe aura besoin de noms pour ses colonnes. Le nom final est composé d'un nom
-        #       principal et d'un complément, sauf pour la colonne Time.
-        #       Les noms principaux sont contenus dans main_names, les compléments correspondent aux 1 ou 3
-        #       premières valeurs des listes dans values. Pour chaque liste, on récupère les compléments.
-        #       On transforme la liste courante en vecteur colonne ou en matrice à 3 colonnes,
-        #       puis on accolle ces colonnes au dataframe principal.
-        # (4)   On associe les main_names avec leurs sub_names.
-        # (5)   On créé le dataframe final à partir de la matrice et des noms de colonnes. La 1ère ligne,
-        #       contenant les compléments, est supprimée.
-        # (6)   On formate les dates correctement, au format AAAA-MM-JJ.
-        # (7)   Jusqu'ici les valeur du dataframe sont au format str. On les convertit en numérique.
-        # (8)   On convertit vers les unités classiques .
+        #       values devient une liste de listes. Leur 1ère ligne contient le nom du mois (colonne Time)
+        #       ou les compléments des noms des colonnes, elle ne fait pas partie des données.
+        # (2)   On formate les dates correctement, au format AAAA-MM-JJ.
+        # (3)   Le nom final de chaque colonne est composé d'un nom principal et d'un complément.
+        #       Les noms principaux sont dans columns_names, les compléments correspondent aux 1 ou 3
+        #       premières valeurs des listes dans values. Pour chaque liste, on récupère les compléments,
+        #       et on la transforme en matrice d'autant de colonnes.
+        # (4)   Chaque colonne de la matrice est convertie en numérique, puis vers les unités classiques.
+        #       Les conversions de chaque colonne sont calculées une seule fois (voir _converters).
+        # (5)   On créé le dataframe final en une fois, à partir des colonnes déjà typées.
+        #       Ses lignes sont numérotées à partir de 1, la 1ère ligne de values étant écartée.
 
         # (1)
         values = [string.split("\n") for string in values]
         # (2)
-        df = np.array(values[0])\
-               .reshape(-1, 1)
+        columns = {"date": Calendar.month_days(tp.year, tp.month, [int(day) for day in values[0][1:]])}
         # (3)
-        all_sub_names = [[""]]
-        for current_column_values in values[1:]:
-            current_column_sub_names = [x.strip().lower()
-                                        for x in current_column_values
-                                        if x.strip().lower() in self.SUB_NAMES]
-            all_sub_names.append(current_column_sub_names)
-            current_column_values = np.array(current_column_values)\
-                                      .reshape(-1, len(current_column_sub_names))
-            df = np.hstack((df, current_column_values))
-        # (4)
-        columns_names = ["_".join([main, sub]) if sub
-                         else main
-                         for main, subs in zip(columns_names, all_sub_names)
-                         for sub in subs]
+        for main_name, current_column_values in zip(columns_names[1:], values[1:]):
+            sub_names = [x.strip().lower()
+                         for x in current_column_values
+                         if x.strip().lower() in self.SUB_NAMES]
+            matrix = np.array(current_column_values)\
+                       .reshape(-1, len(sub_names))
+            # (4)
+            for index, sub_name in enumerate(sub_names):
+                column_name = f"{main_name}_{sub_name}"
+                column = pd.to_numeric(matrix[1:, index])
+                for convertor in self._converters(column_name):
+                    column = np.round(convertor(column), 1)
+                columns[column_name] = column
         # (5)
-        df = pd.DataFrame(df, columns=columns_names)
-        df = df.drop([0], axis="index")
-
-        # (6)
-        df["date"] = [f"{tp.year_as_str}/{tp.month_as_str}/{Months.format_date_time(int(day))}"
-                      for day in df.date]
-
-        df["date"] = pd.to_datetime(df["date"])
-
-        # (7)
-        for col in df.columns[1:]:
-            df[col] = pd.to_numeric(df[col])
-        # (8)
-        for variable, convertor in self.UNITS_CONVERSION.items():
-            cols_to_convert = [col for col in df.columns if variable in col]
-            df[cols_to_convert] = np.round(convertor(df[cols_to_convert]), 1)
-
-        return df
+        return pd.DataFrame(columns, index=pd.RangeIndex(1, len(values[0])))
 
     def _expected_dates(self, tp):
-        return [f"{tp.year_as_str}-{tp.month_as_str}-{Months.format_date_time(x)}"
-                for x in range(1, Months.from_id(tp.month).ndays + 1)]
+        return self._days_index(tp.year, tp.month)
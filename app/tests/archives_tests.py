@@ -0,0 +1,75 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from app.archives_module import PageArchive
+from app.boite_a_bonheur.ArchiveSettings import ArchiveSettings
+from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperTypes
+from app.tps_module import TPBuilder
+
+
+class PageArchiveTester(TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        # les cleanups s'exécutent dans l'ordre inverse : les archives sont fermées avant la suppression du dossier
+        self.addCleanup(self._tmp.cleanup)
+        self._filename = os.path.join(self._tmp.name, "archive.bin")
+        self._tps = [TPBuilder(ScrapperTypes.OGIMET_DAILY)
+                         .with_year(2021)
+                         .with_month(month)
+                         .with_city("ferrara")
+                         .with_ind("16138")
+                         .build()
+                     for month in range(1, 4)]
+
+    def tearDown(self):
+        PageArchive._INSTANCE = None
+
+    def _record(self, tps, close: bool = True):
+        PageArchive._INSTANCE = PageArchive(ArchiveSettings(ArchiveSettings.RECORD_MODE, self._filename))
+        for tp in tps:
+            PageArchive.instance().record(tp, f"<html>{tp.key}</html>")
+
+        if close:
+            PageArchive.close()
+        else:
+            PageArchive.instance()._file.close()
+            PageArchive._INSTANCE = None
+
+    def _replay(self) -> PageArchive:
+        archive = PageArchive(ArchiveSettings(ArchiveSettings.REPLAY_MODE, self._filename))
+        self.addCleanup(archive.finish)
+        return archive
+
+    def test_record_replay(self):
+        self._record(self._tps[:2])
+        archive = self._replay()
+
+        self.assertEqual(archive.get(self._tps[0]), f"<html>{self._tps[0].key}</html>")
+        self.assertEqual(archive.get(self._tps[1]), f"<html>{self._tps[1].key}</html>")
+        self.assertIsNone(archive.get(self._tps[2]))
+
+    def test_append(self):
+        self._record(self._tps[:1])
+        self._record(self._tps[1:])
+        archive = self._replay()
+
+        for tp in self._tps:
+            self.assertEqual(archive.get(tp), f"<html>{tp.key}</html>")
+
+    def test_missing_index(self):
+        # archive interrompue avant l'écriture de l'index
+        self._record(self._tps, close=False)
+        archive = self._replay()
+
+        self.assertEqual(len(archive.urls), 3)
+        self.assertEqual(archive.get(self._tps[2]), f"<html>{self._tps[2].key}</html>")
+
+    def test_inactive(self):
+        archive = PageArchive(None)
+        self.addCleanup(archive.finish)
+        archive.record(self._tps[0], "<html></html>")
+
+        self.assertFalse(archive.is_recording)
+        self.assertIsNone(archive.get(self._tps[0]))
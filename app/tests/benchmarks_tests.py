@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from app.benchmarks import pipeline_benchmark
+from app.benchmarks.pipeline_benchmark import (BenchmarkCase,
+                                               build_cases,
+                                               compare,
+                                               resource_usage)
+from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperTypes
+from app.ucs_module import GeneralParametersUC
+from app.UserConfigFile import UserConfigFile
+
+
+class PipelineBenchmarkTester(TestCase):
+
+    def tearDown(self):
+        GeneralParametersUC.instance()._set_defaults()
+
+    def _ucs(self, case: BenchmarkCase):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "config.json")
+            with open(path, "w") as config_file:
+                json.dump(case.to_config("http://127.0.0.1:8000", False), config_file)
+
+            return UserConfigFile.from_json(path).get_all_ucs()
+
+    def test_cases(self):
+        cases = build_cases([ScrapperTypes.OGIMET_DAILY], [1, 12], [1], [2, 4])
+
+        self.assertEqual([case.key for case in cases],
+                         ["ogimet_jour_1m_1s_sequentiel_1",
+                          "ogimet_jour_1m_1s_parallele_2",
+                          "ogimet_jour_1m_1s_parallele_4",
+                          "ogimet_jour_12m_1s_sequentiel_1",
+                          "ogimet_jour_12m_1s_parallele_2",
+                          "ogimet_jour_12m_1s_parallele_4"])
+
+    def test_config(self):
+        daily = self._ucs(BenchmarkCase(ScrapperTypes.OGIMET_DAILY, 12, 3, BenchmarkCase.PARALLEL, 2))
+        hourly = self._ucs(BenchmarkCase(ScrapperTypes.METEOCIEL_HOURLY, 2, 1, BenchmarkCase.SEQUENTIAL, 1))
+
+        self.assertEqual(len(daily), 3)
+        self.assertEqual(sum(1 for _ in daily[0].to_tps()), 12)
+        self.assertEqual(hourly[0].scrapper_type, ScrapperTypes.METEOCIEL_HOURLY)
+        self.assertEqual(sum(1 for _ in hourly[0].to_tps()), 30 + 31)
+        self.assertEqual(GeneralParametersUC.instance().local_server, "http://127.0.0.1:8000")
+        self.assertFalse(GeneralParametersUC.instance().cache.enabled)
+
+    def test_compare(self):
+        reference = {"resultats": [{"cas": "a", "pages_par_s": 10}, {"cas": "b", "pages_par_s": 10}]}
+        results = {"resultats": [{"cas": "a", "pages_par_s": 9.5}, {"cas": "b", "pages_par_s": 8}]}
+
+        self.assertEqual(compare(results, reference, 0.1), ["b"])
+
+    def test_resource_usage(self):
+        resource = pipeline_benchmark.resource
+        self.addCleanup(setattr, pipeline_benchmark, "resource", resource)
+
+        if resource is not None:
+            rss_max, cpu = resource_usage()
+            self.assertGreater(rss_max["principal"], 0)
+            self.assertGreater(cpu["principal"], 0)
+
+        # sans le module resource (windows), les mesures sont signalées indisponibles
+        pipeline_benchmark.resource = None
+        self.assertEqual(resource_usage(), (pipeline_benchmark.UNAVAILABLE, pipeline_benchmark.UNAVAILABLE))
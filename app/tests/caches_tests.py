@@ -0,0 +1,174 @@
+import os
+import tempfile
+from datetime import date
+from time import time
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from app.boite_a_bonheur.CacheSettings import CacheSettings
+from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperTypes
+from app.caches_module import (EmptyCache,
+                               PageCache,
+                               ResultCache,
+                               canonical_url,
+                               url_key)
+from app.tps_module import TPBuilder
+
+
+class PageCacheTester(TestCase):
+
+    HTML = "<html><body><table cellpadding='2'></table></body></html>"
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._settings = CacheSettings(True, 6, 500, 720)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    @staticmethod
+    def _meteociel_tp(year: int, month: int):
+        return TPBuilder(ScrapperTypes.METEOCIEL_DAILY)\
+                   .with_year(year)\
+                   .with_month(month)\
+                   .with_city("nantes")\
+                   .with_code("7222")\
+                   .build()
+
+    def test_canonical_url(self):
+        self.assertEqual(canonical_url("HTTPS://WWW.Meteociel.com/obs.php?mois=2&annee=2021&code=7222"),
+                         canonical_url("https://www.meteociel.com/obs.php?code=7222&annee=2021&mois=2"))
+
+    def test_put_get(self):
+        tp = self._meteociel_tp(2021, 2)
+        cache = PageCache(self._tmp.name, self._settings)
+
+        self.assertIsNone(cache.get(tp))
+        cache.put(tp, self.HTML)
+        self.assertEqual(cache.get(tp), self.HTML)
+
+    def test_index_persistence(self):
+        tp = self._meteociel_tp(2021, 2)
+        cache = PageCache(self._tmp.name, self._settings)
+        cache.put(tp, self.HTML)
+        cache.flush()
+
+        cache = PageCache(self._tmp.name, self._settings)
+        self.assertEqual(cache.get(tp), self.HTML)
+
+    def test_disabled(self):
+        tp = self._meteociel_tp(2021, 2)
+        cache = PageCache(self._tmp.name, CacheSettings(False, 6, 500, 720))
+        cache.put(tp, self.HTML)
+
+        self.assertIsNone(cache.get(tp))
+        self.assertEqual(os.listdir(self._tmp.name), [])
+
+    def test_current_period_expires(self):
+        today = date.today()
+        old_tp = self._meteociel_tp(2021, 2)
+        current_tp = self._meteociel_tp(today.year, today.month)
+        cache = PageCache(self._tmp.name, CacheSettings(True, 0, 500, 720))
+        cache.put(old_tp, self.HTML)
+        cache.put(current_tp, self.HTML)
+        # l'age max est nul, seule la page de la période terminée reste valide
+        self.assertEqual(cache.get(old_tp), self.HTML)
+        self.assertIsNone(cache.get(current_tp))
+
+    def test_lru_eviction(self):
+        tps = [self._meteociel_tp(2021, month) for month in range(1, 4)]
+        cache = PageCache(self._tmp.name, self._settings)
+
+        for tp in tps:
+            cache.put(tp, self.HTML + os.urandom(256).hex())
+        # janvier est consulté, février devient la page la moins récemment utilisée
+        cache.get(tps[0])
+        cache._index[url_key(tps[0].url)]["last_access"] = time() + 1
+        cache._settings = CacheSettings(True, 6, cache.size / 1024 / 1024 * 0.8, 720)
+        cache._evict()
+
+        self.assertIsNotNone(cache.get(tps[0]))
+        self.assertIsNone(cache.get(tps[1]))
+        self.assertIsNotNone(cache.get(tps[2]))
+
+
+class ResultCacheTester(TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._cache = ResultCache(self._tmp.name, CacheSettings(True, 6, 500, 720))
+        self._df = pd.DataFrame({"date": pd.to_datetime(["2021-02-01", "2021-02-02", "2021-02-03"]),
+                                 "temperature_max_°C": [12.5, np.nan, 8.0],
+                                 "direction_vent": ["N", None, "SO"]})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_put_get(self):
+        tp = PageCacheTester._meteociel_tp(2021, 2)
+        self.assertIsNone(self._cache.get(tp, 1))
+
+        self._cache.put(tp, 1, self._df)
+        pd.testing.assert_frame_equal(self._cache.get(tp, 1), self._df)
+
+    def test_code_version(self):
+        tp = PageCacheTester._meteociel_tp(2021, 2)
+        other_tp = TPBuilder(ScrapperTypes.OGIMET_DAILY)\
+                       .with_year(2021)\
+                       .with_month(2)\
+                       .with_city("ferrara")\
+                       .with_ind("16138")\
+                       .build()
+        self._cache.put(tp, 1, self._df)
+        self._cache.put(other_tp, 1, self._df)
+        # une nouvelle version du scrapper meteociel n'invalide que ses propres résultats
+        cache = ResultCache(self._tmp.name, CacheSettings(True, 6, 500, 720))
+        self.assertIsNone(cache.get(tp, 2))
+        self.assertIsNotNone(cache.get(other_tp, 1))
+
+        cache = ResultCache(self._tmp.name, CacheSettings(True, 6, 500, 720))
+        self.assertIsNone(cache.get(tp, 1))
+
+    def test_current_period(self):
+        today = date.today()
+        tp = PageCacheTester._meteociel_tp(today.year, today.month)
+        self._cache.put(tp, 1, self._df)
+
+        self.assertIsNone(self._cache.get(tp, 1))
+
+
+class EmptyCacheTester(TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmp.name, "vides.json")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_add_contains(self):
+        tp = PageCacheTester._meteociel_tp(2021, 2)
+        cache = EmptyCache(self._path, CacheSettings(True, 6, 500, 720))
+        self.assertFalse(cache.contains(tp))
+
+        cache.add(tp)
+        cache.flush()
+        self.assertTrue(EmptyCache(self._path, CacheSettings(True, 6, 500, 720)).contains(tp))
+
+    def test_recheck(self):
+        tp = PageCacheTester._meteociel_tp(2021, 2)
+        cache = EmptyCache(self._path, CacheSettings(True, 6, 500, 0))
+        cache.add(tp)
+        cache._entries[url_key(tp.url)]["checked_at"] -= 1
+        # le délai de revérification est nul, la page doit être de nouveau téléchargée
+        self.assertFalse(cache.contains(tp))
+
+    def test_current_period(self):
+        today = date.today()
+        tp = PageCacheTester._meteociel_tp(today.year, today.month)
+        cache = EmptyCache(self._path, CacheSettings(True, 6, 500, 720))
+        cache.add(tp)
+
+        self.assertFalse(cache.contains(tp))
@@ -0,0 +1,76 @@
+import calendar
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from app.boite_a_bonheur.Calendar import Calendar
+from app.boite_a_bonheur.MonthEnum import Months
+
+
+class CalendarTester(TestCase):
+
+    def test_from_id(self):
+        self.assertEqual([Months.from_id(x).numero for x in range(1, 13)], list(range(1, 13)))
+        self.assertEqual(Months.values(), [Months.from_id(x) for x in range(1, 13)])
+
+        with self.assertRaises(IndexError):
+            Months.from_id(0)
+
+        with self.assertRaises(IndexError):
+            Months.from_id(13)
+
+    def test_ndays(self):
+        for year in [1900, 2000, 2020, 2021, 2024]:
+            for month in range(1, 13):
+                with self.subTest(year=year, month=month):
+                    self.assertEqual(Calendar.ndays(year, month), calendar.monthrange(year, month)[1])
+
+    def test_months(self):
+        years, months, days = Calendar.split(Calendar.months((11, 2020), (2, 2021)))
+
+        self.assertEqual(list(zip(years, months)), [(2020, 11), (2020, 12), (2021, 1), (2021, 2)])
+        self.assertEqual(set(days), {1})
+
+    def test_days(self):
+        years, months, days = Calendar.split(Calendar.days((27, 2, 2020), (2, 3, 2020)))
+
+        self.assertEqual(list(zip(years, months, days)), [(2020, 2, 27), (2020, 2, 28), (2020, 2, 29),
+                                                          (2020, 3, 1), (2020, 3, 2)])
+        self.assertEqual(len(Calendar.days((1, 1, 2021), (31, 12, 2021))), 365)
+
+    def test_month_days(self):
+        refs = pd.date_range("2024-02-01", "2024-02-29", freq="D")
+
+        self.assertTrue((Calendar.month_days(2024, 2) == refs.values).all())
+        self.assertEqual(Calendar.month_days(2024, 2).dtype, np.dtype(Calendar.RESOLUTION))
+        self.assertEqual(list(Calendar.month_days(2021, 3, [15.0, 1.0])),
+                         [np.datetime64("2021-03-15"), np.datetime64("2021-03-01")])
+
+        for days in [[0], [np.nan], [30]]:
+            with self.subTest(days=days):
+                with self.assertRaises(ValueError):
+                    Calendar.month_days(2024, 2, days)
+
+    def test_hours(self):
+        hours = Calendar.hours(2021, 3, 1, 2)
+
+        self.assertEqual(len(hours), 48)
+        self.assertEqual(hours[0], np.datetime64("2021-03-01T00:00"))
+        self.assertEqual(hours[24], np.datetime64("2021-02-28T00:00"))
+        self.assertEqual(hours[-1], np.datetime64("2021-02-28T23:00"))
+        self.assertEqual(list(Calendar.day_hours(2021, 3, 1, [23.0, 0.0])),
+                         [np.datetime64("2021-03-01T23:00"), np.datetime64("2021-03-01T00:00")])
+
+        with self.assertRaises(ValueError):
+            Calendar.day_hours(2021, 3, 1, [24])
+
+    def test_offsets_cache(self):
+        # les décalages sont gardés par nombre de jours, pas par date : le cache reste borné
+        for day in Calendar.days((1, 1, 2020), (31, 12, 2021)):
+            year, month, day = (int(x[0]) for x in Calendar.split(np.array([day])))
+            Calendar.hours(year, month, day, 1)
+            Calendar.month_days(year, month)
+
+        self.assertLessEqual(Calendar._hour_offsets.cache_info().currsize, 31)
+        self.assertLessEqual(Calendar._day_offsets.cache_info().currsize, 4)
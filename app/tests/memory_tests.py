@@ -0,0 +1,117 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import (TestCase,
+                      skipUnless)
+
+from app.benchmarks.parser_benchmark import load_corpus
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+from app.memory_module import (MemoryProbe,
+                               MemoryReport)
+from app.ucs_module import GeneralParametersUC
+
+
+class MemoryProbeTester(TestCase):
+
+    def setUp(self):
+        MemoryProbe.start()
+        self.addCleanup(tracemalloc.stop)
+        MemoryProbe._PEAK = 0
+
+    def test_measure(self):
+        peaks = dict()
+
+        with MemoryProbe.measure(peaks, MemoryReport.CONCAT):
+            data = bytearray(4 * 2 ** 20)
+            del data
+
+        with MemoryProbe.measure(peaks, MemoryReport.CONCAT):
+            pass
+
+        self.assertGreaterEqual(peaks[MemoryReport.CONCAT], 4 * 2 ** 20)
+        self.assertTrue(MemoryProbe.is_new_peak(10))
+        self.assertFalse(MemoryProbe.is_new_peak(10))
+
+    def test_top_sites(self):
+        data = [str(x) for x in range(10000)]
+        sites = MemoryProbe.top_sites(5)
+
+        self.assertEqual(len(sites), 5)
+        self.assertTrue(any(site.startswith(__file__) for site, _, _ in sites))
+        self.assertEqual(len(data), 10000)
+
+    @skipUnless(MemoryProbe.SUPPORTED, "mémoire résidente indisponible")
+    def test_rss(self):
+        # process enfant lançant lui-même un process : descendants le trouve aussi
+        child = subprocess.Popen([sys.executable, "-c",
+                                  "import subprocess, sys; subprocess.run([sys.executable, '-c', "
+                                  "'import time; time.sleep(5)'])"])
+        self.addCleanup(child.wait)
+        self.addCleanup(child.kill)
+        for _ in range(50):
+            if len(MemoryProbe.descendants()) > 1:
+                break
+            time.sleep(0.1)
+
+        self.assertGreater(MemoryProbe.rss(), 0)
+        self.assertIn(child.pid, MemoryProbe.descendants())
+        self.assertEqual(len(MemoryProbe.descendants(child.pid)), 1)
+        self.assertGreater(MemoryProbe.browser_rss(child.pid), MemoryProbe.rss(child.pid))
+        self.assertEqual(MemoryProbe.browser_rss(None), 0)
+
+    def test_process_tp(self):
+        table = [x for x in load_corpus() if x.name == "meteociel_jour"][0]
+        gpuc = GeneralParametersUC.instance()
+        self.addCleanup(gpuc._set_defaults)
+        gpuc._memory_profiling = True
+
+        _, metrics = table.scrapper()._process_tp(table.tp, table.read())
+
+        self.assertEqual(set(metrics.memory_peaks), set(TPMetrics.MEMORY_STAGES))
+        self.assertEqual(metrics.rss["pid"], os.getpid())
+        self.assertTrue(metrics.allocation_sites)
+
+
+class MemoryReportTester(TestCase):
+
+    MAIN_PID = 100
+
+    def _metrics(self, pid: int, rework_peak: int, site_size: int) -> TPMetrics:
+        metrics = TPMetrics("a", "https://www.ogimet.com/a", memory=True)
+        metrics._add_memory_peak(TPMetrics.REWORK, rework_peak)
+        metrics.record_rss(pid, 100, 1000)
+        metrics.attach_allocation_sites([["pandas/core/frame.py:10", site_size, 3]])
+        return metrics
+
+    def test_add(self):
+        report = MemoryReport(self.MAIN_PID)
+        report.add("ogimet_ferrara",
+                   [self._metrics(200, 10, 50), self._metrics(300, 30, 20)],
+                   {MemoryReport.CONCAT: 500},
+                   [["app/scrappers_module.py:1", 70, 1]],
+                   main_rss=5000)
+        uc = report.to_json()["ogimet_ferrara"]
+
+        self.assertEqual(uc["etapes_octets"], {TPMetrics.REWORK: 30, MemoryReport.CONCAT: 500})
+        self.assertEqual(uc["processus"], {"principal": {"process": 5000, "navigateur": 0},
+                                           "worker 200": {"process": 100, "navigateur": 1000},
+                                           "worker 300": {"process": 100, "navigateur": 1000}})
+        self.assertEqual(uc["sites"], [["app/scrappers_module.py:1", 70, 1], ["pandas/core/frame.py:10", 50, 3]])
+        self.assertIn("rework_data", report.summary())
+
+        with tempfile.TemporaryDirectory() as directory:
+            report.write(directory)
+            with open(os.path.join(directory, MemoryReport.FILENAME)) as memory_file:
+                self.assertEqual(json.load(memory_file), report.to_json())
+
+    def test_rss_unavailable(self):
+        report = MemoryReport(self.MAIN_PID, rss_supported=False)
+        report.add("ogimet_ferrara", [self._metrics(200, 10, 50)], main_rss=5000)
+
+        self.assertEqual(report.to_json()["ogimet_ferrara"]["processus"], MemoryReport.RSS_UNAVAILABLE)
+        self.assertIn(MemoryReport.RSS_UNAVAILABLE, report.summary())
+        self.assertNotIn("navigateur", report.summary())
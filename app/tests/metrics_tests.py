@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+from copy import copy
+from unittest import TestCase
+
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+from app.metrics_module import MetricsReport
+
+
+class TPMetricsTester(TestCase):
+
+    def test_measure_merge(self):
+        metrics = TPMetrics("ogimet_jour_ferrara_01_2021", "https://www.ogimet.com/cgi-bin/gsynres?ind=16138")
+        worker_metrics = TPMetrics(metrics.key, metrics.url)
+
+        with self.assertRaises(ValueError):
+            with worker_metrics.measure(TPMetrics.FIND_TABLE):
+                raise ValueError()
+
+        metrics.add(TPMetrics.FETCH, 0.5)
+        metrics.add_download("é" * 10)
+        metrics.merge(worker_metrics)
+        metrics.merge(worker_metrics)
+        metrics.finish(TPMetrics.OK, 3, 31)
+
+        self.assertEqual(metrics.host, "www.ogimet.com")
+        self.assertEqual(metrics.stages[TPMetrics.FETCH], 0.5)
+        self.assertAlmostEqual(metrics.stages[TPMetrics.FIND_TABLE], 2 * worker_metrics.stages[TPMetrics.FIND_TABLE])
+        self.assertEqual(metrics.downloaded_bytes, 20)
+        self.assertEqual(metrics.retries, 2)
+        self.assertEqual(copy(metrics), metrics)
+
+
+class MetricsReportTester(TestCase):
+
+    def _metrics(self, url: str, status: str, fetch: float) -> TPMetrics:
+        metrics = TPMetrics(url, url)
+        metrics.add(TPMetrics.FETCH, fetch)
+        metrics.finish(status, 1, 24 if status == TPMetrics.OK else 0)
+        return metrics
+
+    def setUp(self):
+        self._report = MetricsReport()
+        self._report.add("ogimet_ferrara", [self._metrics("https://www.ogimet.com/a", TPMetrics.OK, 1.0),
+                                            self._metrics("https://www.ogimet.com/b", TPMetrics.EMPTY, 3.0)])
+        self._report.add("meteociel_orleans", [self._metrics("https://www.meteociel.com/a", TPMetrics.OK, 2.0)])
+
+    def test_aggregate(self):
+        report = self._report.to_json()
+
+        self.assertEqual(report["sites"]["www.ogimet.com"]["statuts"], {TPMetrics.OK: 1, TPMetrics.EMPTY: 1})
+        self.assertEqual(report["sites"]["www.ogimet.com"]["etapes_s"][TPMetrics.FETCH]["total"], 4.0)
+        self.assertEqual(report["ucs"]["meteociel_orleans"]["lignes"], 24)
+
+    def test_prometheus(self):
+        lines = self._report.to_prometheus().splitlines()
+
+        self.assertIn("# TYPE meteoscrapping_stage_seconds_total counter", lines)
+        self.assertIn('meteoscrapping_stage_seconds_total{uc="ogimet_ferrara",host="www.ogimet.com",stage="fetch"} 4.0',
+                      lines)
+        self.assertIn('meteoscrapping_tps_total{uc="ogimet_ferrara",host="www.ogimet.com",status="vide"} 1', lines)
+
+    def test_unfinished(self):
+        # TP interrompu, jamais terminé : compté en erreur, jamais sous un statut None
+        self._report.add("ogimet_ferrara", [TPMetrics("https://www.ogimet.com/c", "https://www.ogimet.com/c")])
+
+        self.assertEqual(self._report.to_json()["ucs"]["ogimet_ferrara"]["statuts"],
+                         {TPMetrics.OK: 1, TPMetrics.EMPTY: 1, TPMetrics.ERROR: 1})
+        self.assertNotIn('status="None"', self._report.to_prometheus())
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._report.write(tmp)
+
+            with open(os.path.join(tmp, "metriques.json")) as json_file:
+                self.assertEqual(json.load(json_file), self._report.to_json())
+
+            self.assertTrue(os.path.isfile(os.path.join(tmp, "metriques.prom")))
@@ -0,0 +1,228 @@
+import random
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from requests_html import HTML
+
+from app.benchmarks.parser_benchmark import (check_budgets,
+                                             load_corpus,
+                                             run_stages)
+from app.boite_a_bonheur.MonthEnum import Months
+from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperTypes
+from app.scrappers_module import (MeteocielDaily,
+                                  MeteocielHourly,
+                                  OgimetDaily,
+                                  OgimetHourly,
+                                  WundergroundDaily)
+
+
+# Versions précédentes de OgimetDaily._fill_partial_rows et OgimetHourly._fill_partial_rows,
+# quadratiques, servant de référence : les versions actuelles doivent renvoyer exactement les mêmes valeurs.
+def _reference_daily_fill(values, n_cols, tp):
+    if len(values) % n_cols == 0:
+        return values
+
+    done = []
+    while len(values) > 0:
+        remaining_dates = [x for x in values if f"{tp.month_as_str}/" in x]
+        first_index = values.index(remaining_dates[0])
+        second_index = -1 if len(remaining_dates) == 1 else values.index(remaining_dates[1])
+        if second_index == -1:
+            row = values[first_index:]
+            values = []
+        else:
+            row = values[first_index:second_index]
+            values = values[second_index:]
+        row.extend([""] * (n_cols - len(row)))
+        done.extend(row)
+
+    return done
+
+
+def _reference_hourly_fill(values, n_cols, tp):
+    if len(values) % n_cols == 0:
+        return values
+
+    done = []
+    while len(values) > 0:
+        remaining_dates = [f"{tp.month_as_str}/{Months.format_date_time(tp.day - x)}/{tp.year_as_str}"
+                           for x in range(0, tp.ndays)]
+        remaining_dates = [x for x in values if x in remaining_dates]
+
+        first_index = values.index(remaining_dates[0])
+        remaining_dates = remaining_dates[first_index + 1:]
+        second_index = -1 if len(remaining_dates) == 1 else values[first_index + 1:].index(remaining_dates[1]) + first_index + 1
+        if second_index == -1:
+            row = values[first_index:]
+            values = []
+        else:
+            row = values[first_index:second_index]
+            values = values[second_index:]
+        row.extend([""] * (n_cols - len(row)))
+        done.extend(row)
+
+    return done
+
+
+class ParsersTester(TestCase):
+    """Traitement hors ligne des tables du corpus, étape par étape."""
+
+    def _process(self, table) -> pd.DataFrame:
+        scrapper = table.scrapper()
+        tp = table.tp
+        html_data = scrapper._find_table(HTML(html=table.read()), tp)
+        col_names = scrapper._scrap_columns_names(html_data)
+        values = scrapper._scrap_columns_values(html_data)
+        df = scrapper._rework_data(values, col_names, tp)
+
+        return scrapper._add_missing_rows(df, tp)
+
+    def test_corpus(self):
+        for table in load_corpus():
+            with self.subTest(table=table.name):
+                df = self._process(table)
+                expected_dates = pd.to_datetime(table.scrapper()._expected_dates(table.tp))
+
+                self.assertFalse(df["date"].isna().any())
+                self.assertFalse(df["date"].duplicated().any())
+                self.assertTrue(set(expected_dates) <= set(df["date"]))
+
+    def test_partial_rows(self):
+        table = [x for x in load_corpus() if x.name == "ogimet_jour_lignes_partielles"][0]
+        scrapper = table.scrapper()
+        html_data = scrapper._find_table(HTML(html=table.read()), table.tp)
+        col_names = scrapper._scrap_columns_names(html_data)
+        values = scrapper._scrap_columns_values(html_data)
+
+        self.assertNotEqual(len(values) % len(col_names), 0)
+        self.assertEqual(len(scrapper._fill_partial_rows(values, len(col_names), table.tp)),
+                         31 * len(col_names))
+
+    def test_numerics(self):
+        values = ["12.5 °C", "-3 km/h", "---", "", "aucune", "trace", "0.2 traces", "1019.3hPa"]
+
+        daily = MeteocielDaily._extract_numerics(values,
+                                                 MeteocielDaily.REGEX_FOR_NUMERICS,
+                                                 MeteocielDaily.REGEX_FOR_ZEROS)
+        hourly = MeteocielHourly._extract_numerics(values[:5] + values[6:],
+                                                   MeteocielHourly.REGEX_FOR_NUMERICS,
+                                                   MeteocielHourly.REGEX_FOR_ZEROS)
+
+        self.assertEqual(daily.dtype, np.float64)
+        np.testing.assert_array_equal(daily, [12.5, -3, np.nan, np.nan, 0, 0, 0, 1019.3])
+        np.testing.assert_array_equal(hourly, [12.5, -3, np.nan, np.nan, 0, 0, 1019.3])
+        # une cellule sans valeur numérique, ni marquée vide ou nulle, fait échouer le TP
+        # (en horaire, seul "traces" vaut 0)
+        for table, value in [(MeteocielDaily, "n/a"), (MeteocielHourly, "trace")]:
+            with self.subTest(value=value):
+                with self.assertRaisesRegex(ValueError, value):
+                    table._extract_numerics(["12.5 °C", value], table.REGEX_FOR_NUMERICS, table.REGEX_FOR_ZEROS)
+        # les cellules d'un dataframe sont traitées en bloc
+        block = MeteocielDaily._extract_numerics(pd.DataFrame(np.array(values).reshape(2, 4)),
+                                                 MeteocielDaily.REGEX_FOR_NUMERICS,
+                                                 MeteocielDaily.REGEX_FOR_ZEROS)
+        np.testing.assert_array_equal(block, np.reshape(daily, (2, 4)))
+
+    def test_partial_rows_reference(self):
+        # lignes interrompues au hasard, comparées à la version de référence :
+        # celles de la table journalière du corpus, et 3 jours de lignes horaires
+        # (la table horaire du corpus est trop longue à lire, et la référence trop lente sur un mois entier)
+        daily = [x for x in load_corpus() if x.name == "ogimet_jour"][0]
+        html_data = OgimetDaily._find_table(HTML(html=daily.read()), daily.tp)
+        n_cols = len(OgimetDaily()._scrap_columns_names(html_data))
+        values = OgimetDaily()._scrap_columns_values(html_data)
+        daily_rows = [values[i:i + n_cols] for i in range(0, len(values), n_cols)]
+
+        hourly = [x for x in load_corpus() if x.name == "ogimet_heure"][0]
+        hourly_rows = [[f"01/{day}/2021", f"{hour:02d}:00"] + [str(day * hour + x) for x in range(21)]
+                       for day in (31, 30, 29)
+                       for hour in range(23, -1, -1)]
+
+        cases = [(OgimetDaily, _reference_daily_fill, daily, daily_rows),
+                 (OgimetHourly, _reference_hourly_fill, hourly, hourly_rows)]
+
+        for scrapper_class, reference, table, rows in cases:
+            name = table.name
+            n_cols = len(rows[0])
+            for seed in range(20):
+                rng = random.Random(seed)
+                truncated = [x
+                             for row in rows
+                             for x in (row if rng.random() > 0.1 else row[:rng.randint(2, n_cols - 1)])]
+                with self.subTest(table=name, seed=seed):
+                    try:
+                        expected = reference(list(truncated), n_cols, table.tp)
+                    except IndexError:
+                        with self.assertRaises(Exception):
+                            scrapper_class._fill_partial_rows(list(truncated), n_cols, table.tp)
+                        continue
+
+                    self.assertEqual(scrapper_class._fill_partial_rows(list(truncated), n_cols, table.tp), expected)
+
+    def test_wunderground_columns(self):
+        table = [x for x in load_corpus() if x.scrapper_type == ScrapperTypes.WUNDERGROUND_DAILY][0]
+        values = ["Jan\n1\n2", "Max\nMin\n50\n41\n32\n23", "Max\nMin\n80\n60\n75\n55.5", "Total\n1\n0.5"]
+        names = ["date", "temperature_°C", "humidity_%", "precipitation_mm"]
+
+        df = WundergroundDaily()._rework_data(values, names, table.tp)
+
+        self.assertEqual(list(df.columns), ["date", "temperature_°C_max", "temperature_°C_min",
+                                            "humidity_%_max", "humidity_%_min", "precipitation_mm_total"])
+        self.assertEqual(list(df.index), [1, 2])
+        self.assertEqual(list(df["temperature_°C_max"]), [10.0, 0.0])
+        self.assertEqual(list(df["precipitation_mm_total"]), [25.4, 12.7])
+        # chaque colonne garde son propre type : entiers si toutes ses valeurs le sont
+        self.assertEqual(df["humidity_%_max"].dtype, np.int64)
+        self.assertEqual(df["humidity_%_min"].dtype, np.float64)
+        self.assertEqual(WundergroundDaily._converters("wind_speed_km/h_max"),
+                         (WundergroundDaily.UNITS_CONVERSION["wind"],))
+
+    def test_missing_rows(self):
+        table = [x for x in load_corpus() if x.name == "ogimet_jour_jours_absents"][0]
+        scrapper = table.scrapper()
+        df = pd.DataFrame({"date": pd.to_datetime(["2020-02-03", "2020-02-01", "2020-03-01"]),
+                           "pression": [1015, 1020, 1030],
+                           "vent": ["N", "S", "E"]})
+
+        filled = scrapper._add_missing_rows(df, table.tp)
+
+        # les lignes de df d'abord, date hors du mois comprise, puis les 27 jours manquants, 29 février compris
+        self.assertEqual(filled.shape[0], 3 + 27)
+        self.assertEqual(list(filled["date"][:4]), list(pd.to_datetime(["2020-02-03", "2020-02-01",
+                                                                        "2020-03-01", "2020-02-02"])))
+        self.assertEqual(filled["date"].iloc[-1], pd.Timestamp("2020-02-29"))
+        self.assertEqual(filled["pression"].dtype, np.float64)
+        self.assertTrue(filled["pression"][3:].isna().all())
+
+        # dates en double : même résultat, sans reindex
+        doubled = scrapper._add_missing_rows(pd.concat([df, df[:1]]), table.tp)
+        self.assertEqual(doubled.shape[0], 4 + 27)
+        self.assertEqual(list(doubled["date"][4:]), list(filled["date"][3:]))
+
+    def test_expected_dates(self):
+        ogimet = [x for x in load_corpus() if x.name == "ogimet_heure"][0]
+        hours = ogimet.scrapper()._expected_dates(ogimet.tp)
+
+        self.assertEqual(len(hours), 31 * 24)
+        self.assertEqual(list(hours[[0, 23, 24, -1]]), list(pd.to_datetime(["2021-01-31 00:00", "2021-01-31 23:00",
+                                                                            "2021-01-30 00:00", "2021-01-01 23:00"])))
+        self.assertTrue(ogimet.scrapper()._expected_dates(ogimet.tp).equals(hours))
+        self.assertEqual(len(OgimetDaily._days_index(2020, 2)), 29)
+        self.assertEqual(len(OgimetDaily._days_index(2100, 2)), 28)
+
+    def test_stages(self):
+        table = [x for x in load_corpus() if x.scrapper_type == ScrapperTypes.OGIMET_DAILY][0]
+
+        self.assertEqual(list(run_stages(table, table.read()).keys()),
+                         ["_find_table", "_scrap_columns_names", "_scrap_columns_values",
+                          "_fill_partial_rows", "_rework_data", "_add_missing_rows"])
+
+    def test_budgets(self):
+        measures = {"a": {"_rework_data": {"mediane_ms": 12, "min_ms": 10}},
+                    "b": {"_rework_data": {"mediane_ms": 12, "min_ms": 10}}}
+        budgets = {"defaut": {"_rework_data": 10},
+                   "tables": {"b": {"_rework_data": 20}}}
+
+        self.assertEqual(len(check_budgets(measures, budgets)), 1)
+        self.assertEqual(check_budgets(measures, budgets, factor=2), [])
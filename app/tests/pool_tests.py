@@ -0,0 +1,127 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from unittest import TestCase
+
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+from app.boite_a_bonheur.WorkerSettings import WorkerSettings
+from app.pool_module import WorkerPool
+from app.scrappers_module import OgimetDaily
+from app.ucs_module import GeneralParametersUC
+
+
+def _crash_once(marker: str) -> int:
+    # arrête brutalement le worker la 1ère fois, comme un worker tué faute de mémoire
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+
+    return os.getpid()
+
+
+class WorkerPoolTester(TestCase):
+
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+        self.addCleanup(self._loop.close)
+        self.addCleanup(GeneralParametersUC.instance()._set_defaults)
+        self.addCleanup(WorkerPool.close)
+
+    def _pool(self, max_tasks: int, max_memory: float) -> WorkerPool:
+        gpuc = GeneralParametersUC.instance()
+        gpuc._cpus = 2
+        gpuc._workers = WorkerSettings(max_tasks, max_memory)
+        return WorkerPool.instance()
+
+    def _pids(self, pool: WorkerPool, tasks: int) -> set:
+        return {self._loop.run_until_complete(pool.run(os.getpid)) for _ in range(tasks)}
+
+    def test_instance(self):
+        pool = self._pool(0, 0)
+
+        self.assertIs(WorkerPool.instance(), pool)
+        self.assertEqual(pool.max_workers, 2)
+        self.assertNotIn(os.getpid(), self._pids(pool, 5))
+        self.assertEqual(pool.recycles, 0)
+
+        WorkerPool.close()
+        self.assertIsNot(WorkerPool.instance(), pool)
+
+    def test_recycle_tasks(self):
+        # 1 tâche par worker : le pool est remplacé toutes les 2 tâches
+        pool = self._pool(1, 0)
+        first = self._pids(pool, 2)
+        second = self._pids(pool, 2)
+
+        self.assertEqual(pool.recycles, 1)
+        self.assertFalse(first & second)
+
+    def test_recycle_memory(self):
+        # 1 Ko : tout worker dépasse la limite dès sa 1ère tâche
+        pool = self._pool(0, 0.001)
+        self._pids(pool, 3)
+
+        self.assertEqual(pool.recycles, 2)
+
+    def test_broken_worker(self):
+        # Le pool cassé par le worker arrêté est remplacé : la tâche en cause et celles en cours sont relancées.
+        pool = self._pool(0, 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            marker = os.path.join(tmp, "crash")
+
+            async def run_all():
+                return await asyncio.gather(pool.run(_crash_once, marker), *[pool.run(os.getpid) for _ in range(4)])
+
+            pids = self._loop.run_until_complete(run_all())
+
+        self.assertEqual(pool.recycles, 1)
+        self.assertTrue(all(isinstance(x, int) for x in pids))
+        self.assertTrue(self._pids(pool, 2))
+
+        # arrêt brutal à chaque tentative : l'échec remonte, les tâches suivantes passent
+        with self.assertRaises(BrokenProcessPool):
+            self._loop.run_until_complete(pool.run(os._exit, 1))
+        self.assertEqual(pool.recycles, 3)
+        self.assertNotIn(os.getpid(), self._pids(pool, 2))
+
+    def test_task_size(self):
+        # La tâche envoyée aux workers (méthode liée du scrapper) garde la même taille,
+        # quel que soit le nombre de TPs déjà mesurés par le scrapper.
+        scrapper = OgimetDaily()
+        size = len(pickle.dumps(scrapper._process_tp))
+
+        for x in range(200):
+            key = f"tp_{x}"
+            scrapper._metrics[key] = TPMetrics(key, f"https://www.ogimet.com/{key}", trace=True)
+            scrapper._tp_durations[key] = 1.0
+            scrapper._known_empty[key] = {"url": key, "msg": "vide"}
+            scrapper._errors[key] = {"url": key, "msg": "erreur"}
+
+        self.assertEqual(len(pickle.dumps(scrapper._process_tp)), size)
+        self.assertEqual(len(scrapper.metrics), 200)
+        self.assertEqual(len(pickle.loads(pickle.dumps(scrapper)).metrics), 0)
+
+    def test_ready(self):
+        # la création du pool rend la main avant l'initialisation des workers
+        pool = self._pool(0, 0)
+        self._loop.run_until_complete(pool.ready())
+
+        self.assertEqual(len(pool.pids), 2)
+        self.assertNotIn(os.getpid(), pool.pids)
+        self.assertTrue(self._pids(pool, 5) <= pool.pids)
+
+    def test_terminate(self):
+        pool = self._pool(0, 0)
+        self._loop.run_until_complete(pool.ready())
+        processes = [x for x in multiprocessing.active_children() if x.pid in pool.pids]
+
+        WorkerPool.terminate()
+        for process in processes:
+            process.join(5)
+
+        self.assertEqual(len(processes), 2)
+        self.assertTrue(all(not x.is_alive() for x in processes))
+        self.assertIsNone(WorkerPool._INSTANCE)
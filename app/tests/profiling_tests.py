@@ -0,0 +1,60 @@
+import os
+import pickle
+import pstats
+import tempfile
+from unittest import TestCase
+
+from app.benchmarks.parser_benchmark import load_corpus
+from app.profiling_module import ProfileReport
+from app.ucs_module import GeneralParametersUC
+
+
+def _work(n: int) -> int:
+    return sum(range(n))
+
+
+class ProfileReportTester(TestCase):
+
+    def _calls(self, stats: pstats.Stats) -> int:
+        return sum(nc for (_, _, function_name), (_, nc, _, _, _) in stats.stats.items() if function_name == "_work")
+
+    def test_add_merge(self):
+        result, profile_stats = ProfileReport.profile(_work, 1000)
+        self.assertEqual(result, 499500)
+
+        report = ProfileReport()
+        report.add("ogimet_jour", profile_stats)
+        report.add("ogimet_jour", profile_stats)
+        report.add("ogimet_jour", None)
+        self.assertEqual(self._calls(report.stats("ogimet_jour")), 2)
+
+        total = ProfileReport()
+        total.merge(report)
+        total.merge(report)
+        self.assertEqual(self._calls(total.stats("ogimet_jour")), 4)
+        # les statistiques ajoutées ne sont pas modifiées par les ajouts suivants
+        self.assertEqual(self._calls(report.stats("ogimet_jour")), 2)
+        self.assertIn("profil ogimet_jour", total.summary(5))
+        # transmis aux workers avec le scrapper
+        self.assertEqual(pickle.loads(pickle.dumps(total)).names, [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            total.write(directory)
+            stats = pstats.Stats(os.path.join(directory, "profil_ogimet_jour.prof"))
+            self.assertEqual(self._calls(stats), 4)
+
+    def test_process_tp(self):
+        table = [x for x in load_corpus() if x.name == "ogimet_jour"][0]
+        scrapper = table.scrapper()
+        gpuc = GeneralParametersUC.instance()
+        self.addCleanup(gpuc._set_defaults)
+
+        _, metrics = scrapper._process_tp(table.tp, table.read())
+        self.assertIsNone(metrics.profile)
+
+        gpuc._profiling = True
+        df, metrics = scrapper._process_tp(table.tp, table.read())
+        functions = {function_name for _, _, function_name in metrics.profile}
+
+        self.assertEqual(df.shape[0], 28)
+        self.assertIn("_rework_data", functions)
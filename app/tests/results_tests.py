@@ -0,0 +1,83 @@
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from app.results_module import UCResults
+
+
+class UCResultsTester(TestCase):
+
+    def setUp(self):
+        # séries et blocs minuscules : la fusion passe par de nombreux blocs partiels
+        self._results = UCResults(UCResults.HOURLY_FORMAT)
+        self._results.FRAMES_PER_RUN = 3
+        self._results.ROWS_PER_BLOCK = 7
+        self.addCleanup(self._results.close)
+
+    @staticmethod
+    def _frames(n_frames: int):
+        # 1 jour d'heures par TP, jours dans le désordre, une colonne présente 1 TP sur 2, des valeurs manquantes
+        rng = np.random.default_rng(3)
+        frames = []
+        for day in rng.permutation(n_frames):
+            dates = pd.Timestamp(2021, 1, 1) + pd.to_timedelta(day, unit="D") + pd.to_timedelta(np.arange(24), unit="h")
+            df = pd.DataFrame({"temperature": rng.normal(10, 5, 24).round(1),
+                               "date": dates[::-1],
+                               "vent": rng.choice(["N", "SW", ""], 24)})
+            df.loc[df.index[::5], "temperature"] = np.NaN
+            if day % 2:
+                df["rafales"] = rng.normal(30, 5, 24).round(1)
+            frames.append(df)
+
+        return frames
+
+    def test_to_csv(self):
+        # même CSV que la concaténation de tous les TPs, date en 1ère colonne, triée par date
+        frames = self._frames(20)
+        for df in frames:
+            self._results.add(df)
+            self.assertLessEqual(self._results.frames_in_memory, self._results.FRAMES_PER_RUN)
+
+        reference = pd.concat(frames)
+        reference = reference[["date"] + [x for x in reference.columns if x != "date"]]
+        expected = io.StringIO()
+        reference.sort_values(by="date", kind="stable").to_csv(expected, index=False)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "resultats", "uc.csv")
+            self._results.to_csv(path)
+            with open(path, encoding="utf-8", newline="") as csv_file:
+                self.assertEqual(csv_file.read(), expected.getvalue())
+
+        self.assertEqual(self._results.rows, 20 * 24)
+
+    def test_to_frame(self):
+        for df in self._frames(4):
+            self._results.add(df)
+
+        df = self._results.to_frame()
+
+        self.assertEqual(df.shape, (4 * 24, 4))
+        self.assertEqual(list(df.columns), ["date", "temperature", "vent", "rafales"])
+        self.assertTrue(df["date"].is_monotonic_increasing)
+        self.assertEqual(df["date"].dtype.kind, "M")
+
+    def test_close(self):
+        for df in self._frames(4):
+            self._results.add(df)
+
+        directory = self._results._directory
+        self.assertTrue(os.path.isdir(directory))
+
+        self._results.close()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_empty(self):
+        self._results.add(pd.DataFrame(columns=["date", "temperature"]))
+
+        self.assertTrue(self._results.empty)
+        self.assertTrue(self._results.to_frame().empty)
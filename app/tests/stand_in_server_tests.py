@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import requests
+
+from app.benchmarks.synthetic_pages import SyntheticPages
+from app.benchmarks.stand_in_server import (ServerProfile,
+                                            StandInServer)
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+from app.fetchers_module import FetchEngine
+from app.pool_module import WorkerPool
+from app.scrappers_module import (MeteoScrapper,
+                                  OgimetDaily)
+from app.ucs_module import GeneralParametersUC
+from app.UserConfigFile import UserConfigFile
+
+
+class FailingOgimetDaily(OgimetDaily):
+    """Scrapper dont le traitement de la page de février plante (erreur inattendue, hors ProcessException)."""
+
+    def _process_tp(self, tp, html_text):
+        if tp.month == 2:
+            raise RuntimeError("bug de traitement")
+
+        return super()._process_tp(tp, html_text)
+
+
+class StandInServerTester(TestCase):
+
+    URL = "/cgi-bin/gsynres?lang=en&ind=16138&ano=2021&mes=2&day=28&hora=23&ndays=28"
+
+    @staticmethod
+    def _ucf(directory: str,
+             server: StandInServer,
+             parallelism: bool,
+             ucs: dict,
+             **general_parameters) -> UserConfigFile:
+        config = {"parametres_generaux": {"parallelisme": parallelism,
+                                          "cpus": 2 if parallelism else 1,
+                                          "cache": {"actif": False},
+                                          "serveur_local": server.url,
+                                          **general_parameters}}
+        config.update(ucs)
+        path = os.path.join(directory, "config.json")
+        with open(path, "w") as config_file:
+            json.dump(config, config_file)
+
+        return UserConfigFile.from_json(path)
+
+    def _get(self, profile: ServerProfile) -> requests.Response:
+        with StandInServer(profile) as server:
+            return requests.get(server.url + self.URL)
+
+    def test_pages(self):
+        response = self._get(ServerProfile(ServerProfile.CONSTANT, latency_ms=0))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Daily weather summary", response.text)
+        self.assertEqual(response.text, self._get(ServerProfile(ServerProfile.CONSTANT, latency_ms=0)).text)
+
+    def test_failures(self):
+        throttled = self._get(ServerProfile(ServerProfile.CONSTANT, latency_ms=0, throttle_rate=1))
+        self.assertEqual(throttled.status_code, 429)
+        self.assertEqual(throttled.headers["Retry-After"], "1")
+
+        self.assertEqual(self._get(ServerProfile(ServerProfile.CONSTANT, latency_ms=0, error_rate=1)).status_code, 500)
+        self.assertIn(SyntheticPages.NO_VALID_DATA, self._get(ServerProfile(ServerProfile.CONSTANT, latency_ms=0, empty_rate=1)).text)
+
+        with StandInServer(ServerProfile(ServerProfile.CONSTANT, latency_ms=0, max_requests_per_second=2)) as server:
+            statuses = [requests.get(server.url + self.URL).status_code for _ in range(3)]
+            self.assertEqual(requests.get(server.url + "/inconnu").status_code, 404)
+
+        self.assertIn(429, statuses)
+
+    def test_scrap_uc(self):
+        # récolte séquentielle complète, le serveur remplaçant ogimet
+        with tempfile.TemporaryDirectory() as tmp,\
+             StandInServer(ServerProfile(ServerProfile.CONSTANT, latency_ms=5)) as server:
+            try:
+                ucf = self._ucf(tmp, server, False,
+                                {"ogimet": [{"ind": "16138", "ville": "Ferrara", "dates": ["1/2021", "3/2021"]}]})
+                scrapper = OgimetDaily()
+                df = scrapper.scrap_uc(ucf.ogimet_ucs[0])
+            finally:
+                WorkerPool.close()
+                FetchEngine.close()
+                GeneralParametersUC.instance()._set_defaults()
+
+            self.assertEqual(df.shape[0], 31 + 28 + 31)
+            self.assertEqual(len(scrapper.errors), 0)
+            self.assertEqual(server.stats, {200: 3})
+
+    def test_scrap_ucs(self):
+        # récolte parallèle de 2 UCs sur un seul pool, chaque UC étant remis dès qu'il est terminé
+        done = dict()
+
+        def on_uc_done(uc, scrapper, results):
+            done[uc.city] = (results.rows, len(scrapper.errors), len(scrapper.metrics))
+
+        with tempfile.TemporaryDirectory() as tmp,\
+             StandInServer(ServerProfile(ServerProfile.CONSTANT, latency_ms=5)) as server:
+            try:
+                ucf = self._ucf(tmp, server, True,
+                                {"ogimet": [{"ind": "16138", "ville": "ferrara", "dates": ["1/2021", "3/2021"]}],
+                                 "meteociel": [{"code": "7249", "ville": "orleans", "dates": ["2/2020"]}]})
+                MeteoScrapper.scrap_ucs(ucf.get_all_ucs(), on_uc_done)
+            finally:
+                WorkerPool.close()
+                FetchEngine.close()
+                GeneralParametersUC.instance()._set_defaults()
+
+        self.assertEqual(done, {"ferrara": (31 + 28 + 31, 0, 3),
+                                "orleans": (29, 0, 1)})
+
+    def test_max_pending_tps(self):
+        # avec 1 seule tâche simultanée, les intervalles des TPs (trace) ne se chevauchent jamais, tous UCs confondus
+        spans = []
+
+        def on_uc_done(uc, scrapper, results):
+            spans.extend(x for m in scrapper.metrics.values() for x in m.spans if x[0] == TPMetrics.TP)
+
+        with tempfile.TemporaryDirectory() as tmp,\
+             StandInServer(ServerProfile(ServerProfile.CONSTANT, latency_ms=5)) as server:
+            try:
+                ucf = self._ucf(tmp, server, True,
+                                {"ogimet": [{"ind": "16138", "ville": "ferrara", "dates": ["1/2021", "3/2021"]}],
+                                 "meteociel": [{"code": "7249", "ville": "orleans", "dates": ["1/2020", "2/2020"]}]},
+                                taches_simultanees=1,
+                                trace=True)
+                MeteoScrapper.scrap_ucs(ucf.get_all_ucs(), on_uc_done)
+            finally:
+                WorkerPool.close()
+                FetchEngine.close()
+                GeneralParametersUC.instance()._set_defaults()
+
+        spans.sort(key=lambda x: x[1])
+        self.assertEqual(len(spans), 3 + 2)
+        for previous, following in zip(spans, spans[1:]):
+            self.assertLessEqual(previous[2], following[1])
+
+    def test_unexpected_error(self):
+        # le TP en échec inattendu est enregistré sous sa clé, avec son url et le message de l'erreur
+        with tempfile.TemporaryDirectory() as tmp,\
+             StandInServer(ServerProfile(ServerProfile.CONSTANT, latency_ms=5)) as server:
+            try:
+                ucf = self._ucf(tmp, server, True,
+                                {"ogimet": [{"ind": "16138", "ville": "ferrara", "dates": ["1/2021", "3/2021"]}]})
+                scrapper = FailingOgimetDaily()
+                df = scrapper.scrap_uc(ucf.ogimet_ucs[0])
+            finally:
+                WorkerPool.close()
+                FetchEngine.close()
+                GeneralParametersUC.instance()._set_defaults()
+
+        self.assertEqual(df.shape[0], 31 + 31)
+        self.assertEqual(len(scrapper.errors), 1)
+        error = list(scrapper.errors.values())[0]
+        self.assertIn("ano=2021&mes=2&", error["url"])
+        self.assertEqual(error["msg"], "RuntimeError : bug de traitement")
+        self.assertEqual(sorted(x.status for x in scrapper.metrics.values()),
+                         [TPMetrics.ERROR, TPMetrics.OK, TPMetrics.OK])
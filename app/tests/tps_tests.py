@@ -136,13 +136,13 @@ class TPsTester(TestCase):
                for uc in self.UCF.ogimet_ucs
                if uc.city == "31_fev"][0].to_tps()
 
-        tp_28_fev_2020 = next(tps)
+        tp_29_fev_2020 = next(tps)
 
         with self.assertRaises(StopIteration):
             next(tps)
 
-        self.assertEqual(tp_28_fev_2020.url,
-                         'https://www.ogimet.com/cgi-bin/gsynres?ind=bouh&ndays=1&ano=2020&mes=2&day=28&hora=23&lang=en&decoded=yes')
+        self.assertEqual(tp_29_fev_2020.url,
+                         'https://www.ogimet.com/cgi-bin/gsynres?ind=bouh&ndays=1&ano=2020&mes=2&day=29&hora=23&lang=en&decoded=yes')
 
 
     def test_wundd_one_month(self):
@@ -283,10 +283,10 @@ class TPsTester(TestCase):
                for uc in self.UCF.meteociel_ucs
                if uc.city == "31_fev"][0].to_tps()
 
-        tp_28_fev_2020 = next(tps)
+        tp_29_fev_2020 = next(tps)
 
         with self.assertRaises(StopIteration):
             next(tps)
 
-        self.assertEqual(tp_28_fev_2020.url,
-                         'https://www.meteociel.com/temps-reel/obs_villes.php?code2=bouh&annee2=2020&mois2=1&jour2=28')
+        self.assertEqual(tp_29_fev_2020.url,
+                         'https://www.meteociel.com/temps-reel/obs_villes.php?code2=bouh&annee2=2020&mois2=1&jour2=29')
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+from app.traces_module import ChromeTrace
+
+
+class ChromeTraceTester(TestCase):
+
+    MAIN_PID = 100
+    WORKER_PID = 200
+
+    def _metrics(self, key: str, start: float) -> TPMetrics:
+        # intervalles fixés à la main : 1 attente et 1 téléchargement dans le process principal,
+        # 1 étape de traitement dans un worker.
+        metrics = TPMetrics(key, f"https://www.ogimet.com/{key}", trace=True)
+        metrics._spans = [(TPMetrics.WAIT, start, start + 0.1, self.MAIN_PID),
+                          (TPMetrics.FETCH, start + 0.1, start + 0.5, self.MAIN_PID),
+                          (TPMetrics.FIND_TABLE, start + 0.5, start + 0.6, self.WORKER_PID)]
+        return metrics
+
+    def test_spans(self):
+        metrics = TPMetrics("a", "https://www.ogimet.com/a", trace=True)
+        worker_metrics = TPMetrics("a", "https://www.ogimet.com/a", trace=True)
+        untraced = TPMetrics("a", "https://www.ogimet.com/a")
+
+        with metrics.span(TPMetrics.ATTEMPT):
+            with worker_metrics.measure(TPMetrics.FIND_TABLE):
+                pass
+            metrics.merge(worker_metrics)
+
+        metrics.finish(TPMetrics.OK, 1)
+        with untraced.measure(TPMetrics.FIND_TABLE):
+            pass
+
+        self.assertEqual([x[0] for x in metrics.spans], [TPMetrics.FIND_TABLE, TPMetrics.ATTEMPT, TPMetrics.TP])
+        self.assertEqual(list(metrics.stages), [TPMetrics.FIND_TABLE])
+        self.assertTrue(all(start <= end for _, start, end, _ in metrics.spans))
+        self.assertEqual(untraced.spans, [])
+
+    def test_events(self):
+        trace = ChromeTrace(self.MAIN_PID)
+        trace.add("ogimet_ferrara", [self._metrics("a", 1000.0), self._metrics("b", 1000.2)])
+        events = trace.events()
+
+        complete = [x for x in events if x["ph"] == "X" and x["name"] != ChromeTrace.IDLE]
+        self.assertEqual(len(complete), 2)
+        self.assertEqual({x["pid"] for x in complete}, {self.WORKER_PID})
+        self.assertAlmostEqual(complete[0]["ts"], 500000.0)
+        self.assertAlmostEqual(complete[0]["dur"], 100000.0)
+
+        # le worker est inactif entre la fin du TP a (0.6 s) et le début du TP b (0.7 s)
+        idle = [x for x in events if x["name"] == ChromeTrace.IDLE]
+        self.assertEqual(len(idle), 1)
+        self.assertEqual((idle[0]["ph"], idle[0]["pid"], idle[0]["args"]["tp_suivant"]), ("X", self.WORKER_PID, "b"))
+        self.assertAlmostEqual(idle[0]["ts"], 600000.0)
+        self.assertAlmostEqual(idle[0]["dur"], 100000.0)
+
+        async_events = [x for x in events if x["ph"] in ("b", "e")]
+        self.assertEqual(len(async_events), 8)
+        self.assertEqual({x["id"] for x in async_events}, {"a", "b"})
+
+        names = {x["pid"]: x["args"]["name"] for x in events if x["ph"] == "M"}
+        self.assertEqual(names, {self.MAIN_PID: "principal", self.WORKER_PID: f"worker {self.WORKER_PID}"})
+
+    def test_write(self):
+        trace = ChromeTrace(self.MAIN_PID)
+        trace.add("ogimet_ferrara", [self._metrics("a", 1000.0)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            trace.write(directory)
+            with open(os.path.join(directory, ChromeTrace.FILENAME)) as trace_file:
+                self.assertEqual(json.load(trace_file), trace.to_json())
+
+        self.assertEqual(ChromeTrace().to_json()["traceEvents"], [])
@@ -17,6 +17,11 @@ from app.exceptions.ucf_checker_exceptions import (DateFieldException,
                                                    YearsDateException,
                                                    GeneralParametersFieldException)
 from app.ucs_module import GeneralParametersUC
+from app.boite_a_bonheur.ArchiveSettings import ArchiveSettings
+from app.boite_a_bonheur.CacheSettings import CacheSettings
+from app.boite_a_bonheur.WorkerSettings import WorkerSettings
+from app.boite_a_bonheur.HostLimits import HostLimits
+from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperTypes
 
 
 class UCFCheckerTester(TestCase):
@@ -51,6 +56,23 @@ class UCFCheckerTester(TestCase):
         "invalid_parallelism" : f"{BASE_PATH}/invalid_parallelism.json",
         "fake_parallelism"    : f"{BASE_PATH}/fake_parallelism.json",
         "missing_field_genprm": f"{BASE_PATH}/missing_field_genparams.json",
+        "limits"              : f"{BASE_PATH}/limits.json",
+        "invalid_limits_rate" : f"{BASE_PATH}/invalid_limits_rate.json",
+        "invalid_limits_fam"  : f"{BASE_PATH}/invalid_limits_family.json",
+        "invalid_render_wait" : f"{BASE_PATH}/invalid_render_timeout.json",
+        "cache"               : f"{BASE_PATH}/cache.json",
+        "invalid_cache"       : f"{BASE_PATH}/invalid_cache.json",
+        "archive"             : f"{BASE_PATH}/archive.json",
+        "invalid_archive"     : f"{BASE_PATH}/invalid_archive.json",
+        "missing_archive"     : f"{BASE_PATH}/missing_archive.json",
+        "local_server"        : f"{BASE_PATH}/local_server.json",
+        "invalid_local_server": f"{BASE_PATH}/invalid_local_server.json",
+        "invalid_trace"       : f"{BASE_PATH}/invalid_trace.json",
+        "invalid_profiling"   : f"{BASE_PATH}/invalid_profiling.json",
+        "invalid_memory_prof" : f"{BASE_PATH}/invalid_memory_profiling.json",
+        "workers"             : f"{BASE_PATH}/workers.json",
+        "invalid_workers"     : f"{BASE_PATH}/invalid_workers.json",
+        "invalid_pending_tps" : f"{BASE_PATH}/invalid_pending_tps.json",
     }
 
     def test_nominal_case(self):
@@ -144,6 +166,9 @@ class UCFCheckerTester(TestCase):
         with self.assertRaises(RequiredFieldException):
             UCFChecker.check(self.CONFIG_FILES["missing_field_genprm"])
 
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_render_wait"])
+
         config_file = UCFChecker.check(self.CONFIG_FILES["max_cpus_oob_2"])
         gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
         self.assertEqual(gpuc.cpus, UCFParameters.MAX_CPUS)
@@ -151,3 +176,94 @@ class UCFCheckerTester(TestCase):
         config_file = UCFChecker.check(self.CONFIG_FILES["fake_parallelism"])
         gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
         self.assertFalse(gpuc._should_download_in_parallel)
+
+    def test_limits(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_limits_rate"])
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_limits_fam"])
+
+        config_file = UCFChecker.check(self.CONFIG_FILES["limits"])
+        gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
+        default_meteociel = UCFParameters.DEFAULT_LIMITS[UCFParameters.METEOCIEL]
+
+        self.assertEqual(gpuc.limits_of(ScrapperTypes.OGIMET_HOURLY), HostLimits(0.5, 1))
+        self.assertEqual(gpuc.limits_of(ScrapperTypes.METEOCIEL_DAILY),
+                         HostLimits(default_meteociel.requests_per_second, 3))
+        self.assertEqual(gpuc.limits_of(ScrapperTypes.WUNDERGROUND_DAILY),
+                         UCFParameters.DEFAULT_LIMITS[UCFParameters.WUNDERGROUND])
+
+    def test_cache(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_cache"])
+
+        config_file = UCFChecker.check(self.CONFIG_FILES["cache"])
+        gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
+
+        self.assertEqual(gpuc.cache, CacheSettings(False,
+                                                   12,
+                                                   UCFParameters.DEFAULT_CACHE.max_size,
+                                                   UCFParameters.DEFAULT_CACHE.empty_recheck))
+
+    def test_workers(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_workers"])
+
+        config_file = UCFChecker.check(self.CONFIG_FILES["workers"])
+        gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
+        self.addCleanup(gpuc._set_defaults)
+
+        self.assertEqual(gpuc.workers, WorkerSettings(100, 1500))
+
+    def test_max_pending_tps(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_pending_tps"])
+
+        config_file = UCFChecker.check(self.CONFIG_FILES["correct"])
+        gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
+
+        self.assertEqual(gpuc.max_pending_tps, UCFParameters.DEFAULT_MAX_PENDING_TPS)
+
+    def test_archive(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_archive"])
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["missing_archive"])
+
+        config_file = UCFChecker.check(self.CONFIG_FILES["archive"])
+        gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
+
+        self.assertEqual(gpuc.archive, ArchiveSettings(ArchiveSettings.RECORD_MODE,
+                                                       UCFParameters.DEFAULT_ARCHIVE_FILE))
+
+    def test_local_server(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_local_server"])
+
+        config_file = UCFChecker.check(self.CONFIG_FILES["local_server"])
+        gpuc = GeneralParametersUC.from_json_object(config_file[UCFParameters.GENERAL_PARAMETERS.json_name])
+        # les tests suivants doivent interroger les vrais sites
+        self.addCleanup(gpuc._set_defaults)
+
+        self.assertEqual(gpuc.local_server, "http://127.0.0.1:8000")
+
+    def test_trace(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_trace"])
+
+    def test_profiling(self):
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_profiling"])
+
+        with self.assertRaises(GeneralParametersFieldException):
+            UCFChecker.check(self.CONFIG_FILES["invalid_memory_prof"])
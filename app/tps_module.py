@@ -1,7 +1,10 @@
 import abc
 import copy
+from datetime import date
 from string import Template
+from time import perf_counter
 
+from app.boite_a_bonheur.Calendar import Calendar
 from app.boite_a_bonheur.Criteria import Criteria
 from app.boite_a_bonheur.MonthEnum import Months
 from app.boite_a_bonheur.ScrapperTypeEnum import (ScrapperTypes,
@@ -244,7 +247,6 @@ class TPBuilder:
 class TaskParameters(abc.ABC):
 
     def __init__(self, builder: TPBuilder):
-        self._waiting = UCFParameters.DEFAULT_WAITING
         self._year = builder.year
         self._month = builder.month
         self._day = builder.day
@@ -252,6 +254,8 @@ class TaskParameters(abc.ABC):
         self._month_as_str = builder.month_as_str
         self._day_as_str = builder.day_as_str
         self._city = builder.city
+        self._attempts = 0
+        self._first_attempt_time = None
         self._url = ""
         self._criteria : Criteria = None
         self._scrapper_type : ScrapperType = builder.scrapper_type
@@ -318,16 +322,35 @@ class TaskParameters(abc.ABC):
     def criteria(self):
         return copy.copy(self._criteria)
 
-    @property
-    def waiting(self):
-        return self._waiting
-
     @property
     def key(self):
         return self._key
 
-    def update_waiting(self):
-        self._waiting *= 2
+    @property
+    def attempts(self):
+        return self._attempts
+
+    @property
+    def period_end(self) -> date:
+        """Dernier jour couvert par la page du TP."""
+        if self._scrapper_type in ScrapperTypes.hourly_scrappers():
+            return date(self._year, self._month, self._day)
+
+        return date(self._year, self._month, Calendar.ndays(self._year, self._month))
+
+    @property
+    def elapsed(self) -> float:
+        """Secondes écoulées depuis la première tentative, relances comprises."""
+        if self._first_attempt_time is None:
+            return 0.0
+
+        return perf_counter() - self._first_attempt_time
+
+    def register_attempt(self):
+        if self._first_attempt_time is None:
+            self._first_attempt_time = perf_counter()
+
+        self._attempts += 1
 
     def __repr__(self):
         return f"<{self.__class__.__name__} {self._url}>"
@@ -376,11 +399,12 @@ class OgimetTP(TaskParameters):
         self._criteria = self._CRITERIA
 
         if builder.scrapper_type == ScrapperTypes.OGIMET_DAILY:
+            ndays = Calendar.ndays(builder.year, builder.month)
             self._url = self._BASE_URL.substitute(ind=builder.ind,
-                                                  ndays=Months.from_id(builder.month).ndays,
+                                                  ndays=ndays,
                                                   ano=builder.year,
                                                   mes=builder.month,
-                                                  day=Months.from_id(builder.month).ndays,
+                                                  day=ndays,
                                                   decoded="no")
 
         elif builder.scrapper_type == ScrapperTypes.OGIMET_HOURLY:
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import (Dict,
+                    Iterable,
+                    List)
+from app.boite_a_bonheur.TPMetrics import TPMetrics
+
+
+class ChromeTrace:
+    """Chronologie des TPs d'un lancement, au format trace-event de Chrome.
+
+    Le fichier s'ouvre dans chrome://tracing ou https://ui.perfetto.dev :
+    1 ligne par worker avec les étapes qu'il a exécutées, ses temps morts entre 2 TPs,
+    et pour le process principal, les TPs, leurs tentatives, attentes et téléchargements."""
+
+    FILENAME = "trace.json"
+    IDLE = "inactif"
+
+    def __init__(self, main_pid: int = None):
+        self._main_pid = os.getpid() if main_pid is None else main_pid
+        self._ucs: Dict[str, List[TPMetrics]] = dict()
+
+    @property
+    def main_pid(self):
+        return self._main_pid
+
+    def add(self,
+            uc_name: str,
+            metrics: Iterable[TPMetrics]) -> None:
+        """Ajoute les mesures des TPs d'un UC, typiquement MeteoScrapper.metrics.values()."""
+        self._ucs.setdefault(uc_name, []).extend(metrics)
+
+    def events(self) -> List[dict]:
+        """Renvoie les évènements de la trace, datés en µs depuis le début du 1er intervalle."""
+        # (1)   Les intervalles des workers sont des évènements complets (X) : un worker ne traite
+        #       qu'un TP à la fois, ses intervalles ne se chevauchent pas.
+        # (2)   Ceux du process principal se chevauchent, les TPs y avançant en même temps :
+        #       ce sont des évènements asynchrones (b / e), regroupés par TP via leur id.
+        # (3)   Les temps morts de chaque worker sont des évènements complets (X) nommés IDLE : l'intervalle
+        #       entre la fin de la dernière étape d'un TP et le début de la 1ère étape du TP suivant.
+        #       Les intervalles entre 2 étapes d'un même TP sont le surcoût de la mesure, pas des temps morts.
+        # (4)   Chaque process est nommé par un évènement de métadonnées (M).
+        spans = [(uc_name, tp_metrics.key, span)
+                 for uc_name, metrics in self._ucs.items()
+                 for tp_metrics in metrics
+                 for span in tp_metrics.spans]
+
+        if not spans:
+            return []
+
+        origin = min(span[1] for _, _, span in spans)
+        events = []
+        pids = set()
+        workers: Dict[int, List[tuple]] = dict()
+
+        for uc_name, key, (name, start, end, pid) in spans:
+            ts = round((start - origin) * 1e6, 1)
+            args = {"uc": uc_name, "tp": key}
+            pids.add(pid)
+            # (1)
+            if pid != self._main_pid:
+                events.append({"name": name, "cat": uc_name, "ph": "X", "ts": ts,
+                               "dur": round((end - start) * 1e6, 1), "pid": pid, "tid": pid, "args": args})
+                workers.setdefault(pid, []).append((start, end, key))
+                continue
+            # (2)
+            events.append({"name": name, "cat": uc_name, "ph": "b", "ts": ts,
+                           "id": key, "pid": pid, "tid": pid, "args": args})
+            events.append({"name": name, "cat": uc_name, "ph": "e", "ts": round((end - origin) * 1e6, 1),
+                           "id": key, "pid": pid, "tid": pid})
+        # (3)
+        for pid, worker_spans in workers.items():
+            worker_spans.sort()
+            last_end, last_key = worker_spans[0][1], worker_spans[0][2]
+            for start, end, key in worker_spans[1:]:
+                if key != last_key and start > last_end:
+                    events.append({"name": self.IDLE, "cat": self.IDLE, "ph": "X",
+                                   "ts": round((last_end - origin) * 1e6, 1),
+                                   "dur": round((start - last_end) * 1e6, 1),
+                                   "pid": pid, "tid": pid, "args": {"tp_suivant": key}})
+                last_end, last_key = max(last_end, end), key
+        # (4)
+        for pid in sorted(pids):
+            name = "principal" if pid == self._main_pid else f"worker {pid}"
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": pid, "args": {"name": name}})
+
+        return sorted(events, key=lambda x: x.get("ts", 0))
+
+    def to_json(self) -> dict:
+        return {"traceEvents": self.events(),
+                "displayTimeUnit": "ms"}
+
+    def write(self, directory: str) -> None:
+        """Écrit trace.json dans le dossier."""
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, self.FILENAME), "w", encoding="utf-8") as json_file:
+            json.dump(self.to_json(), json_file)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._ucs)} UCs>"
@@ -1,13 +1,22 @@
 import abc
 import copy
+import random
 from abc import ABC
 from typing import (Any,
+                    Dict,
                     List,
-                    Generator)
-
+                    Generator,
+                    Iterator,
+                    Tuple)
+
+from app.boite_a_bonheur.ArchiveSettings import ArchiveSettings
+from app.boite_a_bonheur.Calendar import Calendar
+from app.boite_a_bonheur.CacheSettings import CacheSettings
+from app.boite_a_bonheur.HostLimits import HostLimits
 from app.boite_a_bonheur.MonthEnum import Months
 from app.boite_a_bonheur.ScrapperTypeEnum import ScrapperTypes, ScrapperType
 from app.boite_a_bonheur.UCFParameterEnum import UCFParameter, UCFParameters
+from app.boite_a_bonheur.WorkerSettings import WorkerSettings
 from app.tps_module import (TPBuilder,
                             TaskParameters)
 
@@ -19,6 +28,18 @@ class GeneralParametersUC:
     def __init__(self):
         self._should_download_in_parallel: bool = UCFParameters.DEFAULT_PARALLELISM
         self._cpus: int = UCFParameters.DEFAULT_CPUS
+        self._limits: Dict[UCFParameter, HostLimits] = dict(UCFParameters.DEFAULT_LIMITS)
+        self._render_timeout: float = UCFParameters.DEFAULT_RENDER_TIMEOUT
+        self._retry_delay: float = UCFParameters.DEFAULT_RETRY_DELAY
+        self._max_attempts: int = UCFParameters.DEFAULT_MAX_ATTEMPTS
+        self._max_pending_tps: int = UCFParameters.DEFAULT_MAX_PENDING_TPS
+        self._cache: CacheSettings = UCFParameters.DEFAULT_CACHE
+        self._archive: ArchiveSettings = None
+        self._local_server: str = None
+        self._trace: bool = False
+        self._profiling: bool = False
+        self._memory_profiling: bool = False
+        self._workers: WorkerSettings = UCFParameters.DEFAULT_WORKERS
         raise RuntimeError("GeneralParametersUC : appeler GeneralParametersUC.instance()")
 
     @property
@@ -29,10 +50,90 @@ class GeneralParametersUC:
     def cpus(self):
         return self._cpus
 
+    @property
+    def limits(self) -> Dict[UCFParameter, HostLimits]:
+        return dict(self._limits)
+
+    @property
+    def render_timeout(self):
+        return self._render_timeout
+
+    @property
+    def retry_delay(self):
+        return self._retry_delay
+
+    @property
+    def max_attempts(self):
+        return self._max_attempts
+
+    @property
+    def max_pending_tps(self):
+        """Nombre max de TPs en cours (téléchargement, attente d'un worker, traitement), tous UCs confondus."""
+        return self._max_pending_tps
+
+    @property
+    def cache(self) -> CacheSettings:
+        return copy.copy(self._cache)
+
+    @property
+    def archive(self) -> ArchiveSettings:
+        """Archive des pages téléchargées, None si les pages ne sont ni enregistrées ni relues."""
+        return copy.copy(self._archive)
+
+    @property
+    def local_server(self) -> str:
+        """URL du serveur local qui remplace les sites météo, None pour interroger les vrais sites."""
+        return self._local_server
+
+    @property
+    def trace(self) -> bool:
+        """True pour enregistrer la chronologie des étapes de chaque TP, dans chaque process."""
+        return self._trace
+
+    @property
+    def profiling(self) -> bool:
+        """True pour profiler (cProfile) le traitement de chaque page, dans chaque process."""
+        return self._profiling
+
+    @property
+    def memory_profiling(self) -> bool:
+        """True pour mesurer la mémoire (tracemalloc, RSS) des étapes de traitement, dans chaque process."""
+        return self._memory_profiling
+
+    @property
+    def workers(self) -> WorkerSettings:
+        """Remplacement des workers du pool, après un nombre de tâches ou au-delà d'une taille mémoire."""
+        return copy.copy(self._workers)
+
+    def backoff(self, attempt: int) -> float:
+        """Renvoie le délai à attendre avant la relance qui suit la tentative n° attempt (1, 2, ...)."""
+        # Le délai double à chaque échec. La part aléatoire évite que les TPs
+        # en échec au même moment soient tous relancés en même temps.
+        delay = self._retry_delay * 2 ** (attempt - 1)
+        return delay + random.uniform(0, delay)
+
+    def limits_of(self, scrapper_type: ScrapperType) -> HostLimits:
+        """Renvoie les limites de débit du site interrogé par ce type de scrapper."""
+        return self._limits[self.family_of(scrapper_type)]
+
+    @staticmethod
+    def family_of(scrapper_type: ScrapperType) -> UCFParameter:
+        """Renvoie le site (meteociel, ogimet, wunderground) d'un type de scrapper."""
+        families = {UCFParameters.METEOCIEL: ScrapperTypes.meteociel_scrappers(),
+                    UCFParameters.OGIMET: ScrapperTypes.ogimet_scrappers(),
+                    UCFParameters.WUNDERGROUND: ScrapperTypes.wunderground_scrappers()}
+
+        for family, scrapper_types in families.items():
+            if scrapper_type in scrapper_types:
+                return family
+
+        raise ValueError(f"GeneralParametersUC.family_of : paramètre invalide {scrapper_type}")
+
     @classmethod
     def from_json_object(cls, jsono: dict) -> "GeneralParametersUC":
 
         gpuc = GeneralParametersUC.instance()
+        gpuc._set_defaults()
         gpuc._should_download_in_parallel = jsono[UCFParameters.PARALLELISM.json_name]
 
         user_cpus = jsono[UCFParameters.CPUS.json_name]
@@ -45,19 +146,88 @@ class GeneralParametersUC:
         else:
             gpuc._cpus = user_cpus
 
+        # Les paramètres suivants sont optionnels et gardent leur valeur par défaut s'ils sont absents.
+        gpuc._render_timeout = jsono.get(UCFParameters.RENDER_TIMEOUT.json_name, gpuc._render_timeout)
+        gpuc._retry_delay = jsono.get(UCFParameters.RETRY_DELAY.json_name, gpuc._retry_delay)
+        gpuc._max_attempts = jsono.get(UCFParameters.MAX_ATTEMPTS.json_name, gpuc._max_attempts)
+        gpuc._max_pending_tps = jsono.get(UCFParameters.MAX_PENDING_TPS.json_name, gpuc._max_pending_tps)
+
+        user_cache = jsono.get(UCFParameters.CACHE.json_name, dict())
+        default = UCFParameters.DEFAULT_CACHE
+        gpuc._cache = CacheSettings(user_cache.get(UCFParameters.CACHE_ENABLED.json_name, default.enabled),
+                                    user_cache.get(UCFParameters.CACHE_MAX_AGE.json_name, default.max_age),
+                                    user_cache.get(UCFParameters.CACHE_MAX_SIZE.json_name, default.max_size),
+                                    user_cache.get(UCFParameters.CACHE_EMPTY_RECHECK.json_name, default.empty_recheck))
+
+        user_archive = jsono.get(UCFParameters.ARCHIVE.json_name)
+        if user_archive is not None:
+            gpuc._archive = ArchiveSettings(user_archive[UCFParameters.ARCHIVE_MODE.json_name],
+                                            user_archive.get(UCFParameters.ARCHIVE_FILE.json_name,
+                                                             UCFParameters.DEFAULT_ARCHIVE_FILE))
+            # En relecture, toutes les pages viennent de l'archive et sont retraitées :
+            # les caches sont désactivés pour ne pas court-circuiter le traitement.
+            if gpuc._archive.is_replaying:
+                gpuc._cache = CacheSettings(False,
+                                            gpuc._cache.max_age,
+                                            gpuc._cache.max_size,
+                                            gpuc._cache.empty_recheck)
+
+        user_workers = jsono.get(UCFParameters.WORKERS.json_name, dict())
+        default = UCFParameters.DEFAULT_WORKERS
+        gpuc._workers = WorkerSettings(user_workers.get(UCFParameters.WORKERS_MAX_TASKS.json_name, default.max_tasks),
+                                       user_workers.get(UCFParameters.WORKERS_MAX_MEMORY.json_name, default.max_memory))
+
+        gpuc._local_server = jsono.get(UCFParameters.LOCAL_SERVER.json_name)
+        gpuc._trace = jsono.get(UCFParameters.TRACE.json_name, gpuc._trace)
+        gpuc._profiling = jsono.get(UCFParameters.PROFILING.json_name, gpuc._profiling)
+        gpuc._memory_profiling = jsono.get(UCFParameters.MEMORY_PROFILING.json_name, gpuc._memory_profiling)
+
+        # Les limites sont optionnelles, par site et par champ.
+        user_limits = jsono.get(UCFParameters.LIMITS.json_name, dict())
+        for family in UCFParameters.SCRAPPERS:
+            try:
+                family_limits = user_limits[family.json_name]
+            except KeyError:
+                continue
+
+            default = UCFParameters.DEFAULT_LIMITS[family]
+            gpuc._limits[family] = HostLimits(family_limits.get(UCFParameters.REQUESTS_PER_SECOND.json_name,
+                                                                default.requests_per_second),
+                                              family_limits.get(UCFParameters.MAX_IN_FLIGHT.json_name,
+                                                                default.max_in_flight))
         return gpuc
 
     @classmethod
     def instance(cls) -> "GeneralParametersUC":
         if cls._INSTANCE is None:
             cls._INSTANCE = GeneralParametersUC.__new__(cls)
-            cls._INSTANCE._should_download_in_parallel = UCFParameters.DEFAULT_PARALLELISM
-            cls._INSTANCE._cpus = UCFParameters.DEFAULT_CPUS
+            cls._INSTANCE._set_defaults()
 
         return cls._INSTANCE
 
+    @classmethod
+    def install(cls, gpuc: "GeneralParametersUC") -> None:
+        """Remplace l'instance courante, pour transmettre les paramètres du process principal aux workers."""
+        cls._INSTANCE = gpuc
+
+    def _set_defaults(self) -> None:
+        self._should_download_in_parallel = UCFParameters.DEFAULT_PARALLELISM
+        self._cpus = UCFParameters.DEFAULT_CPUS
+        self._limits = dict(UCFParameters.DEFAULT_LIMITS)
+        self._render_timeout = UCFParameters.DEFAULT_RENDER_TIMEOUT
+        self._retry_delay = UCFParameters.DEFAULT_RETRY_DELAY
+        self._max_attempts = UCFParameters.DEFAULT_MAX_ATTEMPTS
+        self._max_pending_tps = UCFParameters.DEFAULT_MAX_PENDING_TPS
+        self._cache = UCFParameters.DEFAULT_CACHE
+        self._archive = None
+        self._local_server = None
+        self._trace = False
+        self._profiling = False
+        self._memory_profiling = False
+        self._workers = UCFParameters.DEFAULT_WORKERS
+
     def __repr__(self):
-        return f"<{self.__class__.__name__} {self._should_download_in_parallel} {self._cpus}>"
+        return f"<{self.__class__.__name__} {self._should_download_in_parallel} {self._cpus} {self._limits}>"
 
 
 class ScrapperUC(ABC):
@@ -118,7 +288,7 @@ class ScrapperUC(ABC):
         if is_hourly:
             for index, date in enumerate(suc._dates):
                 day, month, year = (int(x) for x in date.split("/"))
-                max_day = Months.from_id(month).ndays
+                max_day = Calendar.ndays(year, month)
                 if day > max_day:
                     suc._dates[index] = f"{max_day}/{month}/{year}"
                 else:
@@ -134,6 +304,20 @@ class ScrapperUC(ABC):
     def to_tps(self) -> Generator[TaskParameters, Any, None]:
         pass
 
+    def _months(self) -> Iterator[Tuple[int, int]]:
+        """Renvoie (année, mois) pour chaque mois de la période demandée, du 1er au dernier."""
+        start, end = ([int(x) for x in date.split("/")][-2:] for date in (self.dates[0], self.dates[-1]))
+        years, months, _ = Calendar.split(Calendar.months(start, end))
+
+        return zip(years.tolist(), months.tolist())
+
+    def _days(self) -> Iterator[Tuple[int, int, int]]:
+        """Renvoie (année, mois, jour) pour chaque jour de la période demandée, du 1er au dernier."""
+        start, end = ([int(x) for x in date.split("/")] for date in (self.dates[0], self.dates[-1]))
+        years, months, days = Calendar.split(Calendar.days(start, end))
+
+        return zip(years.tolist(), months.tolist(), days.tolist())
+
     @abc.abstractmethod
     def _get_parameters(self) -> List[UCFParameter]:
         pass
@@ -194,50 +378,26 @@ class MeteocielUC(ScrapperUC):
 
     def to_tps(self):
 
-        should_run = True
-
         if self.scrapper_type == ScrapperTypes.METEOCIEL_DAILY:
 
-            current_month, current_year = [int(x) for x in self.dates[0].split("/")]
-
-            while should_run:
+            for year, month in self._months():
 
                 yield TPBuilder(self.scrapper_type).with_code(self._code)\
                                                     .with_city(self._city)\
-                                                    .with_year(current_year)\
-                                                    .with_month(current_month)\
+                                                    .with_year(year)\
+                                                    .with_month(month)\
                                                     .build()
 
-                if f"{current_month}/{current_year}" == self.dates[-1]:
-                    should_run = False
-
-                current_month = current_month % UCFParameters.MAX_MONTHS + 1
-                if current_month == 1:
-                    current_year += 1
-
         elif self.scrapper_type == ScrapperTypes.METEOCIEL_HOURLY:
 
-            current_day, current_month, current_year = [int(x) for x in self.dates[0].split("/")]
-
-            while should_run:
+            for year, month, day in self._days():
 
                 yield TPBuilder(self.scrapper_type).with_code(self._code)\
                                                     .with_city(self._city)\
-                                                    .with_year(current_year)\
-                                                    .with_month(current_month)\
-                                                    .with_day(current_day)\
+                                                    .with_year(year)\
+                                                    .with_month(month)\
+                                                    .with_day(day)\
                                                     .build()
-
-                if f"{current_day}/{current_month}/{current_year}" == self.dates[-1]:
-                    should_run = False
-
-                current_day = current_day % Months.from_id(current_month).ndays + 1
-
-                if current_day == 1:
-                    current_month = current_month % UCFParameters.MAX_MONTHS + 1
-
-                if current_day == 1 and current_month == 1:
-                    current_year += 1
         else:
             raise ValueError("MeteocielUC.to_tps : ScrapperTypes inconnu")
 
@@ -263,25 +423,15 @@ class OgimetUC(ScrapperUC):
 
     def to_tps(self):
 
-        should_run = True # permet de faire agir la boucle while comme une do while
-
         if self.scrapper_type == ScrapperTypes.OGIMET_DAILY:
 
-            current_month, current_year = [int(x) for x in self.dates[0].split("/")]
-
-            while should_run:
+            for year, month in self._months():
 
                 yield TPBuilder(self.scrapper_type).with_ind(self._ind)\
                                                     .with_city(self._city)\
-                                                    .with_year(current_year)\
-                                                    .with_month(current_month)\
+                                                    .with_year(year)\
+                                                    .with_month(month)\
                                                     .build()
-                if f"{current_month}/{current_year}" == self.dates[-1]:
-                    should_run = False
-
-                current_month = current_month % UCFParameters.MAX_MONTHS + 1
-                if current_month == 1:
-                    current_year += 1
 
         elif self.scrapper_type == ScrapperTypes.OGIMET_HOURLY:
             # La requête consiste à demander les n derniers jour à partir du jour j.
@@ -292,46 +442,30 @@ class OgimetUC(ScrapperUC):
             # Si le 1er janvier est inclus dans la demande de l'utilisateur, on les exclue du processus principal
             # et on les traite à part via list_of_1er_jan.
 
-            current_day, current_month, current_year = [int(x) for x in self.dates[0].split("/")]
+            start_day, start_month, start_year = [int(x) for x in self.dates[0].split("/")]
             end_day, end_month, end_year = [int(x) for x in self.dates[-1].split("/")]
             has_single_date = self.dates[0] == self.dates[-1]
             list_of_1er_jan = []
 
-            if (current_month, current_year) == (end_month, end_year):
-                n_days = end_day - current_day + 1
-                current_day = end_day
-            else:
-                n_days = Months.from_id(current_month).ndays - current_day + 1
-                current_day = Months.from_id(current_month).ndays
+            for year, month in self._months():
 
-            while should_run:
+                first_day = start_day if (month, year) == (start_month, start_year) else 1
+                last_day = end_day if (month, year) == (end_month, end_year) else Calendar.ndays(year, month)
+                n_days = last_day - first_day + 1
 
-                if(     Months.from_id(current_month) == Months.JANVIER
-                   and  current_day - n_days == 0
+                if(     month == Months.JANVIER.numero
+                   and  first_day == 1
                    and not has_single_date):
                     n_days -= 1
-                    list_of_1er_jan.append(current_year)
+                    list_of_1er_jan.append(year)
 
                 yield TPBuilder(self.scrapper_type).with_ind(self._ind)\
                                                     .with_city(self._city)\
-                                                    .with_year(current_year)\
-                                                    .with_month(current_month)\
-                                                    .with_day(current_day)\
+                                                    .with_year(year)\
+                                                    .with_month(month)\
+                                                    .with_day(last_day)\
                                                     .with_ndays(n_days)\
                                                     .build()
-                if f"{current_day}/{current_month}/{current_year}" == self.dates[-1]:
-                    should_run = False
-
-                current_month = current_month % UCFParameters.MAX_MONTHS + 1
-                if current_month == 1:
-                    current_year += 1
-
-                if (current_month, current_year) == (end_month, end_year):
-                    current_day = min(end_day, Months.from_id(current_month).ndays)
-                else:
-                    current_day = Months.from_id(current_month).ndays
-
-                n_days = current_day
 
             for year in list_of_1er_jan:
                 yield TPBuilder(self.scrapper_type).with_ind(self._ind)\
@@ -369,25 +503,15 @@ class WundergroundUC(ScrapperUC):
 
     def to_tps(self):
 
-        should_run = True
-
         if self.scrapper_type == ScrapperTypes.WUNDERGROUND_DAILY:
 
-            current_month, current_year = [int(x) for x in self.dates[0].split("/")]
-
-            while should_run:
+            for year, month in self._months():
                 yield TPBuilder(self.scrapper_type).with_country_code(self._country_code)\
                                                     .with_region(self._region)\
                                                     .with_city(self._city)\
-                                                    .with_year(current_year)\
-                                                    .with_month(current_month)\
+                                                    .with_year(year)\
+                                                    .with_month(month)\
                                                     .build()
-                if f"{current_month}/{current_year}" == self.dates[-1]:
-                    should_run = False
-
-                current_month = current_month % UCFParameters.MAX_MONTHS + 1
-                if current_month == 1:
-                    current_year += 1
 
         elif self.scrapper_type == ScrapperTypes.WUNDERGROUND_HOURLY:
             raise NotImplementedError("un jour peut être !")
@@ -2,6 +2,22 @@ import unittest
 from app.tests.ucf_checker_tests import UCFCheckerTester
 from app.tests.ucs_tests import UCsTester
 from app.tests.tps_tests import TPsTester
+from app.tests.calendar_tests import CalendarTester
+from app.tests.caches_tests import PageCacheTester
+from app.tests.caches_tests import ResultCacheTester
+from app.tests.caches_tests import EmptyCacheTester
+from app.tests.archives_tests import PageArchiveTester
+from app.tests.stand_in_server_tests import StandInServerTester
+from app.tests.benchmarks_tests import PipelineBenchmarkTester
+from app.tests.parsers_tests import ParsersTester
+from app.tests.metrics_tests import TPMetricsTester
+from app.tests.metrics_tests import MetricsReportTester
+from app.tests.traces_tests import ChromeTraceTester
+from app.tests.results_tests import UCResultsTester
+from app.tests.profiling_tests import ProfileReportTester
+from app.tests.memory_tests import MemoryProbeTester
+from app.tests.memory_tests import MemoryReportTester
+from app.tests.pool_tests import WorkerPoolTester
 from app.tests.meteociel_tests import MeteocielDailyTester
 from app.tests.meteociel_tests import MeteocielHourlyTester
 # from app.tests.wunderground_tests import WundergroundDailyTester